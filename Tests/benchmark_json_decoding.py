@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark de decodificación JSON con formas de respuesta reales
+Compara el camino anterior (quitar BOM + decode + json.loads) con cada
+backend instalado de aquadapt_json.
+"""
+
+import json
+import os
+import sys
+import timeit
+
+# Añadir directorio padre al path
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+from aquadapt_json import BOM, JsonDecoder, available_backends
+
+
+def cargar_muestras():
+    """Construir cuerpos con BOM como los devuelve la API"""
+    with open(os.path.join(ROOT, "aquadapt BMB Id.json"), "rb") as f:
+        catalogo = f.read()
+    if not catalogo.startswith(BOM):
+        catalogo = BOM + catalogo
+
+    with open(
+        os.path.join(ROOT, "consulta_onoffschedule_EB3_G1_20251024_150034.json"),
+        encoding="utf-8",
+    ) as f:
+        puntos = json.load(f)["datos"]
+
+    # Un mes de puntos cada 30 minutos (detailed) a partir de la muestra real
+    serie_mes = (puntos * (1440 // max(len(puntos), 1) + 1))[:1440]
+    serie = BOM + json.dumps(puntos).encode("utf-8")
+    serie_larga = BOM + json.dumps(serie_mes).encode("utf-8")
+
+    return {
+        "catalogo (/physicalPumps/)": catalogo,
+        f"serie {len(puntos)} puntos": serie,
+        f"serie {len(serie_mes)} puntos": serie_larga,
+    }
+
+
+def camino_anterior(content: bytes):
+    """Decodificación previa: dos copias del cuerpo"""
+    if content.startswith(BOM):
+        content = content[3:]
+    return json.loads(content.decode("utf-8"))
+
+
+def main():
+    print("🔬 BENCHMARK DE DECODIFICACIÓN JSON")
+    print("=" * 60)
+
+    decoders = {"anterior": camino_anterior}
+    for name in available_backends():
+        decoders[name] = JsonDecoder(name).loads
+
+    for muestra, content in cargar_muestras().items():
+        print(f"\n📄 {muestra} ({len(content) / 1024:.1f} KB)")
+        base = None
+        for name, loads in decoders.items():
+            assert loads(content) == camino_anterior(content)
+            repeticiones = 200
+            tiempo = min(
+                timeit.repeat(lambda: loads(content), number=repeticiones, repeat=5)
+            )
+            por_llamada = tiempo / repeticiones * 1e6
+            base = base or por_llamada
+            print(f"   {name:10s} {por_llamada:10.1f} µs  x{base / por_llamada:.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Utilidades compartidas por los tests (sin conexión a la API)
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from aquadapt_api_client_oficial_v2 import AquaAdvancedClient
+from aquadapt_ranges import align_down, format_time
+
+CADENCIA = timedelta(minutes=30)
+
+_AUSENTE = object()
+
+
+@contextmanager
+def configuracion(**opciones):
+    """Cambiar valores de config dentro del bloque y restaurarlos al salir"""
+    anteriores = {nombre: getattr(config, nombre, _AUSENTE) for nombre in opciones}
+    for nombre, valor in opciones.items():
+        setattr(config, nombre, valor)
+    try:
+        yield
+    finally:
+        for nombre, valor in anteriores.items():
+            if valor is _AUSENTE:
+                delattr(config, nombre)
+            else:
+                setattr(config, nombre, valor)
+
+
+def cliente_local(**opciones):
+    """
+    Cliente sin cachés en disco salvo que se pidan en `opciones`
+
+    La configuración solo se cambia mientras se construye el cliente.
+    """
+    opciones = {"SHARED_CACHE_ENABLED": False, "HTTP_CACHE_ENABLED": False, **opciones}
+    with configuracion(**opciones):
+        return AquaAdvancedClient()
+
+
+def puntos_servidor(inicio: datetime, fin: datetime):
+    """
+    Serie cada 30 minutos como la devuelve la API: incluye el intervalo
+    que contiene `inicio` (primer punto en o antes de inicio) hasta `fin`
+    """
+    t = align_down(inicio, CADENCIA)
+    serie = []
+    while t <= fin:
+        serie.append({"time": format_time(t), "value": 1.0, "validity": 0})
+        t += CADENCIA
+    return serie
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test del cliente asíncrono contra un servidor aiohttp local
+(requiere aiohttp; sin conexión a la API)
+"""
+
+import asyncio
+import os
+import sys
+
+import pytest
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import config
+from aquadapt_async_client import AsyncAquaAdvancedClient, aiohttp
+
+requiere_aiohttp = pytest.mark.skipif(aiohttp is None, reason="aiohttp no instalado")
+
+PUNTOS = [{"time": "2025-10-23T15:00:00Z", "value": 1.0, "validity": 0}]
+
+
+async def servidor_local(peticiones):
+    """Servidor con /physicalPumps/, /physicalPumps/b1/ y la serie de status"""
+    from aiohttp import web
+
+    async def lista(request):
+        peticiones.append(request.path)
+        base = f"http://{request.host}/publication/physicalPumps/b1"
+        return web.json_response(
+            {"results": [{"id": "b1", "name": "EB1 G1", "href": base + "/"}]}
+        )
+
+    async def info(request):
+        peticiones.append(request.path)
+        base = f"http://{request.host}/publication/physicalPumps/b1"
+        return web.json_response({"id": "b1", "status": {"href": base + "/status/"}})
+
+    async def status(request):
+        peticiones.append(request.path)
+        assert request.query["startTime"] == "2025-10-23T15:00:00Z"
+        await asyncio.sleep(0.05)
+        return web.json_response(PUNTOS)
+
+    app = web.Application()
+    app.router.add_get("/publication/physicalPumps/", lista)
+    app.router.add_get("/publication/physicalPumps/b1/", info)
+    app.router.add_get("/publication/physicalPumps/b1/status/", status)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}/publication"
+
+
+@requiere_aiohttp
+def test_lista_info_y_series():
+    """Misma API que el cliente síncrono: catálogo, enlaces y series"""
+
+    async def escenario():
+        peticiones = []
+        runner, base_url = await servidor_local(peticiones)
+        anterior = config.API_BASE_URL
+        config.API_BASE_URL = base_url
+        try:
+            async with AsyncAquaAdvancedClient() as client:
+                bombas = await client.get_bombas_list()
+                assert [b["id"] for b in bombas] == ["b1"]
+
+                # Sin enlaces en la lista: se pide /physicalPumps/b1/ una vez
+                # y las llamadas idénticas simultáneas comparten la petición
+                resultados = await asyncio.gather(
+                    *(
+                        client.get_bomba_status(
+                            "b1", "2025-10-23T15:00:00", "2025-10-23T16:00:00"
+                        )
+                        for _ in range(5)
+                    )
+                )
+                assert resultados == [PUNTOS] * 5
+                assert await client.get_bomba_endpoint("b1", "speed") == {}
+        finally:
+            config.API_BASE_URL = anterior
+            await runner.cleanup()
+        return peticiones
+
+    peticiones = asyncio.run(escenario())
+    assert peticiones.count("/publication/physicalPumps/b1/") == 1
+    assert peticiones.count("/publication/physicalPumps/b1/status/") == 1
+    assert peticiones.count("/publication/physicalPumps/") == 1
+
+
+if __name__ == "__main__":
+    test_lista_info_y_series()
+    print("✅ Test completado")
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+Test del circuit breaker por familia de endpoint y de la caché de respaldo
+"""
+
+import os
+import sys
+import time
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from aquadapt_api_client_oficial_v2 import request_key
+from aquadapt_resilience import (
+    CircuitBreaker,
+    CircuitOpenError,
+    FallbackCache,
+    endpoint_kind,
+)
+from comun import cliente_local
+
+CLAVE = "servidor/status"
+
+
+def test_se_abre_tras_el_umbral():
+    """Cerrado hasta `failure_threshold` fallos seguidos; abierto rechaza"""
+    breaker = CircuitBreaker(failure_threshold=3, reset_timeout=60)
+    for _ in range(2):
+        assert breaker.allow(CLAVE)
+        breaker.record_failure(CLAVE)
+    assert breaker.get_state(CLAVE) == CircuitBreaker.CLOSED
+
+    # Un éxito reinicia la cuenta de fallos consecutivos
+    assert breaker.allow(CLAVE)
+    breaker.record_success(CLAVE)
+    for _ in range(3):
+        assert breaker.allow(CLAVE)
+        breaker.record_failure(CLAVE)
+    assert breaker.get_state(CLAVE) == CircuitBreaker.OPEN
+
+    assert not breaker.allow(CLAVE)
+    assert not breaker.allow(CLAVE)
+    assert breaker.get_stats()[CLAVE]["rejected"] == 2
+
+    # Otras familias no se ven afectadas
+    assert breaker.allow("servidor/rawpower")
+
+
+def test_semiabierto_limita_las_sondas():
+    """Pasado reset_timeout solo salen `half_open_max` peticiones de prueba"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05, half_open_max=2)
+    breaker.allow(CLAVE)
+    breaker.record_failure(CLAVE)
+    time.sleep(0.1)
+
+    assert breaker.allow(CLAVE)
+    assert breaker.get_state(CLAVE) == CircuitBreaker.HALF_OPEN
+    assert breaker.allow(CLAVE)
+    assert not breaker.allow(CLAVE)
+
+
+def test_sonda_correcta_cierra_y_fallida_reabre():
+    """Una sonda con éxito cierra el circuito; una fallida lo vuelve a abrir"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0.05)
+    breaker.allow(CLAVE)
+    breaker.record_failure(CLAVE)
+
+    time.sleep(0.1)
+    assert breaker.allow(CLAVE)
+    breaker.record_failure(CLAVE)
+    assert breaker.get_state(CLAVE) == CircuitBreaker.OPEN
+    assert not breaker.allow(CLAVE)
+
+    time.sleep(0.1)
+    assert breaker.allow(CLAVE)
+    breaker.record_success(CLAVE)
+    assert breaker.get_state(CLAVE) == CircuitBreaker.CLOSED
+    assert breaker.allow(CLAVE) and breaker.allow(CLAVE)
+
+
+def test_familia_y_respaldo():
+    """La clave agrupa por familia de endpoint; el respaldo es un LRU"""
+    base = "https://servidor/publication/physicalPumps"
+    b1 = "040b3d5d-a68a-dc52-0623-5d2f6fcd2682"
+    b2 = "0f55305c-fa54-4111-e10f-9eff39c40e6a"
+    assert endpoint_kind(f"{base}/{b1}/status/") == "status"
+    assert endpoint_kind(f"{base}/{b2}/status/") == "status"
+    assert endpoint_kind(f"{base}/{b1}/status/detailed/") == "status/detailed"
+
+    respaldo = FallbackCache(max_entries=2)
+    respaldo.put(("a",), 1)
+    respaldo.put(("b",), 2)
+    respaldo.get(("a",))
+    respaldo.put(("c",), 3)
+    assert respaldo.get(("b",)) is None
+    assert respaldo.get(("a",)) == 1 and respaldo.get(("c",)) == 3
+
+
+def test_cliente_usa_respaldo_con_circuito_abierto():
+    """Con el circuito abierto el cliente devuelve el respaldo o falla"""
+    bomba = "040b3d5d-a68a-dc52-0623-5d2f6fcd2682"
+    href = f"https://servidor/publication/physicalPumps/{bomba}/status/"
+    client = cliente_local(CIRCUIT_FAILURE_THRESHOLD=1, CIRCUIT_RESET_TIMEOUT=60)
+    peticiones = []
+
+    def request(method, url, params=None, **kwargs):
+        peticiones.append(url)
+        raise AssertionError("con el circuito abierto no se envían peticiones")
+
+    with client:
+        client.session.request = request
+        client.circuit_breaker.record_failure(f"servidor/{endpoint_kind(href)}")
+
+        clave = request_key(href, {})
+        with pytest.raises(CircuitOpenError):
+            client._fetch_href_data(bomba, href, {}, clave)
+
+        client.fallback_cache.put(clave, {"state": "on"})
+        assert client._fetch_href_data(bomba, href, {}, clave) == {"state": "on"}
+    assert peticiones == []
+
+
+if __name__ == "__main__":
+    test_se_abre_tras_el_umbral()
+    test_semiabierto_limita_las_sondas()
+    test_sonda_correcta_cierra_y_fallida_reabre()
+    test_familia_y_respaldo()
+    test_cliente_usa_respaldo_con_circuito_abierto()
+    print("✅ Test completado")
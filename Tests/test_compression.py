@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Test de la negociación de compresión y de los bytes comprimidos frente a
+decodificados (servidor HTTP local, sin conexión a la API)
+"""
+
+import gzip
+import json
+import os
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aquadapt_api_client_oficial_v2 import TransferStats
+from comun import cliente_local
+
+PUNTOS = [
+    {"time": f"2025-10-23T{h:02d}:00:00Z", "value": float(h), "validity": 0}
+    for h in range(24)
+] * 20
+CUERPO = json.dumps(PUNTOS).encode()
+
+
+class Manejador(BaseHTTPRequestHandler):
+    """Responde la serie con gzip si el cliente lo acepta"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = CUERPO
+        self.send_response(200)
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_header("Content-Encoding", "gzip")
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def test_bytes_comprimidos_y_decodificados():
+    """Se negocia gzip y se cuentan los bytes del socket y los descomprimidos"""
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/publication/x/"
+
+    try:
+        with cliente_local() as client:
+            for _ in range(2):
+                assert client._request("GET", url).json() == PUNTOS
+            stats = client.get_transfer_stats()["x"]
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+    assert stats["responses"] == 2
+    assert stats["encodings"] == {"gzip": 2}
+    assert stats["decoded_bytes"] == 2 * len(CUERPO)
+    assert stats["wire_bytes"] == 2 * len(gzip.compress(CUERPO))
+    assert stats["ratio"] > 10
+
+
+def test_suma_por_familia():
+    """TransferStats acumula por familia y calcula el ratio"""
+    stats = TransferStats()
+    stats.add("status", 100, 400, "gzip")
+    stats.add("status", 300, 300)
+    stats.add("rawpower", 0, 0)
+
+    resultado = stats.get_stats()
+    assert resultado["status"]["wire_bytes"] == 400
+    assert resultado["status"]["decoded_bytes"] == 700
+    assert resultado["status"]["encodings"] == {"gzip": 1, "identity": 1}
+    assert resultado["status"]["ratio"] == 700 / 400
+    assert resultado["rawpower"]["ratio"] == 1.0
+
+
+if __name__ == "__main__":
+    test_bytes_comprimidos_y_decodificados()
+    test_suma_por_familia()
+    print("✅ Test completado")
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+Test del limitador adaptativo de concurrencia (AIMD)
+"""
+
+import os
+import sys
+import threading
+import time
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aquadapt_resilience import AdaptiveConcurrencyLimiter
+
+
+def peticion(limiter, overloaded=False):
+    """Simular una petición completa dentro de un hueco"""
+    limiter.acquire()
+    limiter.release(time.monotonic(), overloaded)
+
+
+def test_aumento_con_peticiones_sanas():
+    """El límite sube en uno por cada `limit` respuestas sanas, hasta el máximo"""
+    limiter = AdaptiveConcurrencyLimiter(initial=2, max_limit=4, latency_target=1)
+    peticion(limiter)
+    assert limiter.limit == 2
+    peticion(limiter)
+    assert limiter.limit == 3
+    for _ in range(20):
+        peticion(limiter)
+    assert limiter.limit == 4
+    assert limiter.get_stats()["increases"] == 2
+
+
+def test_reduccion_una_vez_por_ventana():
+    """Los reintentos seguidos de una llamada reducen el límite una sola vez"""
+    limiter = AdaptiveConcurrencyLimiter(initial=8, latency_target=0.2)
+    for _ in range(3):
+        peticion(limiter, overloaded=True)
+    assert limiter.limit == 4
+
+    time.sleep(0.25)
+    peticion(limiter, overloaded=True)
+    assert limiter.limit == 2
+    assert limiter.get_stats()["decreases"] == 2
+
+
+def test_fallo_aislado_entre_sanas():
+    """Un fallo suelto entre respuestas sanas (sonda) no reduce el límite"""
+    limiter = AdaptiveConcurrencyLimiter(initial=8, max_limit=8, latency_target=0)
+    for _ in range(49):
+        peticion(limiter)
+    peticion(limiter, overloaded=True)
+    assert limiter.limit == 8
+
+
+def test_limite_minimo():
+    """Las reducciones nunca bajan del mínimo"""
+    limiter = AdaptiveConcurrencyLimiter(initial=8, min_limit=2, latency_target=0)
+    for _ in range(10):
+        peticion(limiter, overloaded=True)
+    assert limiter.limit == 2
+    assert limiter.get_stats()["decreases"] == 10
+
+
+def test_espera_sin_hueco():
+    """Con el límite alcanzado, acquire espera a que se libere un hueco"""
+    limiter = AdaptiveConcurrencyLimiter(initial=1, max_limit=1)
+    limiter.acquire()
+    dentro = threading.Event()
+
+    def otra():
+        limiter.acquire()
+        dentro.set()
+        limiter.release(time.monotonic())
+
+    hilo = threading.Thread(target=otra)
+    hilo.start()
+    assert not dentro.wait(0.1)
+    limiter.release(time.monotonic())
+    assert dentro.wait(1)
+    hilo.join()
+    assert limiter.in_flight == 0
+    assert limiter.get_stats()["waits"] == 1
+
+
+if __name__ == "__main__":
+    test_aumento_con_peticiones_sanas()
+    test_reduccion_una_vez_por_ventana()
+    test_fallo_aislado_entre_sanas()
+    test_limite_minimo()
+    test_espera_sin_hueco()
+    print("✅ Test completado")
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test de la reutilización de conexiones del pool keep-alive
+(servidor HTTP local, sin conexión a la API)
+"""
+
+import os
+import sys
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comun import cliente_local
+
+
+class Manejador(BaseHTTPRequestHandler):
+    """Responde [] manteniendo la conexión abierta (HTTP/1.1)"""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", "2")
+        self.end_headers()
+        self.wfile.write(b"[]")
+
+    def log_message(self, *args):
+        pass
+
+
+def test_peticiones_reutilizan_conexion():
+    """Las peticiones sucesivas reutilizan la misma conexión TCP"""
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/publication/x/"
+    try:
+        with cliente_local() as client:
+            for _ in range(5):
+                assert client._request("GET", url).json() == []
+            stats = client.get_connection_stats()
+            assert stats == {
+                "requests": 5,
+                "new_connections": 1,
+                "reused_connections": 4,
+            }
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+def test_pool_acotado_entre_hilos():
+    """Con muchos hilos nunca se abren más de POOL_MAXSIZE conexiones"""
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Manejador)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{servidor.server_address[1]}/publication/x/"
+    try:
+        with cliente_local(POOL_MAXSIZE=2) as client:
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                list(executor.map(lambda _: client._request("GET", url), range(40)))
+            stats = client.get_connection_stats()
+            assert stats["requests"] == 40
+            assert stats["new_connections"] <= 2
+    finally:
+        servidor.shutdown()
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    test_peticiones_reutilizan_conexion()
+    test_pool_acotado_entre_hilos()
+    print("✅ Test completado")
@@ -10,7 +10,7 @@ from datetime import datetime, timedelta
 # Añadir directorio padre al path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from aquadapt_api_client_oficial_v2 import AquaAdvancedClient
+from comun import cliente_local
 
 
 def test_date_formatting():
@@ -18,7 +18,7 @@ def test_date_formatting():
     print("🔍 PRUEBA DE FORMATO DE FECHAS PARA API AQUAADVANCED")
     print("=" * 60)
 
-    client = AquaAdvancedClient()
+    client = cliente_local()
 
     # Casos de prueba
     test_cases = [
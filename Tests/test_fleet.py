@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test de las consultas de flota con fallos parciales
+(sesión HTTP simulada, sin conexión a la API)
+"""
+
+import json
+import os
+import sys
+
+import requests
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from comun import cliente_local
+
+BASE = "https://servidor/publication/physicalPumps"
+PUNTOS = [{"time": "2025-10-23T15:00:00Z", "value": 1.0, "validity": 0}]
+
+# Respuesta de cada href: (código HTTP, cuerpo)
+RESPUESTAS = {
+    f"{BASE}/b1/status/": (200, PUNTOS),
+    f"{BASE}/b2/status/": (200, []),
+    f"{BASE}/b3/status/": (404, {"detail": "Not found"}),
+}
+
+
+def respuesta(url, status, cuerpo):
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response._content = json.dumps(cuerpo).encode()
+    return response
+
+
+def cliente_simulado():
+    """Cliente sin cachés en disco cuya sesión responde desde RESPUESTAS"""
+    client = cliente_local()
+    client.peticiones = []
+
+    def request(method, url, **kwargs):
+        client.peticiones.append(url)
+        return respuesta(url, *RESPUESTAS[url])
+
+    client.session.request = request
+    return client
+
+
+def test_fallo_parcial_de_flota():
+    """El fallo de una bomba no impide obtener el resto"""
+    bombas = [
+        {"id": f"b{i}", "name": f"EB{i} G1", "status": {"href": f"{BASE}/b{i}/status/"}}
+        for i in (1, 2, 3)
+    ]
+    with cliente_simulado() as client:
+        resumen = client.fetch_fleet(bombas, ["status"], max_workers=3)
+
+    por_bomba = {r["bomba_id"]: r for r in resumen["results"]}
+    assert por_bomba["b1"]["status"] == "ok"
+    assert por_bomba["b1"]["data"] == PUNTOS
+    assert por_bomba["b1"]["name"] == "EB1 G1"
+    assert por_bomba["b2"]["status"] == "empty"
+    assert por_bomba["b3"]["status"] == "error"
+    assert "404" in por_bomba["b3"]["error"]
+    assert (resumen["ok"], resumen["empty"], resumen["errors"]) == (1, 1, 1)
+    assert all(r["latency"] >= 0 for r in resumen["results"])
+
+    # El 404 no se reintenta
+    assert client.peticiones.count(f"{BASE}/b3/status/") == 1
+
+
+if __name__ == "__main__":
+    test_fallo_parcial_de_flota()
+    print("✅ Test completado")
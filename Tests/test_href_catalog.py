@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Test del catálogo de enlaces href, su instantánea y el índice de bombas
+(sin conexión a la API)
+"""
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aquadapt_api_client_oficial_v2 import load_bmb_list_from_file
+from aquadapt_catalog import (
+    HrefCatalog,
+    PumpIndex,
+    load_catalog_snapshot,
+    parse_pump_name,
+    save_catalog_snapshot,
+)
+from comun import configuracion
+
+BMB_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "aquadapt BMB Id.json"
+)
+
+
+def bombas_del_archivo():
+    """Cargar el archivo local con la instantánea en un directorio temporal"""
+    with tempfile.TemporaryDirectory() as tmp, configuracion(CATALOG_SNAPSHOT_DIR=tmp):
+        return load_bmb_list_from_file(BMB_FILE)
+
+
+def test_seed_desde_archivo():
+    """El archivo local contiene los 16 enlaces de cada bomba"""
+    bombas = bombas_del_archivo()
+    catalog = HrefCatalog()
+
+    assert catalog.seed(bombas) == len(bombas)
+
+    links = catalog.get_links(bombas[0]["id"])
+    assert len(links) == 16
+    assert catalog.get(bombas[0]["id"], "rawpower/detailed").endswith(
+        "/rawpower/detailed/"
+    )
+
+
+def test_ttl_e_invalidacion():
+    """Las entradas caducan con el TTL y se pueden invalidar"""
+    catalog = HrefCatalog(ttl=0.05)
+    catalog.update("b1", {"id": "b1", "status": {"href": "https://x/b1/status/"}})
+
+    assert catalog.get("b1", "status") == "https://x/b1/status/"
+    catalog.invalidate("b1")
+    assert catalog.get_links("b1") is None
+
+    catalog.update("b1", {"status": {"href": "https://x/b1/status/"}})
+    time.sleep(0.1)
+    assert catalog.get_links("b1") is None
+
+
+def test_instantanea_compilada():
+    """La instantánea reproduce el JSON y se descarta si el archivo cambia"""
+    with tempfile.TemporaryDirectory() as tmp:
+        archivo = os.path.join(tmp, "bombas.json")
+        shutil.copy(BMB_FILE, archivo)
+        with open(archivo, "rb") as f:
+            contenido = f.read()
+        bombas = json.loads(contenido.decode("utf-8-sig"))
+
+        assert load_catalog_snapshot(archivo, tmp) is None
+        save_catalog_snapshot(archivo, contenido, bombas, tmp)
+        assert load_catalog_snapshot(archivo, tmp) == bombas
+
+        # Mismo contenido con otro mtime: se reutiliza
+        os.utime(archivo, (0, 0))
+        assert load_catalog_snapshot(archivo, tmp) == bombas
+
+        with open(archivo, "w", encoding="utf-8") as f:
+            json.dump(bombas[:1], f)
+        assert load_catalog_snapshot(archivo, tmp) is None
+
+
+def nombres(bombas):
+    return [b["name"] for b in bombas]
+
+
+def test_indice_de_bombas():
+    """Búsqueda exacta, por estación, por prefijo y aproximada"""
+    indice = PumpIndex(bombas_del_archivo())
+
+    assert parse_pump_name("EB3 G4") == ("EB3", 4)
+    assert parse_pump_name("eb03-g4") == ("EB3", 4)
+    assert indice.get("eb3g4")["name"] == "EB3 G4"
+    assert indice.get(indice.get("EB3 G4")["id"])["name"] == "EB3 G4"
+
+    # 'EB1' como estación no incluye EB10..EB19, como prefijo sí
+    assert nombres(indice.station("EB1")) == [f"EB1 G{g}" for g in range(1, 7)]
+    assert len(indice.prefix("EB1")) == 34
+    assert indice.stations()[:3] == ["EB0", "EB1", "EB2"]
+
+    assert indice.search("eb 25 g2")[0][0]["name"] == "EB25 G2"
+    assert nombres(b for b, _ in indice.search("EB6", limit=4)) == [
+        f"EB6 G{g}" for g in range(1, 5)
+    ]
+    assert nombres(indice.select(["EB3 G4", "EB5"])) == sorted(
+        ["EB3 G4", "EB5 G1", "EB5 G2"],
+        key=nombres(indice.pumps).index,
+    )
+    # Una cadena es un solo patrón, no una lista de caracteres
+    assert nombres(indice.select("EB5")) == ["EB5 G1", "EB5 G2"]
+
+
+if __name__ == "__main__":
+    test_seed_desde_archivo()
+    test_ttl_e_invalidacion()
+    test_instantanea_compilada()
+    test_indice_de_bombas()
+    print("✅ Test completado")
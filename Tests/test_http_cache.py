@@ -0,0 +1,298 @@
+#!/usr/bin/env python3
+"""
+Test de la caché HTTP condicional del catálogo, de la caché compartida y
+de las lecturas obsoletas con revalidación (sin conexión a la API)
+"""
+
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+import config
+from aquadapt_api_client_oficial_v2 import InvalidResponseError
+from aquadapt_cache import (
+    HttpCache,
+    MemoryCache,
+    SharedCache,
+    StaleWhileRevalidate,
+    TieredCache,
+    canonical_key,
+)
+from comun import cliente_local
+
+URL = "https://servidor/publication/physicalPumps/"
+
+
+def test_validadores_y_ttl():
+    """Con validadores se revalida; sin ellos se sirve durante el TTL"""
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = HttpCache(tmp, ttl=60)
+        assert cache.get(URL) is None
+        assert cache.conditional_headers(None) == {}
+
+        cache.put(URL, b"[1]", {"ETag": '"v1"', "Last-Modified": "Fri, 24 Oct 2025"})
+        entrada = HttpCache(tmp).get(URL)  # Persistida en disco
+        assert entrada["body"] == b"[1]"
+        assert not cache.is_fresh(entrada)
+        assert cache.conditional_headers(entrada) == {
+            "If-None-Match": '"v1"',
+            "If-Modified-Since": "Fri, 24 Oct 2025",
+        }
+
+        cache.touch(URL, entrada, {"ETag": '"v2"'})
+        assert cache.get(URL)["etag"] == '"v2"'
+
+        otra = URL + "abc/"
+        cache.put(otra, b"{}", {})
+        assert cache.is_fresh(cache.get(otra))
+        assert not HttpCache(tmp, ttl=0).is_fresh(cache.get(otra))
+        assert cache.get_stats() == {"fresh": 1, "revalidated": 1, "stored": 2}
+
+        cache.invalidate(otra)
+        cache.invalidate(otra)  # Sin entrada no falla
+        assert cache.get(otra) is None
+        assert cache.get(URL) is not None
+
+
+def test_cache_compartida_lru():
+    """Las entradas se comparten entre instancias y se expulsan por LRU y TTL"""
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "respuestas.db")
+        cache = SharedCache(ruta, max_bytes=250)
+        clave = canonical_key((URL, (("endTime", "b"), ("startTime", "a"))))
+        assert clave == URL + "?endTime=b&startTime=a"
+
+        cache.put("a", b"a" * 100)
+        cache.put("b", b"b" * 100)
+        otro_proceso = SharedCache(ruta, max_bytes=250)
+        assert otro_proceso.get("a") == b"a" * 100  # 'a' pasa a ser la más reciente
+        time.sleep(0.01)
+
+        cache.put("c", b"c" * 100)  # Supera 250 bytes: se expulsa 'b'
+        assert cache.get("b") is None
+        assert cache.get("a") is not None and cache.get("c") is not None
+
+        cache.put("d", b"d", ttl=0)
+        assert cache.get("d") is None
+        cache.close()
+        otro_proceso.close()
+
+
+def test_cache_en_dos_niveles():
+    """L1 respeta el presupuesto en bytes y promociona los aciertos de L2"""
+    memoria = MemoryCache(max_bytes=1000)
+    memoria.put("pequeña", "a", size=100)
+    memoria.put("grande", "b", size=600)
+    memoria.put("cara", "c", size=300, cost=100.0)
+    memoria.get("grande")
+
+    # No cabe: se expulsa la de menor coste por byte aunque sea la más usada
+    memoria.put("nueva", "d", size=200)
+    assert memoria.get("grande") is None
+    assert memoria.get("cara") == "c" and memoria.get("pequeña") == "a"
+    assert memoria.get_stats()["bytes"] <= 1000
+
+    with tempfile.TemporaryDirectory() as tmp:
+        disco = SharedCache(os.path.join(tmp, "respuestas.db"))
+        disco.put(URL, b"[1, 2]")
+        cache = TieredCache(MemoryCache(), disco, json.loads)
+        assert cache.get(URL) == [1, 2]  # Desde L2
+        assert cache.get(URL) == [1, 2]  # Promocionada a L1
+        stats = cache.get_stats()
+        assert stats["l1"]["hits"] == 1 and stats["l2"]["hits"] == 1
+        disco.close()
+
+
+def test_cuerpo_corrupto_en_cache_compartida():
+    """Un cuerpo truncado no se guarda y uno ya guardado se descarta"""
+    with tempfile.TemporaryDirectory() as tmp:
+        ruta = os.path.join(tmp, "respuestas.db")
+        client = cliente_local(
+            SHARED_CACHE_ENABLED=True,
+            SHARED_CACHE_PATH=ruta,
+            MEMORY_CACHE_MAX_MB=0,
+        )
+
+        cuerpos = [b'[{"time": "2020-01-01T00:', b'[{"time": "2020-01-01T00:00:00Z"}]']
+
+        def request(method, url, params=None, **kwargs):
+            response = requests.Response()
+            response.status_code = 200
+            response.url = url
+            response._content = cuerpos.pop(0)
+            return response
+
+        with client:
+            client.session.request = request
+            client.range_cache = None
+            clave = (URL, (("endTime", "b"),))
+            try:
+                client._fetch_href_data("b1", URL, {"endTime": "b"}, clave)
+                assert False, "Debería propagar el error"
+            except InvalidResponseError:
+                pass
+            assert client.get_shared_cache_stats()["entries"] == 0
+            assert client.fallback_cache.get(clave) is None
+
+            # Una entrada corrupta de versiones anteriores cuenta como fallo
+            client.shared_cache.put(canonical_key(clave), b"[{")
+            datos = client._fetch_href_data("b1", URL, {"endTime": "b"}, clave)
+            assert datos == [{"time": "2020-01-01T00:00:00Z"}]
+            assert client.shared_cache.get(canonical_key(clave)).startswith(b'[{"')
+
+
+def test_estado_actual_sin_cache():
+    """Las lecturas sin rango no se guardan; los rangos antiguos sí"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = cliente_local(
+            SHARED_CACHE_ENABLED=True,
+            SHARED_CACHE_PATH=os.path.join(tmp, "respuestas.db"),
+        )
+
+        pedidas = []
+
+        def request(method, url, params=None, **kwargs):
+            pedidas.append(params)
+            response = requests.Response()
+            response.status_code = 200
+            response.url = url
+            response._content = b'[{"time": "2020-01-01T00:00:00Z"}]'
+            return response
+
+        with client:
+            client.session.request = request
+            for _ in range(2):
+                client._fetch_href_data("b1", URL, {}, (URL, ()))
+            assert len(pedidas) == 2
+
+            rango = {
+                "startTime": "2020-01-01T00:00:00Z",
+                "endTime": "2020-01-02T00:00:00Z",
+            }
+            clave = (URL, tuple(sorted(rango.items())))
+            for _ in range(2):
+                client._fetch_href_data("b1", URL, rango, clave)
+            assert len(pedidas) == 3
+
+
+def test_ruta_compartida_no_escribible():
+    """Si no se puede abrir la caché compartida el cliente funciona sin ella"""
+    with tempfile.TemporaryDirectory() as tmp:
+        fichero = os.path.join(tmp, "fichero")
+        open(fichero, "w").close()
+        client = cliente_local(
+            SHARED_CACHE_ENABLED=True,
+            SHARED_CACHE_PATH=os.path.join(fichero, "respuestas.db"),
+        )
+
+        with client:
+            assert client.shared_cache is None
+            assert client.get_shared_cache_stats() == {}
+            assert client.response_cache.l2 is None
+
+
+def test_404_descarta_el_catalogo_en_disco():
+    """Tras un 404 en un href se vuelve a pedir /physicalPumps/{id}/"""
+    with tempfile.TemporaryDirectory() as tmp:
+        client = cliente_local(
+            MEMORY_CACHE_MAX_MB=0,
+            HTTP_CACHE_ENABLED=True,
+            HTTP_CACHE_DIR=tmp,
+        )
+
+        info = client.base_url + config.ENDPOINTS["individual_pump"] + "/b1/"
+        enlaces = [info + "antiguo/status/", info + "nuevo/status/"]
+        pedidas = []
+
+        def request(method, url, params=None, **kwargs):
+            pedidas.append(url)
+            response = requests.Response()
+            response.url = url
+            response.status_code = 200
+            if url == info:
+                cuerpo = {"id": "b1", "status": {"href": enlaces.pop(0)}}
+                response._content = json.dumps(cuerpo).encode()
+            elif "antiguo" in url:
+                response.status_code = 404
+            else:
+                response._content = b'[{"time": "2020-01-01T00:00:00Z"}]'
+            return response
+
+        with client:
+            client.session.request = request
+            args = ("b1", "2020-01-01T00:00:00", "2020-01-01T01:00:00")
+            assert client.get_bomba_status(*args) == []
+            assert client.get_bomba_status(*args) == [{"time": "2020-01-01T00:00:00Z"}]
+            assert pedidas.count(info) == 2
+
+
+def test_obsoleto_mientras_revalida():
+    """Lo obsoleto se sirve al momento y se refresca una sola vez en segundo plano"""
+    cache = StaleWhileRevalidate(max_age=0.3, stale=5)
+    llamadas = []
+    liberar = threading.Event()
+
+    def cargar():
+        llamadas.append(1)
+        if len(llamadas) > 1:
+            liberar.wait(2)
+        return len(llamadas)
+
+    assert cache.get("ultimo", cargar) == 1  # Sin entrada: carga en la llamada
+    assert cache.get("ultimo", cargar) == 1  # Fresca
+    time.sleep(0.35)
+
+    # Obsoleta: todas las lecturas responden sin esperar al refresco
+    inicio = time.perf_counter()
+    assert [cache.get("ultimo", cargar) for _ in range(5)] == [1] * 5
+    assert time.perf_counter() - inicio < 0.5
+    liberar.set()
+    time.sleep(0.05)
+
+    assert cache.get("ultimo", cargar) == 2
+    stats = cache.get_stats()
+    assert len(llamadas) == 2
+    assert stats["refreshes"] == 1 and stats["deduplicated"] == 4
+    cache.close()
+
+
+def test_refresco_fallido_mantiene_valor():
+    """Un error al revalidar conserva el valor hasta que deja de ser servible"""
+    cache = StaleWhileRevalidate(max_age=0, stale=0.2)
+    cache.get("catalogo", lambda: "v1")
+
+    def fallar():
+        raise ConnectionError("sin servidor")
+
+    assert cache.get("catalogo", fallar) == "v1"
+    time.sleep(0.05)
+    assert cache.get_stats()["refresh_errors"] == 1
+
+    time.sleep(0.2)
+    try:
+        cache.get("catalogo", fallar)
+        assert False, "Debería propagar el error"
+    except ConnectionError:
+        pass
+    cache.close()
+
+
+if __name__ == "__main__":
+    test_validadores_y_ttl()
+    test_cache_compartida_lru()
+    test_cache_en_dos_niveles()
+    test_cuerpo_corrupto_en_cache_compartida()
+    test_estado_actual_sin_cache()
+    test_ruta_compartida_no_escribible()
+    test_404_descarta_el_catalogo_en_disco()
+    test_obsoleto_mientras_revalida()
+    test_refresco_fallido_mantiene_valor()
+    print("✅ Test completado")
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Test del parser JSON incremental (sin conexión a la API)
+"""
+
+import json
+import os
+import sys
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aquadapt_json import iter_json_array
+
+
+def trocear(content: bytes, size: int):
+    return [content[i : i + size] for i in range(0, len(content), size)]
+
+
+def test_array_por_trozos():
+    """Mismo resultado que json.loads con cualquier tamaño de trozo"""
+    puntos = [
+        {"time": "2025-10-23T15:00:00Z", "value": 1.0, "validity": 0},
+        {"time": "2025-10-23T15:30:00Z", "value": 1250.5, "validity": 1},
+        12345,
+        -1e-05,
+    ]
+    content = b"\xef\xbb\xbf" + json.dumps(puntos).encode("utf-8")
+
+    for size in (1, 2, 5, 64, len(content)):
+        assert list(iter_json_array(trocear(content, size))) == puntos
+
+
+def test_semantica_de_respuestas_vacias_e_invalidas():
+    """Vacío y JSON inválido no producen puntos, igual que decode_api_content"""
+    assert list(iter_json_array([b""])) == []
+    assert list(iter_json_array([b"\xef\xbb", b"\xbf \n"])) == []
+    assert list(iter_json_array([b"{bad"])) == []
+    assert list(iter_json_array([b'{"a": ', b"1}"])) == [{"a": 1}]
+
+
+if __name__ == "__main__":
+    test_array_por_trozos()
+    test_semantica_de_respuestas_vacias_e_invalidas()
+    print("✅ Test completado")
@@ -0,0 +1,174 @@
+#!/usr/bin/env python3
+"""
+Test de la caché por rangos y de la caché de vacíos (sin conexión a la API)
+"""
+
+import json
+import os
+import sys
+from datetime import datetime, timedelta, timezone
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+
+from aquadapt_ranges import NegativeCache, RangeCache, parse_time, subtract_intervals
+from comun import CADENCIA, cliente_local, puntos_servidor
+
+HREF = "https://servidor/publication/physicalPumps/b1/status/"
+
+
+def cliente_simulado(cuerpos=None):
+    """
+    Cliente sin cachés de respuestas cuya sesión responde con
+    puntos_servidor(), o con los cuerpos indicados en orden
+    """
+    client = cliente_local(MEMORY_CACHE_MAX_MB=0)
+    client.peticiones = []
+
+    def request(method, url, params=None, **kwargs):
+        client.peticiones.append(params)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        if cuerpos is not None:
+            response._content = cuerpos.pop(0)
+        else:
+            inicio = parse_time(params["startTime"])
+            fin = parse_time(params["endTime"])
+            response._content = json.dumps(puntos_servidor(inicio, fin)).encode()
+        return response
+
+    client.session.request = request
+    client.href_catalog.seed([{"id": "b1", "status": {"href": HREF}}])
+    return client
+
+
+def test_huecos_y_cache():
+    """Solo se piden los huecos no cubiertos"""
+    d = datetime(2025, 10, 1)
+    cubiertos = [
+        (d, d + timedelta(hours=6)),
+        (d + timedelta(hours=12), d + timedelta(hours=18)),
+    ]
+    assert subtract_intervals(d, d + timedelta(hours=24), cubiertos) == [
+        (d + timedelta(hours=6), d + timedelta(hours=12)),
+        (d + timedelta(hours=18), d + timedelta(hours=24)),
+    ]
+
+    cache = RangeCache()
+    clave = ("b1", "speed")
+    cache.store(
+        clave, d, d + timedelta(hours=24), puntos_servidor(d, d + timedelta(hours=24))
+    )
+
+    assert cache.gaps(clave, d + timedelta(hours=2), d + timedelta(hours=20)) == []
+    assert len(cache.get(clave, d, d + timedelta(hours=1))) == 3
+    assert cache.gaps(clave, d, d + timedelta(hours=30)) == [
+        (d + timedelta(hours=24), d + timedelta(hours=30))
+    ]
+
+
+def test_intervalo_que_contiene_el_inicio():
+    """Con rangos no alineados se devuelve lo mismo que el servidor"""
+    inicio = datetime(2025, 10, 23, 15, 0, 21)
+    fin = datetime(2025, 10, 24, 15, 0, 21)
+
+    cache = RangeCache()
+    cache.store(("b1", "status"), inicio, fin, puntos_servidor(inicio, fin))
+    assert cache.get(("b1", "status"), inicio, fin, CADENCIA) == puntos_servidor(
+        inicio, fin
+    )
+
+    with cliente_simulado() as client:
+        args = ("b1", "2025-10-23T15:00:21", "2025-10-24T15:00:21")
+        primera = client.get_bomba_status(*args)
+        assert len(primera) == 49
+        assert primera[0]["time"] == "2025-10-23T15:00:00Z"
+
+        # Desde la caché: mismos puntos y ninguna petición nueva
+        peticiones = len(client.peticiones)
+        assert client.get_bomba_status(*args) == primera
+        assert len(client.peticiones) == peticiones
+
+
+def test_detallados_sin_alinear():
+    """En los endpoints detallados no se amplía el rango hacia atrás"""
+    with cliente_simulado() as client:
+        assert client._point_cadence("status") == CADENCIA
+        assert client._point_cadence("status/detailed") is None
+
+    cache = RangeCache()
+    clave = ("b1", "status/detailed")
+    d = datetime(2025, 10, 23, 15)
+    detallados = [
+        {"time": f"2025-10-23T15:{m:02d}:00Z", "value": 1.0, "validity": 0}
+        for m in (5, 17, 29, 41)
+    ]
+    cache.store(clave, d, d + timedelta(hours=1), detallados)
+    desde = d + timedelta(minutes=20)
+    assert cache.get(clave, desde, d + timedelta(hours=1)) == detallados[2:]
+
+
+def test_cache_negativa():
+    """Los vacíos antiguos son permanentes y los recientes caducan"""
+    cache = NegativeCache(ttl=timedelta(0), permanent_after=timedelta(days=7))
+    antiguo = datetime(2020, 1, 1)
+    cache.record(("b", "status"), antiguo, antiguo + timedelta(days=1))
+    assert cache.is_empty(("b", "status"), antiguo, antiguo + timedelta(hours=6))
+    assert not cache.is_empty(("b", "status"), antiguo, antiguo + timedelta(days=2))
+    assert not cache.is_empty(("b", "rawpower"), antiguo, antiguo + timedelta(hours=6))
+
+    reciente = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(hours=1)
+    cache.record(("b", "status"), reciente, reciente + timedelta(minutes=30))
+    assert not cache.is_empty(
+        ("b", "status"), reciente, reciente + timedelta(minutes=30)
+    )
+
+
+def test_cache_negativa_acotada():
+    """Se recuerdan como mucho max_series series y los recientes caducados se purgan"""
+    cache = NegativeCache(ttl=timedelta(0), max_series=2)
+    antiguo = datetime(2020, 1, 1)
+    for bomba in ("b1", "b2", "b3"):
+        cache.record((bomba, "status"), antiguo, antiguo + timedelta(days=1))
+    assert not cache.is_empty(("b1", "status"), antiguo, antiguo)
+    assert cache.is_empty(("b3", "status"), antiguo, antiguo)
+    assert cache.get_stats()["permanent_series"] == 2
+
+    reciente = datetime.now(timezone.utc).replace(tzinfo=None)
+    for bomba in ("b1", "b2", "b3"):
+        cache.record((bomba, "status"), reciente, reciente + timedelta(minutes=5))
+    assert cache.get_stats()["temporary_series"] == 1
+
+
+def test_cuerpo_corrupto_no_es_vacio():
+    """Solo un cuerpo vacío se recuerda como rango sin datos"""
+    truncado = json.dumps(puntos_servidor(datetime(2020, 1, 1), datetime(2020, 1, 2)))[
+        :50
+    ]
+    valido = json.dumps(puntos_servidor(datetime(2020, 1, 1), datetime(2020, 1, 1, 1)))
+    cuerpos = [truncado.encode(), valido.encode(), b"\xef\xbb\xbf"]
+    args = ("b1", "2020-01-01T00:00:00", "2020-01-01T01:00:00")
+
+    with cliente_simulado(cuerpos) as client:
+        client.range_cache = None
+        assert client.get_bomba_status(*args) == []
+        assert len(client.get_bomba_status(*args)) == 3
+        assert client.get_negative_cache_stats()["skipped"] == 0
+
+        vacio = ("b1", "2020-02-01T00:00:00", "2020-02-01T01:00:00")
+        assert client.get_bomba_status(*vacio) == []
+        assert client.get_bomba_status(*vacio) == []
+        assert len(client.peticiones) == 3
+
+
+if __name__ == "__main__":
+    test_huecos_y_cache()
+    test_intervalo_que_contiene_el_inicio()
+    test_detallados_sin_alinear()
+    test_cache_negativa()
+    test_cache_negativa_acotada()
+    test_cuerpo_corrupto_no_es_vacio()
+    print("✅ Test completado")
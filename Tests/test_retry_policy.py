@@ -0,0 +1,43 @@
+#!/usr/bin/env python3
+"""
+Test de la política de reintentos (sin conexión a la API)
+"""
+
+import os
+import sys
+import time
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aquadapt_resilience import RetryPolicy, parse_retry_after
+
+
+def test_backoff_exponencial_con_jitter():
+    """La espera nunca supera min(max, base * 2^intento)"""
+    policy = RetryPolicy(max_attempts=10, backoff_base=0.5, backoff_max=4)
+    for attempt in range(8):
+        for _ in range(50):
+            assert 0 <= policy.backoff(attempt) <= min(4, 0.5 * 2**attempt)
+
+
+def test_retry_after_y_presupuesto():
+    """Retry-After se respeta en 429/503 y el presupuesto corta los reintentos"""
+    policy = RetryPolicy(max_attempts=5, budget=10)
+    started = time.monotonic()
+
+    assert policy.next_delay(0, started, 429, {"Retry-After": "3"}) == 3
+    assert policy.next_delay(1, started, 503, {"Retry-After": "30"}) is None
+    assert policy.next_delay(4, started) is None
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0
+
+    stats = policy.get_stats()
+    assert stats["retries"] == 1
+    assert stats["retry_after_honoured"] == 1
+    assert stats["giveups"] == 2
+
+
+if __name__ == "__main__":
+    test_backoff_exponencial_con_jitter()
+    test_retry_after_y_presupuesto()
+    print("✅ Test completado")
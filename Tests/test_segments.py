@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Test de los segmentos columnares con mmap (sin conexión a la API)
+"""
+
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aquadapt_segments import SegmentStore
+from aquadapt_store import SeriesStore
+from aquadapt_sync import sync_series
+
+
+def puntos(horas):
+    return [
+        {"time": f"2025-10-23T{h:02d}:00:00Z", "value": float(h), "validity": 0}
+        for h in horas
+    ]
+
+
+def test_anexado_y_lectura_sin_copia():
+    """Los segmentos se anexan en orden y se leen por rango como memoryview"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with SegmentStore(tmp) as store:
+            assert store.append("b1", "rawpower", puntos(range(0, 6))) == 6
+            # Los puntos ya guardados no se duplican
+            assert store.append("b1", "rawpower", puntos(range(4, 10))) == 4
+            store.append(
+                "b1", "rawpower", [{"time": "2025-10-23T12:00:00Z", "value": None}]
+            )
+
+        # Un almacén nuevo abre los segmentos ya escritos
+        with SegmentStore(tmp) as store:
+            bloques = list(
+                store.scan(
+                    "b1", "rawpower", "2025-10-23T04:00:00Z", "2025-10-23T07:00:00Z"
+                )
+            )
+            assert [type(columna) for columna in bloques[0]] == [memoryview] * 3
+            assert [list(b[1]) for b in bloques] == [[4.0, 5.0], [6.0, 7.0]]
+
+            datos = store.read("b1", "rawpower")
+            assert len(datos) == 11
+            assert datos[0] == {
+                "time": "2025-10-23T00:00:00Z",
+                "value": 0.0,
+                "validity": 0,
+            }
+            assert datos[-1] == {
+                "time": "2025-10-23T12:00:00Z",
+                "value": None,
+                "validity": None,
+            }
+            assert store.read("b1", "speed") == []
+            del bloques
+
+
+def test_puntos_no_representables():
+    """Valores no numéricos o validity fuera de int8 se ignoran sin fallar"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with SegmentStore(tmp) as store:
+            raros = puntos(range(0, 4))
+            raros[1]["value"] = "n/a"
+            raros[2]["validity"] = 300
+            raros[3]["value"] = [1]
+            assert store.append("b1", "status", raros) == 1
+            assert store.read("b1", "status") == puntos([0])
+
+
+def horas_leidas(store, bomba):
+    """Horas de los puntos leídos de una serie, en el orden de lectura"""
+    return [int(p["time"][11:13]) for p in store.read(bomba, "status")]
+
+
+def test_anexado_desde_varios_procesos():
+    """Varios almacenes (como procesos) anexan en orden, sin solapes ni huecos"""
+    with tempfile.TemporaryDirectory() as tmp:
+        directorio = os.path.join(tmp, "b1", "status")
+        with SegmentStore(tmp) as store:
+            for h in range(3):
+                store.append("b1", "status", puntos([h]))
+        # Numeración con huecos: el siguiente segmento va tras el mayor
+        os.remove(os.path.join(directorio, "00000002.seg"))
+
+        lector = SegmentStore(tmp)
+        assert horas_leidas(lector, "b1") == [0, 2]
+        with SegmentStore(tmp) as otro:
+            assert otro.append("b1", "status", puntos([1, 2, 5])) == 1
+        assert sorted(n for n in os.listdir(directorio) if n.endswith(".seg")) == [
+            "00000001.seg",
+            "00000003.seg",
+            "00000004.seg",
+        ]
+        # Un lector abierto antes ve los segmentos anexados por otros
+        assert horas_leidas(lector, "b1") == [0, 2, 5]
+        lector.close()
+
+        # Almacenes independientes anexando a la vez rangos que se solapan
+        almacenes = [SegmentStore(tmp) for _ in range(8)]
+        for almacen in almacenes:
+            assert almacen.read("b2", "status") == []
+        with ThreadPoolExecutor(max_workers=8) as executor:
+            anexados = list(
+                executor.map(
+                    lambda i: almacenes[i].append(
+                        "b2", "status", puntos(range(i, i + 4))
+                    ),
+                    range(8),
+                )
+            )
+        for almacen in almacenes:
+            almacen.close()
+        with SegmentStore(tmp) as store:
+            horas = horas_leidas(store, "b2")
+        assert horas == sorted(set(horas))
+        assert len(horas) == sum(anexados)
+        assert horas[-1] == max(h for h in horas)
+
+
+def test_sincronizacion_anexa_segmentos():
+    """sync_series con segments guarda los puntos nuevos también en segmentos"""
+
+    class Cliente:
+        def _fetch_bomba_data(self, bomba_id, endpoint_key, start_time, end_time):
+            return puntos(range(0, 6))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with SeriesStore(":memory:") as store, SegmentStore(tmp) as segmentos:
+            ahora = datetime(2025, 10, 23, 6, 0)
+            for _ in range(2):
+                sync_series(
+                    Cliente(), store, "b1", "status", now=ahora, segments=segmentos
+                )
+            assert segmentos.read("b1", "status") == store.read("b1", "status")
+            nombres = os.listdir(os.path.join(tmp, "b1", "status"))
+            assert [n for n in nombres if n.endswith(".seg")] == ["00000001.seg"]
+
+
+if __name__ == "__main__":
+    test_anexado_y_lectura_sin_copia()
+    test_puntos_no_representables()
+    test_anexado_desde_varios_procesos()
+    test_sincronizacion_anexa_segmentos()
+    print("✅ Test completado")
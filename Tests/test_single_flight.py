@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test de la agrupación de peticiones idénticas simultáneas (hilos y asyncio)
+"""
+
+import asyncio
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aquadapt_resilience import AsyncSingleFlight, SingleFlight
+
+
+def test_hilos_comparten_una_ejecucion():
+    """Las llamadas simultáneas con la misma clave ejecutan una sola vez"""
+    grupo = SingleFlight()
+    ejecuciones = []
+    empezada = threading.Event()
+
+    def peticion():
+        ejecuciones.append(1)
+        empezada.set()
+        time.sleep(0.2)
+        return ["dato"]
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        lider = executor.submit(grupo.do, "clave", peticion)
+        empezada.wait(1)
+        resto = [executor.submit(grupo.do, "clave", peticion) for _ in range(5)]
+        resultados = [lider.result()] + [f.result() for f in resto]
+
+    assert len(ejecuciones) == 1
+    assert all(r is resultados[0] for r in resultados)
+    assert grupo.get_stats() == {"executed": 1, "shared": 5}
+
+    # Terminada la llamada, la siguiente vuelve a ejecutarse
+    assert grupo.do("clave", lambda: ["nuevo"]) == ["nuevo"]
+
+
+def test_hilos_error_llega_a_todos():
+    """La excepción de la llamada compartida se propaga a cada espera"""
+    grupo = SingleFlight()
+    empezada = threading.Event()
+
+    def fallar():
+        empezada.set()
+        time.sleep(0.2)
+        raise ConnectionError("sin servidor")
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        futuros = [executor.submit(grupo.do, "clave", fallar)]
+        empezada.wait(1)
+        futuros += [executor.submit(grupo.do, "clave", fallar) for _ in range(3)]
+        for futuro in futuros:
+            with pytest.raises(ConnectionError):
+                futuro.result()
+    assert grupo.get_stats() == {"executed": 1, "shared": 3}
+
+
+def test_asyncio_comparte_resultado_y_error():
+    """Versión asyncio: un solo await por clave, y el error llega a todas"""
+
+    async def escenario():
+        grupo = AsyncSingleFlight()
+        ejecuciones = []
+
+        async def peticion():
+            ejecuciones.append(1)
+            await asyncio.sleep(0.05)
+            return ["dato"]
+
+        resultados = await asyncio.gather(
+            *(grupo.do("clave", peticion) for _ in range(5))
+        )
+        assert resultados == [["dato"]] * 5 and len(ejecuciones) == 1
+
+        async def fallar():
+            await asyncio.sleep(0.05)
+            raise ConnectionError("sin servidor")
+
+        errores = await asyncio.gather(
+            *(grupo.do("otra", fallar) for _ in range(3)), return_exceptions=True
+        )
+        assert all(isinstance(e, ConnectionError) for e in errores)
+        return grupo.get_stats()
+
+    assert asyncio.run(escenario()) == {"executed": 2, "shared": 6}
+
+
+if __name__ == "__main__":
+    test_hilos_comparten_una_ejecucion()
+    test_hilos_error_llega_a_todos()
+    test_asyncio_comparte_resultado_y_error()
+    print("✅ Test completado")
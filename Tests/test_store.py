@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Test del almacén SQLite de series y sus agregaciones (sin conexión a la API)
+"""
+
+import os
+import sys
+import tempfile
+from datetime import timedelta
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aquadapt_store import SeriesStore
+
+
+def puntos(n, inicio_hora=0):
+    return [
+        {"time": f"2025-10-23T{h:02d}:00:00Z", "value": float(h), "validity": 0}
+        for h in range(inicio_hora, inicio_hora + n)
+    ]
+
+
+def test_escritura_y_lectura_por_rango():
+    """Los puntos se guardan, se actualizan y se leen por rango"""
+    with tempfile.TemporaryDirectory() as tmp:
+        with SeriesStore(os.path.join(tmp, "series.db"), batch_size=4) as store:
+            assert store.write("b1", "rawpower", puntos(10)) == 10
+            store.write(
+                "b1",
+                "rawpower",
+                [{"time": "2025-10-23T03:00:00Z", "value": 9.5, "validity": 1}],
+            )
+            store.write("b1", "rawpower", puntos(3), detailed=True)
+
+            datos = store.read(
+                "b1", "rawpower", "2025-10-23T02:00:00Z", "2025-10-23T04:00:00"
+            )
+            assert [p["time"][11:13] for p in datos] == ["02", "03", "04"]
+            assert datos[1] == {
+                "time": "2025-10-23T03:00:00Z",
+                "value": 9.5,
+                "validity": 1,
+            }
+            assert len(store.read("b1", "rawpower", detailed=True)) == 3
+            assert store.read("b2", "rawpower") == []
+
+            series = {(s["endpoint"], s["detailed"]): s for s in store.list_series()}
+            assert series[("rawpower", False)]["count"] == 10
+
+
+def test_transaccion_se_deshace_si_falla():
+    """Un error dentro de la transacción no deja escrituras a medias"""
+    with SeriesStore(":memory:") as store:
+        try:
+            with store.transaction():
+                store.write("b1", "status", puntos(5))
+                raise RuntimeError("fallo simulado")
+        except RuntimeError:
+            pass
+        assert store.read("b1", "status") == []
+
+
+def test_agregaciones_por_nivel():
+    """Las agregaciones se actualizan al escribir y se elige el nivel adecuado"""
+    with SeriesStore(":memory:") as store:
+        store.write("b1", "speed", puntos(24))
+        store.write(
+            "b1",
+            "speed",
+            [{"time": "2025-10-23T05:00:00Z", "value": 100.0, "validity": 1}],
+        )
+
+        dia = store.query(
+            "b1",
+            "speed",
+            "2025-10-23",
+            "2025-10-23T23:59:59",
+            resolution=timedelta(days=7),
+        )
+        assert dia["level"] == "day"
+        assert dia["data"] == [
+            {
+                "time": "2025-10-23T00:00:00Z",
+                "count": 24,
+                "min": 0.0,
+                "max": 100.0,
+                "mean": (sum(range(24)) - 5 + 100) / 24,
+                "sum": sum(range(24)) - 5 + 100.0,
+                "valid_count": 23,
+            }
+        ]
+        assert (
+            store.query("b1", "speed", resolution=timedelta(days=40))["level"]
+            == "month"
+        )
+        horas = store.query(
+            "b1",
+            "speed",
+            "2025-10-23T02:30:00Z",
+            "2025-10-23T04:00:00Z",
+            resolution="hour",
+        )
+        assert [h["time"][11:13] for h in horas["data"]] == ["02", "03", "04"]
+        assert (
+            store.query("b1", "speed", resolution=timedelta(minutes=30))["level"]
+            == "raw"
+        )
+
+
+def test_puntos_sin_validity():
+    """Los puntos sin validity se guardan y sus agregaciones cuentan 0 válidos"""
+    with SeriesStore(":memory:") as store:
+        sin_validity = [{"time": "2025-10-23T00:00:00Z", "value": 1.0}]
+        assert store.write("p", "status", sin_validity) == 1
+        assert store.read("p", "status") == [
+            {"time": "2025-10-23T00:00:00Z", "value": 1.0, "validity": None}
+        ]
+        for nivel in ("hour", "day", "month"):
+            datos = store.query("p", "status", resolution=nivel)["data"]
+            assert datos[0]["count"] == 1 and datos[0]["valid_count"] == 0
+
+
+if __name__ == "__main__":
+    test_escritura_y_lectura_por_rango()
+    test_transaccion_se_deshace_si_falla()
+    test_agregaciones_por_nivel()
+    test_puntos_sin_validity()
+    print("✅ Test completado")
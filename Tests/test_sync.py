@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Test de la sincronización incremental con marcas (sin conexión a la API)
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aquadapt_ranges import format_time, parse_time
+from aquadapt_store import SeriesStore
+from aquadapt_sync import sync_series
+
+
+class ClienteFalso:
+    """Devuelve un punto cada 30 minutos dentro del rango pedido"""
+
+    def __init__(self):
+        self.peticiones = []
+
+    def _fetch_bomba_data(self, bomba_id, endpoint_key, start_time, end_time):
+        self.peticiones.append((start_time, end_time))
+        t, fin = parse_time(start_time), parse_time(end_time)
+        t += (datetime.min - t) % timedelta(minutes=30)
+        puntos = []
+        while t <= fin:
+            puntos.append({"time": format_time(t), "value": 1.0, "validity": 0})
+            t += timedelta(minutes=30)
+        return puntos
+
+
+def test_solo_se_pide_desde_la_marca():
+    """La segunda ejecución pide [marca - solape, ahora] y avanza la marca"""
+    cliente = ClienteFalso()
+    ahora = datetime(2025, 10, 24, 12, 0)
+    with SeriesStore(":memory:") as store:
+        primera = sync_series(
+            cliente, store, "b1", "status", now=ahora, initial=timedelta(days=1)
+        )
+        assert primera["points"] == 49
+        assert store.get_watermark("b1", "status") == ahora
+
+        segunda = sync_series(
+            cliente,
+            store,
+            "b1",
+            "status",
+            now=ahora + timedelta(hours=2),
+            overlap=timedelta(minutes=30),
+        )
+        assert cliente.peticiones[-1] == (
+            "2025-10-24T11:30:00Z",
+            "2025-10-24T14:00:00Z",
+        )
+        assert segunda["watermark"] == "2025-10-24T14:00:00Z"
+        assert len(store.read("b1", "status")) == 49 + 4
+
+
+if __name__ == "__main__":
+    test_solo_se_pide_desde_la_marca()
+    print("✅ Test completado")
@@ -0,0 +1,119 @@
+#!/usr/bin/env python3
+"""
+Test de las series en columnas numpy (la mayoría requiere numpy; sin
+conexión a la API)
+"""
+
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+import requests
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import aquadapt_timeseries
+from aquadapt_segments import SegmentStore
+from aquadapt_timeseries import TimeSeries, numpy
+from comun import cliente_local
+
+CONSULTA = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "consulta_onoffschedule_EB3_G1_20251024_150034.json",
+)
+
+requiere_numpy = pytest.mark.skipif(numpy is None, reason="numpy no está instalado")
+
+
+def puntos_de_consulta():
+    with open(CONSULTA, encoding="utf-8") as f:
+        puntos = json.load(f)["datos"]
+    puntos[3]["value"] = None
+    puntos[4]["validity"] = None
+    return puntos
+
+
+@requiere_numpy
+def test_ida_y_vuelta_sin_perdida():
+    """La conversión a columnas y de vuelta reproduce los puntos"""
+    puntos = puntos_de_consulta()
+    serie = TimeSeries.from_points(puntos)
+
+    assert serie.to_dicts() == puntos
+    assert len(serie) == 49 and serie.nbytes == 49 * 17
+    assert serie.times.dtype == numpy.dtype("datetime64[s]")
+    assert serie[0] == puntos[0] and serie[-1] == puntos[-1]
+
+    # Los slices son vistas sobre las mismas columnas
+    vista = serie[2:10]
+    assert numpy.shares_memory(vista.values, serie.values)
+    assert vista.to_dicts() == puntos[2:10]
+
+    tramo = serie.between("2025-10-23T16:00:00Z", "2025-10-23T18:00:00Z")
+    assert [p["time"] for p in tramo] == [p["time"] for p in puntos[2:7]]
+    assert len(TimeSeries.from_points([])) == 0
+
+
+@requiere_numpy
+def test_puntos_no_representables():
+    """Los puntos que cambiarían al convertirlos se rechazan"""
+    base = {"time": "2025-10-23T15:00:00Z", "value": 1.0, "validity": 0}
+    for cambio in (
+        {"time": "2025-10-23T15:00:00.5Z"},
+        {"time": "2025-10-23Z"},
+        {"value": "1.0"},
+        {"validity": -1},
+        {"extra": True},
+    ):
+        with pytest.raises(ValueError):
+            TimeSeries.from_points([dict(base, **cambio)])
+
+
+@requiere_numpy
+def test_columnas_de_segmentos():
+    """Las columnas de SegmentStore se envuelven sin convertir cada punto"""
+    puntos = puntos_de_consulta()
+    with tempfile.TemporaryDirectory() as tmp:
+        with SegmentStore(tmp) as store:
+            store.append("b1", "onoffschedule", puntos)
+            serie = TimeSeries(*store.read_arrays("b1", "onoffschedule"))
+            assert serie.to_dicts() == store.read("b1", "onoffschedule")
+            del serie
+
+
+def test_sin_numpy_devuelve_listas():
+    """Con as_timeseries y sin numpy se devuelven los puntos, no un error"""
+    client = cliente_local(MEMORY_CACHE_MAX_MB=0)
+
+    puntos = [{"time": "2020-01-01T00:00:00Z", "value": 1.0, "validity": 0}]
+
+    def request(method, url, params=None, **kwargs):
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = json.dumps(puntos).encode()
+        return response
+
+    instalado = aquadapt_timeseries.numpy
+    aquadapt_timeseries.numpy = None
+    try:
+        with client:
+            client.session.request = request
+            client.href_catalog.seed([{"id": "b1", "status": {"href": "https://x/"}}])
+            client.as_timeseries = True
+            args = ("b1", "2020-01-01T00:00:00", "2020-01-01T01:00:00")
+            assert client.get_bomba_status(*args) == puntos
+            assert client.as_timeseries is False
+    finally:
+        aquadapt_timeseries.numpy = instalado
+
+
+if __name__ == "__main__":
+    test_ida_y_vuelta_sin_perdida()
+    test_puntos_no_representables()
+    test_columnas_de_segmentos()
+    test_sin_numpy_devuelve_listas()
+    print("✅ Test completado")
@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+"""
+Test de la división de rangos en ventanas alineadas y de su fusión
+(sin conexión a la API)
+"""
+
+import os
+import sys
+from datetime import datetime, timedelta
+
+# Añadir directorio padre al path
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from aquadapt_ranges import WindowSizer, merge_series, split_range
+from comun import CADENCIA, puntos_servidor
+
+
+def test_ventanas_alineadas_y_fusion():
+    """Las ventanas se alinean a la cadencia y la fusión elimina fronteras"""
+    inicio = datetime(2025, 10, 1, 0, 10)
+    fin = datetime(2025, 10, 4)
+    ventanas = split_range(inicio, fin, timedelta(hours=25), CADENCIA)
+
+    assert ventanas[0][0] == inicio and ventanas[-1][1] == fin
+    assert all(v[0].minute in (0, 30) for v in ventanas[1:])
+    assert all(a[1] == b[0] for a, b in zip(ventanas, ventanas[1:]))
+
+    fusion = merge_series(puntos_servidor(a, b) for a, b in ventanas)
+    assert fusion == puntos_servidor(inicio, fin)
+    assert fusion[0]["time"] == "2025-10-01T00:00:00Z"
+
+
+def test_ventana_adaptativa():
+    """La ventana contiene unos `target_points` puntos, dentro de los límites"""
+    sizer = WindowSizer(
+        initial=timedelta(hours=24),
+        minimum=timedelta(hours=2),
+        maximum=timedelta(days=7),
+        target_points=48,
+    )
+    assert sizer.window("status") == timedelta(hours=24)
+
+    # Un punto cada 30 minutos: 48 puntos caben en 24 horas
+    sizer.observe("status", 48, timedelta(hours=24))
+    assert sizer.window("status") == timedelta(hours=24)
+
+    # Serie detallada muy densa: se limita a la ventana mínima
+    sizer.observe("rawpower/detailed", 48 * 60, timedelta(hours=1))
+    assert sizer.window("rawpower/detailed") == timedelta(hours=2)
+
+
+if __name__ == "__main__":
+    test_ventanas_alineadas_y_fusion()
+    test_ventana_adaptativa()
+    print("✅ Test completado")
@@ -4,17 +4,59 @@ AquaAdvanced API Client - Versión Oficial Corregida
 Cliente para la API de AquaAdvanced basado en la documentación oficial
 """
 
-import json
 import logging
 import os
-from datetime import datetime
-from typing import Any, Dict, List, Optional
-from urllib.parse import quote
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+from urllib.parse import quote, urlsplit
 
 import requests
 import urllib3
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
 
 import config
+from aquadapt_cache import (
+    HttpCache,
+    MemoryCache,
+    SharedCache,
+    StaleWhileRevalidate,
+    TieredCache,
+    canonical_key,
+)
+from aquadapt_catalog import (
+    HrefCatalog,
+    PumpIndex,
+    load_catalog_snapshot,
+    save_catalog_snapshot,
+)
+from aquadapt_json import is_empty_body, iter_json_array
+from aquadapt_json import loads as json_loads
+from aquadapt_ranges import (
+    NegativeCache,
+    RangeCache,
+    WindowSizer,
+    format_time,
+    latest_point,
+    merge_series,
+    parse_time,
+    split_range,
+)
+from aquadapt_resilience import (
+    AdaptiveConcurrencyLimiter,
+    CircuitBreaker,
+    CircuitOpenError,
+    FallbackCache,
+    RetryPolicy,
+    SingleFlight,
+    endpoint_kind,
+)
+from aquadapt_timeseries import TimeSeries
 
 # Configurar logging
 logging.basicConfig(
@@ -28,6 +70,64 @@ if hasattr(config, "DISABLE_SSL_WARNINGS") and config.DISABLE_SSL_WARNINGS:
     urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 
 
+class TransferStats:
+    """Bytes transferidos por familia de endpoint: comprimidos y decodificados"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, response: requests.Response):
+        """
+        Registrar los bytes de una respuesta ya leída
+
+        Args:
+            kind: Familia del endpoint (ej: 'rawpower/detailed')
+            response: Respuesta con el cuerpo leído
+        """
+        decoded = len(response.content)
+        try:
+            # Bytes leídos del socket, antes de descomprimir
+            wire = response.raw.tell() or decoded
+        except Exception:
+            wire = decoded
+        encoding = response.headers.get("Content-Encoding", "identity")
+        self.add(kind, wire, decoded, encoding)
+
+    def add(self, kind: str, wire: int, decoded: int, encoding: str = "identity"):
+        """
+        Sumar bytes de una respuesta
+
+        Args:
+            kind: Familia del endpoint
+            wire: Bytes recibidos por el socket (comprimidos)
+            decoded: Bytes tras descomprimir
+            encoding: Valor de Content-Encoding
+        """
+        with self._lock:
+            entry = self._stats.setdefault(
+                kind,
+                {"responses": 0, "wire_bytes": 0, "decoded_bytes": 0, "encodings": {}},
+            )
+            entry["responses"] += 1
+            entry["wire_bytes"] += wire
+            entry["decoded_bytes"] += decoded
+            entry["encodings"][encoding] = entry["encodings"].get(encoding, 0) + 1
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Obtener bytes por familia de endpoint con su ratio de compresión"""
+        with self._lock:
+            stats = {}
+            for kind, entry in self._stats.items():
+                stats[kind] = dict(entry, encodings=dict(entry["encodings"]))
+                stats[kind]["ratio"] = (
+                    entry["decoded_bytes"] / entry["wire_bytes"]
+                    if entry["wire_bytes"]
+                    else 1.0
+                )
+            return stats
+
+
 class AquaAdvancedClient:
     """Cliente oficial para la API de AquaAdvanced"""
 
@@ -38,107 +138,293 @@ class AquaAdvancedClient:
         self.headers = self._get_headers()
         self.timeout = getattr(config, "REQUEST_TIMEOUT", 10)
         self.retry_count = getattr(config, "RETRY_COUNT", 3)
+        self.retry_policy = RetryPolicy(
+            max_attempts=self.retry_count,
+            backoff_base=getattr(config, "RETRY_BACKOFF_BASE", 0.5),
+            backoff_max=getattr(config, "RETRY_BACKOFF_MAX", 30.0),
+            budget=getattr(config, "RETRY_BUDGET", 60.0),
+        )
         self.verify_ssl = getattr(config, "VERIFY_SSL", False)
+        self.pool_connections = getattr(config, "POOL_CONNECTIONS", 10)
+        self.pool_maxsize = getattr(config, "POOL_MAXSIZE", 20)
+
+        self._session_lock = threading.Lock()
+        self.session = self._create_session()
+        self.transfer_stats = TransferStats()
+
+        # Límite adaptativo (AIMD) de peticiones simultáneas al servidor
+        self.concurrency_limiter = AdaptiveConcurrencyLimiter(
+            initial=getattr(config, "CONCURRENCY_INITIAL", 8),
+            min_limit=getattr(config, "CONCURRENCY_MIN", 1),
+            max_limit=getattr(config, "CONCURRENCY_MAX", None) or self.pool_maxsize,
+            latency_target=getattr(config, "CONCURRENCY_LATENCY_TARGET", 2.0),
+            error_threshold=getattr(config, "CONCURRENCY_ERROR_THRESHOLD", 0.05),
+        )
+
+        # Circuit breaker por host y familia de endpoint, con datos locales
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=getattr(config, "CIRCUIT_FAILURE_THRESHOLD", 5),
+            reset_timeout=getattr(config, "CIRCUIT_RESET_TIMEOUT", 30.0),
+            half_open_max=getattr(config, "CIRCUIT_HALF_OPEN_MAX", 1),
+        )
+        self.fallback_cache = FallbackCache(getattr(config, "FALLBACK_CACHE_SIZE", 512))
+
+        # División de rangos largos en ventanas pedidas en paralelo
+        self.chunking_enabled = getattr(config, "CHUNK_ENABLED", True)
+        self.chunk_cadence = timedelta(
+            minutes=getattr(config, "CHUNK_CADENCE_MINUTES", 30)
+        )
+        self.window_sizer = WindowSizer(
+            initial=timedelta(hours=getattr(config, "CHUNK_WINDOW_HOURS", 24)),
+            minimum=timedelta(hours=getattr(config, "CHUNK_MIN_WINDOW_HOURS", 2)),
+            maximum=timedelta(hours=getattr(config, "CHUNK_MAX_WINDOW_HOURS", 168)),
+            target_points=getattr(config, "CHUNK_TARGET_POINTS", 2000),
+        )
+        self._chunk_executor = None
+
+        # Caché de series por rangos cubiertos: solo se piden los huecos
+        self.range_cache = None
+        if getattr(config, "RANGE_CACHE_ENABLED", True):
+            self.range_cache = RangeCache(
+                recent_lag=timedelta(
+                    minutes=getattr(config, "RANGE_CACHE_RECENT_LAG_MINUTES", 60)
+                ),
+                max_series=getattr(config, "RANGE_CACHE_MAX_SERIES", 512),
+            )
+
+        # Rangos que la API devolvió vacíos: se responden con [] sin petición
+        self.negative_cache = NegativeCache(
+            ttl=timedelta(minutes=getattr(config, "NEGATIVE_CACHE_TTL_MINUTES", 15)),
+            permanent_after=timedelta(
+                days=getattr(config, "NEGATIVE_CACHE_PERMANENT_AFTER_DAYS", 7)
+            ),
+            max_series=getattr(config, "NEGATIVE_CACHE_MAX_SERIES", 512),
+        )
+
+        # Peticiones idénticas simultáneas comparten una sola llamada HTTP
+        self.single_flight = SingleFlight()
+
+        # Caché de enlaces href por bomba (evita GET /physicalPumps/{id}/)
+        self.href_catalog = HrefCatalog(ttl=getattr(config, "HREF_CATALOG_TTL", 3600))
+
+        # Índice por nombre, estación y grupo (se rellena en get_bombas_list)
+        self.pump_index = PumpIndex([])
+
+        # Respuestas de series compartidas con otros procesos del mismo equipo
+        self.shared_cache = None
+        if getattr(config, "SHARED_CACHE_ENABLED", True):
+            path = getattr(config, "SHARED_CACHE_PATH", ".aquadapt_cache/responses.db")
+            try:
+                self.shared_cache = SharedCache(
+                    path,
+                    max_bytes=getattr(config, "SHARED_CACHE_MAX_MB", 256) * 1024 * 1024,
+                )
+            except (OSError, sqlite3.Error) as e:
+                logger.warning(f"Caché compartida desactivada ({path}): {e}")
+
+        # Respuestas decodificadas en memoria (L1) delante de la caché compartida (L2)
+        memory_mb = getattr(config, "MEMORY_CACHE_MAX_MB", 64)
+        self.response_cache = (
+            TieredCache(
+                MemoryCache(memory_mb * 1024 * 1024),
+                self.shared_cache,
+                lambda content: decode_api_content(content, strict=True),
+            )
+            if memory_mb > 0 or self.shared_cache is not None
+            else None
+        )
+
+        # Caché HTTP condicional (ETag/Last-Modified) de los recursos de catálogo
+        self.http_cache = (
+            HttpCache(
+                getattr(config, "HTTP_CACHE_DIR", ".aquadapt_cache/http"),
+                ttl=getattr(config, "HTTP_CACHE_TTL", 3600),
+            )
+            if getattr(config, "HTTP_CACHE_ENABLED", True)
+            else None
+        )
+
+        # Lecturas de panel (catálogo y último valor) servidas al momento y
+        # revalidadas en segundo plano
+        self.swr_cache = (
+            StaleWhileRevalidate(
+                max_age=getattr(config, "SWR_MAX_AGE", 60),
+                stale=getattr(config, "SWR_STALE_SECONDS", 600),
+                max_entries=getattr(config, "SWR_MAX_ENTRIES", 1024),
+                max_workers=getattr(config, "SWR_MAX_WORKERS", 4),
+            )
+            if getattr(config, "SWR_ENABLED", True)
+            else None
+        )
+
+        # Series como TimeSeries en columnas numpy en vez de listas de puntos
+        self.as_timeseries = getattr(config, "TIMESERIES_ENABLED", False)
+        if self.as_timeseries:
+            try:
+                TimeSeries.empty()
+            except ImportError as e:
+                logger.warning(f"TIMESERIES_ENABLED: {e}. Se devuelven listas")
+                self.as_timeseries = False
 
         logger.info("Usando autenticación por API Key")
 
-    def _format_datetime_for_api(self, dt_string: str) -> str:
-        """
-        Convertir fecha ISO a formato requerido por la API
+    def __enter__(self):
+        return self
 
-        Args:
-            dt_string: Fecha en formato ISO (ej: '2025-10-22T00:00:00')
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
 
-        Returns:
-            Fecha en formato API URL-encoded (ej: '2025-10-22T00%3A00%3A00Z')
+    def _create_session(self) -> requests.Session:
         """
-        try:
-            # Si la fecha ya tiene Z al final, la removemos temporalmente
-            if dt_string.endswith("Z"):
-                dt_string = dt_string[:-1]
+        Crear sesión HTTP persistente con pool de conexiones keep-alive
 
-            # Parsear la fecha para validar formato
-            dt = datetime.fromisoformat(dt_string)
+        La sesión se comparte entre hilos: el pool de urllib3 es thread-safe y
+        con ``pool_block=True`` nunca se abren más de ``pool_maxsize``
+        conexiones por host, los hilos sobrantes esperan una conexión libre.
 
-            # Formatear como ISO con Z al final
-            iso_with_z = dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+        Returns:
+            Sesión configurada con headers, verificación SSL y adaptador
+        """
+        session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+            pool_block=True,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update(self.headers)
+        session.verify = self.verify_ssl
+        return session
+
+    def close(self):
+        """Cerrar la sesión HTTP y liberar las conexiones del pool"""
+        with self._session_lock:
+            self.session.close()
+            if self._chunk_executor is not None:
+                self._chunk_executor.shutdown(wait=False)
+                self._chunk_executor = None
+        if self.swr_cache is not None:
+            self.swr_cache.close()
+
+    def get_connection_stats(self) -> Dict[str, int]:
+        """
+        Obtener contadores de reutilización de conexiones del pool
 
-            # URL encode los dos puntos (:) que se convierten en %3A
-            # formatted = iso_with_z.replace(":", "%3A")
-            formatted = iso_with_z
+        Returns:
+            Diccionario con peticiones totales, conexiones nuevas (handshakes
+            TCP+TLS) y peticiones servidas sobre una conexión reutilizada
+        """
+        requests_total = 0
+        new_connections = 0
+
+        with self._session_lock:
+            adapters = {id(a): a for a in self.session.adapters.values()}
+            for adapter in adapters.values():
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is None:
+                        continue
+                    requests_total += pool.num_requests
+                    new_connections += pool.num_connections
 
-            logger.debug(f"Fecha convertida: {dt_string} -> {formatted}")
-            return formatted
+        return {
+            "requests": requests_total,
+            "new_connections": new_connections,
+            "reused_connections": max(requests_total - new_connections, 0),
+        }
 
-        except ValueError as e:
-            logger.error(f"Error al formatear fecha {dt_string}: {e}")
-            # Retornar el string original si no se puede procesar
-            return dt_string
+    def _format_datetime_for_api(self, dt_string: str) -> str:
+        """Convertir fecha ISO a formato requerido por la API"""
+        return format_datetime_for_api(dt_string)
 
     def _get_headers(self) -> Dict[str, str]:
         """Obtener headers para las peticiones"""
         headers = {"Content-Type": "application/json", "Accept": "application/json"}
 
+        # Compresión que urllib3 sabe descomprimir (br/zstd si están instalados)
+        if getattr(config, "ENABLE_COMPRESSION", True):
+            headers["Accept-Encoding"] = ACCEPT_ENCODING
+        else:
+            headers["Accept-Encoding"] = "identity"
+
         if hasattr(config, "API_KEY") and config.API_KEY:
             headers["X-Api-Key"] = config.API_KEY
 
         return headers
 
-    def _handle_api_response(self, response: requests.Response) -> Any:
+    def _handle_api_response(
+        self, response: requests.Response, strict: bool = False
+    ) -> Any:
         """Manejar respuesta de la API con BOM UTF-8 y respuestas vacías"""
-        # Detectar y manejar BOM UTF-8 en la respuesta
-        content = response.content
-        if content.startswith(b"\xef\xbb\xbf"):
-            content = content[3:]  # Eliminar BOM
-
-        # Manejar respuestas vacías
-        if not content.strip():
-            logger.info(
-                "Respuesta vacía. Puede que no haya datos para el rango especificado."
-            )
-            return []
+        return decode_api_content(response.content, strict)
 
-        try:
-            # Intentar decodificar como JSON
-            return json.loads(content.decode("utf-8"))
-        except json.JSONDecodeError as e:
-            logger.warning(f"Error al decodificar JSON: {e}")
-            logger.debug(f"Contenido de respuesta: {content[:200]}...")
-            return []
-
-    def _make_request(
-        self, method: str, endpoint: str, params: Optional[Dict] = None
+    def _request(
+        self,
+        method: str,
+        url: str,
+        params: Optional[Dict] = None,
+        stream: bool = False,
+        headers: Optional[Dict] = None,
     ) -> requests.Response:
         """
-        Realizar petición HTTP con reintentos
+        Realizar petición HTTP aplicando la política de reintentos
+
+        Reintenta errores de conexión, 429 y 5xx con backoff exponencial y
+        jitter, respetando Retry-After en 429/503 y el presupuesto por llamada.
+        Si el circuito de la familia de endpoint está abierto falla al instante.
 
         Args:
             method: Método HTTP
-            endpoint: Endpoint de la API
+            url: URL completa
             params: Parámetros de la petición
+            stream: No leer el cuerpo; el llamante debe consumirlo y cerrarlo
+            headers: Cabeceras adicionales a las de la sesión
 
         Returns:
             Respuesta de la API
 
         Raises:
+            CircuitOpenError: Circuito abierto, la petición no se envía
             requests.RequestException: Error en la petición
         """
-        url = f"{self.base_url}{endpoint}"
+        policy = self.retry_policy
+        breaker_key = f"{urlsplit(url).netloc}/{endpoint_kind(url)}"
+        started = time.monotonic()
+        attempt = 0
+
+        while True:
+            if not self.circuit_breaker.allow(breaker_key):
+                raise CircuitOpenError(
+                    f"Circuito abierto para {breaker_key}: petición no enviada"
+                )
 
-        for attempt in range(self.retry_count):
+            response = None
             try:
                 logger.debug(f"Realizando petición {method} a {url}")
 
-                response = requests.request(
-                    method=method,
-                    url=url,
-                    params=params,
-                    headers=self.headers,
-                    timeout=self.timeout,
-                    verify=self.verify_ssl,
-                )
+                with self.concurrency_limiter.slot() as slot:
+                    try:
+                        response = self.session.request(
+                            method=method,
+                            url=url,
+                            params=params,
+                            headers=headers,
+                            timeout=self.timeout,
+                            stream=stream,
+                        )
+                    finally:
+                        if response is None or response.status_code >= 500:
+                            self.circuit_breaker.record_failure(breaker_key)
+                        else:
+                            self.circuit_breaker.record_success(breaker_key)
+                    slot.overloaded = response.status_code >= 500
 
                 response.raise_for_status()
+                policy.record_call(attempt + 1)
+                if not stream:
+                    self.transfer_stats.record(endpoint_kind(url), response)
                 return response
 
             except requests.exceptions.HTTPError as e:
@@ -148,62 +434,192 @@ class AquaAdvancedClient:
                 elif response.status_code == 404:
                     logger.error(f"Endpoint no encontrado: {url}")
                     raise
-                elif response.status_code >= 500:
-                    logger.error(f"Error del servidor ({response.status_code})")
-                    if attempt < self.retry_count - 1:
-                        logger.warning(
-                            f"Intento {attempt + 1}/{self.retry_count} falló: {e}"
-                        )
-                        continue
-                    raise
-                else:
+                elif not policy.is_retryable_status(response.status_code):
                     raise
+                logger.error(f"Error del servidor ({response.status_code})")
+                error = e
             except requests.exceptions.RequestException as e:
-                if attempt < self.retry_count - 1:
-                    logger.warning(
-                        f"Intento {attempt + 1}/{self.retry_count} falló: {e}"
-                    )
-                    continue
-                raise
+                error = e
+
+            delay = policy.next_delay(
+                attempt,
+                started,
+                response.status_code if response is not None else None,
+                response.headers if response is not None else None,
+            )
+            if delay is None:
+                raise error
+
+            logger.warning(
+                f"Intento {attempt + 1}/{policy.max_attempts} falló: {error}. "
+                f"Reintentando en {delay:.2f}s"
+            )
+            time.sleep(delay)
+            attempt += 1
+
+    def _make_request(
+        self, method: str, endpoint: str, params: Optional[Dict] = None
+    ) -> requests.Response:
+        """
+        Realizar petición HTTP con reintentos
+
+        Args:
+            method: Método HTTP
+            endpoint: Endpoint de la API
+            params: Parámetros de la petición
+
+        Returns:
+            Respuesta de la API
+
+        Raises:
+            requests.RequestException: Error en la petición
+        """
+        return self._request(method, f"{self.base_url}{endpoint}", params)
+
+    def _get_href(self, href: str, params: Optional[Dict] = None) -> requests.Response:
+        """
+        Realizar petición GET directa a un href de la API con reintentos
+
+        Args:
+            href: URL completa proporcionada por la API
+            params: Parámetros de la petición
+
+        Returns:
+            Respuesta de la API
+
+        Raises:
+            requests.RequestException: Error en la petición
+        """
+        return self._request("GET", href, params)
 
-        raise requests.exceptions.RequestException(
-            f"Falló después de {self.retry_count} intentos"
+    def _get_catalog_content(self, endpoint: str) -> bytes:
+        """
+        Obtener el cuerpo de un recurso de catálogo
+
+        Con SWR_ENABLED el cuerpo se sirve desde memoria hasta SWR_MAX_AGE y,
+        durante SWR_STALE_SECONDS más, se sirve igualmente mientras se
+        revalida en segundo plano.
+
+        Args:
+            endpoint: Endpoint de la API (ej: '/physicalPumps/')
+
+        Returns:
+            Cuerpo de la respuesta en bytes
+        """
+        if self.swr_cache is None:
+            return self._load_catalog_content(endpoint)
+        return self.swr_cache.get(
+            ("catalog", endpoint), lambda: self._load_catalog_content(endpoint)
         )
 
+    def _load_catalog_content(self, endpoint: str) -> bytes:
+        """
+        Obtener el cuerpo de un recurso de catálogo usando la caché HTTP
+
+        Las entradas con validadores se revalidan con una petición condicional
+        (304 = se reutiliza el cuerpo guardado); las que no tienen se sirven
+        sin petición mientras no supere HTTP_CACHE_TTL.
+
+        Args:
+            endpoint: Endpoint de la API (ej: '/physicalPumps/')
+
+        Returns:
+            Cuerpo de la respuesta en bytes
+        """
+        url = f"{self.base_url}{endpoint}"
+        if self.http_cache is None:
+            return self._request("GET", url).content
+
+        entry = self.http_cache.get(url)
+        if entry is not None and self.http_cache.is_fresh(entry):
+            logger.debug(f"Catálogo servido desde caché: {url}")
+            return entry["body"]
+
+        response = self._request(
+            "GET", url, headers=self.http_cache.conditional_headers(entry)
+        )
+        if response.status_code == 304 and entry is not None:
+            logger.debug(f"Catálogo sin cambios (304): {url}")
+            self.http_cache.touch(url, entry, response.headers)
+            return entry["body"]
+
+        self.http_cache.put(url, response.content, response.headers)
+        return response.content
+
+    def get_concurrency_stats(self) -> Dict[str, float]:
+        """Obtener el límite adaptativo actual y sus estadísticas"""
+        return self.concurrency_limiter.get_stats()
+
+    def get_circuit_stats(self) -> Dict[str, Dict]:
+        """Obtener el estado del circuit breaker por host y familia de endpoint"""
+        return self.circuit_breaker.get_stats()
+
+    def get_coalescing_stats(self) -> Dict[str, int]:
+        """Obtener llamadas ejecutadas y compartidas por peticiones idénticas"""
+        return self.single_flight.get_stats()
+
+    def get_transfer_stats(self) -> Dict[str, Dict]:
+        """Obtener bytes comprimidos y decodificados por familia de endpoint"""
+        return self.transfer_stats.get_stats()
+
+    def get_range_cache_stats(self) -> Dict[str, int]:
+        """Obtener aciertos y tamaño de la caché de series por rangos"""
+        return self.range_cache.get_stats() if self.range_cache else {}
+
+    def get_negative_cache_stats(self) -> Dict[str, int]:
+        """Obtener peticiones evitadas por rangos vacíos conocidos"""
+        return self.negative_cache.get_stats()
+
+    def get_http_cache_stats(self) -> Dict[str, int]:
+        """Obtener las estadísticas de la caché HTTP de catálogo"""
+        return self.http_cache.get_stats() if self.http_cache else {}
+
+    def get_shared_cache_stats(self) -> Dict[str, int]:
+        """Obtener las estadísticas de la caché compartida entre procesos"""
+        return self.shared_cache.get_stats() if self.shared_cache else {}
+
+    def get_response_cache_stats(self) -> Dict[str, Dict[str, int]]:
+        """Obtener aciertos, fallos y expulsiones por nivel (l1 memoria, l2 disco)"""
+        return self.response_cache.get_stats() if self.response_cache else {}
+
+    def get_swr_stats(self) -> Dict[str, int]:
+        """Obtener lecturas servidas frescas, obsoletas y refrescos en segundo plano"""
+        return self.swr_cache.get_stats() if self.swr_cache else {}
+
+    def get_retry_stats(self) -> Dict[str, int]:
+        """Obtener estadísticas de la política de reintentos"""
+        return self.retry_policy.get_stats()
+
     def get_bombas_list(self) -> List[Dict]:
         """
         Obtener lista de bombas desde la API o archivo local
 
+        Si config.FILTER_BY_NAME tiene patrones (nombre, estación o prefijo)
+        solo se devuelven las bombas que coinciden; el índice completo queda
+        en self.pump_index.
+
         Returns:
             Lista de bombas con sus IDs y nombres
         """
         try:
             # Intentar obtener desde la API
-            response = self._make_request("GET", config.ENDPOINTS["pumps_list"])
-            content = response.content
-
-            # Detectar y manejar BOM UTF-8
-            if content.startswith(b"\xef\xbb\xbf"):
-                content = content[3:]
-
-            data = json.loads(content.decode("utf-8"))
-
-            # Manejar diferentes formatos de respuesta
-            if isinstance(data, dict) and "results" in data:
-                pumps = data["results"]
-            elif isinstance(data, list):
-                pumps = data
-            else:
-                logger.warning(f"Formato de respuesta inesperado: {type(data)}")
-                pumps = []
-
+            content = self._get_catalog_content(config.ENDPOINTS["pumps_list"])
+            pumps = parse_pumps_payload(json_loads(content))
             logger.info(f"Obtenidas {len(pumps)} bombas de la API")
-            return pumps
 
         except Exception as e:
             logger.error(f"Error al obtener bombas de la API: {e}")
             logger.info("Intentando cargar desde archivo local...")
-            return load_bmb_list_from_file()
+            pumps = load_bmb_list_from_file()
+
+        self.href_catalog.seed(pumps)
+        self.pump_index = PumpIndex(pumps)
+
+        filters = getattr(config, "FILTER_BY_NAME", None)
+        if filters:
+            pumps = self.pump_index.select(filters)
+            logger.info(f"FILTER_BY_NAME: {len(pumps)} bombas seleccionadas")
+        return pumps
 
     def get_bomba_info(self, bomba_id: str) -> Dict:
         """
@@ -217,134 +633,630 @@ class AquaAdvancedClient:
         """
         try:
             endpoint = f"{config.ENDPOINTS['individual_pump']}/{bomba_id}/"
-            response = self._make_request("GET", endpoint)
-
-            content = response.content
-            if content.startswith(b"\xef\xbb\xbf"):
-                content = content[3:]
-
-            return json.loads(content.decode("utf-8"))
+            info = json_loads(self._get_catalog_content(endpoint))
+            if isinstance(info, dict):
+                self.href_catalog.update(bomba_id, info)
+            return info
+        except CircuitOpenError as e:
+            logger.warning(f"{e}. Usando archivo local para bomba {bomba_id}")
+            for pump in load_bmb_list_from_file():
+                if pump.get("id") == bomba_id:
+                    self.href_catalog.update(bomba_id, pump)
+                    return pump
+            return {}
         except Exception as e:
             logger.error(f"Error al obtener info de bomba {bomba_id}: {e}")
             return {}
 
-    def get_bomba_status(
+    def _resolve_href(self, bomba_id: str, endpoint_key: str) -> str:
+        """
+        Obtener el href de un endpoint de bomba, usando el catálogo en caché
+
+        Solo se consulta /physicalPumps/{id}/ si la bomba no está en el
+        catálogo o su entrada ha caducado.
+
+        Args:
+            bomba_id: ID de la bomba
+            endpoint_key: Clave del endpoint (ej: 'rawpower/detailed')
+
+        Returns:
+            URL del endpoint
+
+        Raises:
+            LookupError: La bomba no tiene enlace para el endpoint
+        """
+        links = self.href_catalog.get_links(bomba_id)
+        if links is None:
+            info = self.get_bomba_info(bomba_id)
+            if not info:
+                raise LookupError(f"Sin información de enlaces para bomba {bomba_id}")
+            links = self.href_catalog.update(bomba_id, info)
+
+        if endpoint_key not in links:
+            raise LookupError(
+                f"Endpoint {endpoint_key} no disponible para bomba {bomba_id}"
+            )
+
+        return fix_pump_href(bomba_id, endpoint_key, links[endpoint_key])
+
+    def _build_time_params(
+        self, start_time: Optional[str] = None, end_time: Optional[str] = None
+    ) -> Dict[str, str]:
+        """Construir parámetros startTime/endTime en formato API"""
+        return build_time_params(start_time, end_time)
+
+    def _fetch_bomba_data(
         self,
         bomba_id: str,
+        endpoint_key: str,
         start_time: str = None,
         end_time: str = None,
-        detailed: bool = False,
     ) -> Any:
         """
-        Obtener estado de una bomba usando los enlaces href
+        Obtener datos de un endpoint de bomba propagando los errores
 
         Args:
             bomba_id: ID de la bomba
+            endpoint_key: Clave del endpoint (ej: 'status', 'speed/detailed')
             start_time: Tiempo inicio en formato ISO8601
             end_time: Tiempo fin en formato ISO8601
-            detailed: Si usar endpoint detallado
 
         Returns:
-            Estado de la bomba
+            Datos decodificados de la respuesta
+
+        Raises:
+            LookupError: La bomba no tiene enlace para el endpoint
+            InvalidResponseError: El cuerpo no es JSON válido
+            requests.RequestException: Error en la petición
+        """
+        if self.range_cache is not None and start_time and end_time:
+            try:
+                start, end = parse_time(start_time), parse_time(end_time)
+            except ValueError:
+                start = end = None
+            if start is not None and end is not None:
+                return self._fetch_bomba_cached(bomba_id, endpoint_key, start, end)
+        return self._fetch_bomba_range(bomba_id, endpoint_key, start_time, end_time)
+
+    def _fetch_bomba_cached(
+        self, bomba_id: str, endpoint_key: str, start: datetime, end: datetime
+    ) -> Any:
+        """
+        Obtener un rango pidiendo solo los huecos que no están en la caché
+
+        Returns:
+            Puntos del rango completo: la respuesta del servidor tal cual si
+            no había nada en caché, o unidos desde la caché
+        """
+        key = (bomba_id, endpoint_key)
+        gaps = self.range_cache.gaps(key, start, end)
+        for gap_start, gap_end in gaps:
+            data = self._fetch_bomba_range(
+                bomba_id, endpoint_key, gap_start.isoformat(), gap_end.isoformat()
+            )
+            if not isinstance(data, list):
+                # Respuesta que no es una serie: no se puede unir por rangos
+                return data
+            self.range_cache.store(key, gap_start, gap_end, data)
+        if gaps == [(start, end)]:
+            return data
+        return self.range_cache.get(key, start, end, self._point_cadence(endpoint_key))
+
+    def _point_cadence(self, endpoint_key: str) -> Optional[timedelta]:
+        """
+        Intervalo fijo entre puntos de un endpoint
+
+        Los endpoints agregados siguen la rejilla de CHUNK_CADENCE_MINUTES;
+        los detallados no tienen rejilla (None).
+        """
+        if endpoint_key.endswith("/detailed"):
+            return None
+        return self.chunk_cadence
+
+    def _fetch_bomba_range(
+        self,
+        bomba_id: str,
+        endpoint_key: str,
+        start_time: str = None,
+        end_time: str = None,
+    ) -> Any:
+        """Obtener un rango del servidor, dividido en ventanas si es largo"""
+        windows = self._plan_windows(endpoint_key, start_time, end_time)
+        if len(windows) > 1:
+            return self._fetch_bomba_chunked(bomba_id, endpoint_key, windows)
+        return self._fetch_bomba_window(bomba_id, endpoint_key, start_time, end_time)
+
+    def _plan_windows(
+        self, endpoint_key: str, start_time: Optional[str], end_time: Optional[str]
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Dividir un rango largo en ventanas alineadas a la cadencia de los datos
+
+        Returns:
+            Ventanas (inicio, fin); una sola si el rango no necesita dividirse
         """
+        if not (self.chunking_enabled and start_time and end_time):
+            return [(None, None)]
         try:
-            # Primero obtener info de la bomba para los enlaces href
-            info = self.get_bomba_info(bomba_id)
-            if not info:
-                return {}
+            start, end = parse_time(start_time), parse_time(end_time)
+        except ValueError:
+            return [(None, None)]
 
-            # Usar el href proporcionado por la API
-            endpoint_key = "status/detailed" if detailed else "status"
-            if endpoint_key not in info:
-                logger.error(
-                    f"Endpoint {endpoint_key} no disponible para bomba {bomba_id}"
+        window = self.window_sizer.window(endpoint_key)
+        if end - start <= window:
+            return [(start, end)]
+        return split_range(start, end, window, self.chunk_cadence)
+
+    def _fetch_bomba_chunked(
+        self,
+        bomba_id: str,
+        endpoint_key: str,
+        windows: List[Tuple[datetime, datetime]],
+    ) -> List[Dict]:
+        """
+        Pedir en paralelo las ventanas de un rango y fusionarlas en orden
+
+        Returns:
+            Puntos ordenados por tiempo, sin duplicados en las fronteras
+        """
+        logger.debug(
+            f"Dividiendo {endpoint_key} de bomba {bomba_id} en {len(windows)} ventanas"
+        )
+        futures = [
+            self._get_chunk_executor().submit(
+                self._fetch_bomba_window,
+                bomba_id,
+                endpoint_key,
+                start.isoformat(),
+                end.isoformat(),
+            )
+            for start, end in windows
+        ]
+        return merge_series(future.result() for future in futures)
+
+    def _get_chunk_executor(self) -> ThreadPoolExecutor:
+        """Pool de hilos propio para las ventanas (independiente de fetch_fleet)"""
+        with self._session_lock:
+            if self._chunk_executor is None:
+                self._chunk_executor = ThreadPoolExecutor(
+                    max_workers=getattr(config, "CHUNK_MAX_WORKERS", 8),
+                    thread_name_prefix="aquadapt-chunk",
                 )
-                return {}
-
-            href = info[endpoint_key]["href"]
-
-            params = {}
-            if start_time:
-                params["startTime"] = self._format_datetime_for_api(start_time)
-            if end_time:
-                params["endTime"] = self._format_datetime_for_api(end_time)
-
-            # Hacer petición directa con el href
-            response = requests.get(
-                href,
-                params=params,
-                headers=self.headers,
-                verify=self.verify_ssl,
-                timeout=self.timeout,
+            return self._chunk_executor
+
+    def _fetch_bomba_window(
+        self,
+        bomba_id: str,
+        endpoint_key: str,
+        start_time: str = None,
+        end_time: str = None,
+    ) -> Any:
+        """
+        Obtener datos de un endpoint de bomba con una sola petición
+
+        Solo un cuerpo realmente vacío se guarda en la caché de vacíos.
+
+        Raises:
+            LookupError: La bomba no tiene enlace para el endpoint
+            InvalidResponseError: El cuerpo no es JSON válido
+            requests.RequestException: Error en la petición
+        """
+        interval = None
+        if start_time and end_time:
+            try:
+                interval = (parse_time(start_time), parse_time(end_time))
+            except ValueError:
+                interval = None
+
+        series_key = (bomba_id, endpoint_key)
+        if interval and self.negative_cache.is_empty(series_key, *interval):
+            logger.debug(
+                f"Rango sin datos conocido: {endpoint_key} de bomba {bomba_id}"
             )
-            response.raise_for_status()
+            return []
 
-            return self._handle_api_response(response)
+        href = self._resolve_href(bomba_id, endpoint_key)
+        params = self._build_time_params(start_time, end_time)
+        key = request_key(href, params)
+
+        # Las peticiones idénticas simultáneas comparten una sola llamada
+        data = self.single_flight.do(
+            key, lambda: self._fetch_href_data(bomba_id, href, params, key)
+        )
+
+        if interval and isinstance(data, list):
+            if data:
+                self.window_sizer.observe(
+                    endpoint_key, len(data), interval[1] - interval[0]
+                )
+            else:
+                self.negative_cache.record(series_key, *interval)
+        return data
+
+    def _fetch_href_data(
+        self, bomba_id: str, href: str, params: Dict[str, str], key: tuple
+    ) -> Any:
+        """
+        Pedir y decodificar un href de bomba, con datos locales si el circuito
+        está abierto
+
+        Las lecturas del estado actual (sin endTime) siempre se piden al
+        servidor; solo los rangos pasan por la caché de respuestas.
+
+        Args:
+            bomba_id: ID de la bomba
+            href: URL del endpoint
+            params: Parámetros de la petición
+            key: Clave canónica de la petición
+
+        Returns:
+            Datos decodificados de la respuesta
+        """
+        cached = self.response_cache is not None and "endTime" in params
+        cache_key = canonical_key(key) if cached else None
+        if cache_key:
+            data = self.response_cache.get(cache_key)
+            if data is not None:
+                logger.debug(f"Respuesta desde caché: {cache_key}")
+                return data
+
+        started = time.perf_counter()
+        try:
+            response = self._get_href(href, params)
+        except CircuitOpenError as e:
+            data = self.fallback_cache.get(key)
+            if data is None:
+                raise
+            logger.warning(f"{e}. Usando últimos datos locales de bomba {bomba_id}")
+            return data
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 404:
+                # El href puede haber cambiado: forzar recarga del catálogo
+                endpoint = f"{config.ENDPOINTS['individual_pump']}/{bomba_id}/"
+                self.href_catalog.invalidate(bomba_id)
+                if self.swr_cache is not None:
+                    self.swr_cache.invalidate(("catalog", endpoint))
+                if self.http_cache is not None:
+                    self.http_cache.invalidate(f"{self.base_url}{endpoint}")
+            raise
+
+        # Un cuerpo corrupto se propaga como error: no es un rango vacío
+        data = self._handle_api_response(response, strict=True)
+        self.fallback_cache.put(key, data)
+        if cache_key:
+            self.response_cache.put(
+                cache_key,
+                data,
+                response.content,
+                self._response_ttl(params),
+                cost=time.perf_counter() - started,
+            )
+        return data
+
+    def _response_ttl(self, params: Dict[str, str]) -> Optional[float]:
+        """
+        Validez en la caché de respuestas según el rango pedido
+
+        Los rangos que terminan antes de RANGE_CACHE_RECENT_LAG_MINUTES se
+        consideran definitivos y no caducan; el resto dura SHARED_CACHE_TTL.
+        Las peticiones sin endTime no llegan aquí: no se guardan.
+        """
+        ttl = getattr(config, "SHARED_CACHE_TTL", 300)
+        try:
+            end = parse_time(params["endTime"])
+        except (KeyError, ValueError):
+            return ttl
+        lag = timedelta(minutes=getattr(config, "RANGE_CACHE_RECENT_LAG_MINUTES", 60))
+        if end < datetime.now(timezone.utc).replace(tzinfo=None) - lag:
+            return None
+        return ttl
+
+    def _as_series(self, data: Any) -> Any:
+        """
+        Convertir una lista de puntos en TimeSeries si as_timeseries está activo
+
+        Las respuestas que no son series exactas (campos extra, valores no
+        numéricos...) se devuelven sin cambios. Sin numpy se avisa una vez y
+        se desactiva as_timeseries.
+        """
+        if not self.as_timeseries or not isinstance(data, list):
+            return data
+        try:
+            return TimeSeries.from_points(data)
+        except ImportError as e:
+            logger.warning(f"as_timeseries: {e}. Se devuelven listas")
+            self.as_timeseries = False
+            return data
+        except ValueError as e:
+            logger.debug(f"Respuesta devuelta como lista de puntos: {e}")
+            return data
+
+    def _get_bomba_data(
+        self,
+        bomba_id: str,
+        endpoint: str,
+        start_time: str = None,
+        end_time: str = None,
+        detailed: bool = False,
+        descripcion: str = None,
+    ) -> Any:
+        """
+        Obtener datos de un endpoint de bomba registrando los errores
+
+        Returns:
+            Datos del endpoint (TimeSeries si as_timeseries está activo), {}
+            si no hay enlace o [] si la petición falla
+        """
+        endpoint_key = f"{endpoint}/detailed" if detailed else endpoint
+        descripcion = descripcion or endpoint_key
+        try:
+            return self._as_series(
+                self._fetch_bomba_data(bomba_id, endpoint_key, start_time, end_time)
+            )
+        except LookupError as e:
+            logger.error(str(e))
+            return {}
         except Exception as e:
-            logger.error(f"Error al obtener status de bomba {bomba_id}: {e}")
+            logger.error(f"Error al obtener {descripcion} de bomba {bomba_id}: {e}")
             logger.debug(
-                f"URL utilizada: {href if 'href' in locals() else 'No disponible'}"
+                f"URL utilizada: {self.href_catalog.get(bomba_id, endpoint_key) or 'No disponible'}"
             )
             return []
 
-    def get_bomba_power(
+    def iter_bomba_data(
+        self,
+        bomba_id: str,
+        endpoint: str,
+        start_time: str = None,
+        end_time: str = None,
+        detailed: bool = False,
+        chunk_size: Optional[int] = None,
+    ) -> Iterator[Any]:
+        """
+        Obtener los puntos de un endpoint de bomba en streaming
+
+        Los puntos se decodifican a medida que llegan del socket, sin guardar
+        la respuesta completa, por lo que la memoria no depende del rango.
+
+        Args:
+            bomba_id: ID de la bomba
+            endpoint: Nombre del endpoint (ej: 'rawpower', 'speed')
+            start_time: Tiempo inicio en formato ISO8601
+            end_time: Tiempo fin en formato ISO8601
+            detailed: Si usar endpoint detallado
+            chunk_size: Bytes leídos del socket en cada trozo
+
+        Yields:
+            Puntos de la serie (dicts con time, value y validity)
+        """
+        endpoint_key = f"{endpoint}/detailed" if detailed else endpoint
+        chunk_size = chunk_size or getattr(config, "STREAM_CHUNK_SIZE", 65536)
+        try:
+            href = self._resolve_href(bomba_id, endpoint_key)
+            response = self._request(
+                "GET", href, self._build_time_params(start_time, end_time), stream=True
+            )
+        except LookupError as e:
+            logger.error(str(e))
+            return
+        except Exception as e:
+            logger.error(f"Error al obtener {endpoint_key} de bomba {bomba_id}: {e}")
+            return
+
+        decoded = 0
+
+        def chunks() -> Iterator[bytes]:
+            nonlocal decoded
+            for chunk in response.iter_content(chunk_size=chunk_size):
+                decoded += len(chunk)
+                yield chunk
+
+        with closing(response):
+            yield from iter_json_array(chunks())
+            self.transfer_stats.add(
+                endpoint_kind(href),
+                response.raw.tell() or decoded,
+                decoded,
+                response.headers.get("Content-Encoding", "identity"),
+            )
+
+    def get_bomba_endpoint(
         self,
         bomba_id: str,
+        endpoint: str,
         start_time: str = None,
         end_time: str = None,
         detailed: bool = False,
     ) -> Any:
         """
-        Obtener potencia de una bomba usando los enlaces href
+        Obtener datos de cualquier endpoint href de una bomba
 
         Args:
             bomba_id: ID de la bomba
+            endpoint: Nombre del endpoint (ej: 'fault', 'inservice', 'aaecontrol')
             start_time: Tiempo inicio en formato ISO8601
             end_time: Tiempo fin en formato ISO8601
             detailed: Si usar endpoint detallado
 
         Returns:
-            Datos de potencia de la bomba
+            Datos del endpoint
         """
-        try:
-            # Primero obtener info de la bomba para los enlaces href
-            info = self.get_bomba_info(bomba_id)
-            if not info:
-                return {}
+        return self._get_bomba_data(bomba_id, endpoint, start_time, end_time, detailed)
 
-            # Usar el href proporcionado por la API
-            endpoint_key = "rawpower/detailed" if detailed else "rawpower"
-            if endpoint_key not in info:
-                logger.error(
-                    f"Endpoint {endpoint_key} no disponible para bomba {bomba_id}"
-                )
-                return {}
-
-            href = info[endpoint_key]["href"]
-
-            params = {}
-            if start_time:
-                params["startTime"] = self._format_datetime_for_api(start_time)
-            if end_time:
-                params["endTime"] = self._format_datetime_for_api(end_time)
-
-            # Hacer petición directa con el href
-            response = requests.get(
-                href,
-                params=params,
-                headers=self.headers,
-                verify=self.verify_ssl,
-                timeout=self.timeout,
+    def get_bomba_latest(
+        self, bomba_id: str, endpoint: str, detailed: bool = False
+    ) -> Optional[Dict]:
+        """
+        Obtener el último valor de un endpoint de bomba (lecturas de panel)
+
+        Se piden las últimas SWR_LATEST_LOOKBACK_HOURS horas y se devuelve el
+        punto más reciente. Con SWR_ENABLED el valor se sirve al momento
+        aunque tenga unos minutos y se refresca en segundo plano.
+
+        Args:
+            bomba_id: ID de la bomba
+            endpoint: Nombre del endpoint (ej: 'status', 'rawpower')
+            detailed: Si usar endpoint detallado
+
+        Returns:
+            Punto más reciente (time, value, validity) o None si no hay datos
+            o la petición falla
+        """
+        endpoint_key = f"{endpoint}/detailed" if detailed else endpoint
+        lookback = timedelta(hours=getattr(config, "SWR_LATEST_LOOKBACK_HOURS", 6))
+
+        def load() -> Optional[Dict]:
+            now = datetime.now(timezone.utc).replace(tzinfo=None)
+            data = self._fetch_bomba_data(
+                bomba_id, endpoint_key, format_time(now - lookback), format_time(now)
             )
-            response.raise_for_status()
+            return latest_point(data)
 
-            return self._handle_api_response(response)
+        try:
+            if self.swr_cache is None:
+                return load()
+            return self.swr_cache.get(("latest", bomba_id, endpoint_key), load)
+        except LookupError as e:
+            logger.error(str(e))
         except Exception as e:
-            logger.error(f"Error al obtener potencia de bomba {bomba_id}: {e}")
-            logger.debug(
-                f"URL utilizada: {href if 'href' in locals() else 'No disponible'}"
+            logger.error(
+                f"Error al obtener último valor de {endpoint_key} de bomba {bomba_id}: {e}"
             )
-            return []
+        return None
+
+    def fetch_fleet(
+        self,
+        pumps: List[Union[str, Dict]],
+        endpoints: List[str],
+        start_time: str = None,
+        end_time: str = None,
+        max_workers: Optional[int] = None,
+    ) -> Dict[str, Any]:
+        """
+        Obtener en paralelo los datos de varios endpoints para varias bombas
+
+        Cada par (bomba, endpoint) se ejecuta en un pool de hilos acotado; el
+        fallo de una bomba no interrumpe ni retrasa al resto.
+
+        Args:
+            pumps: IDs de bomba o diccionarios de bomba (con 'id' y enlaces)
+            endpoints: Claves de endpoint (ej: ['status', 'rawpower/detailed'])
+            start_time: Tiempo inicio en formato ISO8601
+            end_time: Tiempo fin en formato ISO8601
+            max_workers: Hilos simultáneos (por defecto FLEET_MAX_WORKERS)
+
+        Returns:
+            Diccionario con 'results' (un elemento por par con bomba_id, name,
+            endpoint, status 'ok'/'empty'/'error', data, latency y error) y
+            los totales 'ok', 'empty', 'errors' y 'elapsed'
+        """
+        bombas = []
+        for pump in pumps:
+            if isinstance(pump, dict):
+                self.href_catalog.seed([pump])
+                bombas.append((pump["id"], pump.get("name")))
+            else:
+                bombas.append((pump, None))
+
+        # El limitador adaptativo decide cuántas peticiones salen a la vez
+        if max_workers is None:
+            max_workers = getattr(config, "FLEET_MAX_WORKERS", 16)
+        max_workers = max(1, min(max_workers, self.pool_maxsize))
+
+        def fetch_item(bomba_id: str, name: Optional[str], endpoint_key: str) -> Dict:
+            item = {
+                "bomba_id": bomba_id,
+                "name": name,
+                "endpoint": endpoint_key,
+                "status": "ok",
+                "data": [],
+                "latency": 0.0,
+                "error": None,
+            }
+            started = time.perf_counter()
+            try:
+                item["data"] = self._as_series(
+                    self._fetch_bomba_data(bomba_id, endpoint_key, start_time, end_time)
+                )
+                if not item["data"]:
+                    item["status"] = "empty"
+            except Exception as e:
+                logger.error(
+                    f"Error al obtener {endpoint_key} de bomba {bomba_id}: {e}"
+                )
+                item["status"] = "error"
+                item["error"] = str(e)
+            item["latency"] = time.perf_counter() - started
+            return item
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [
+                executor.submit(fetch_item, bomba_id, name, endpoint_key)
+                for bomba_id, name in bombas
+                for endpoint_key in endpoints
+            ]
+            results = [future.result() for future in futures]
+
+        summary = {
+            "results": results,
+            "ok": sum(1 for r in results if r["status"] == "ok"),
+            "empty": sum(1 for r in results if r["status"] == "empty"),
+            "errors": sum(1 for r in results if r["status"] == "error"),
+            "elapsed": time.perf_counter() - started,
+        }
+        logger.info(
+            f"Flota: {len(results)} consultas en {summary['elapsed']:.2f}s "
+            f"({summary['ok']} con datos, {summary['empty']} vacías, "
+            f"{summary['errors']} errores)"
+        )
+        return summary
+
+    def get_bomba_status(
+        self,
+        bomba_id: str,
+        start_time: str = None,
+        end_time: str = None,
+        detailed: bool = False,
+    ) -> Any:
+        """
+        Obtener estado de una bomba usando los enlaces href
+
+        Args:
+            bomba_id: ID de la bomba
+            start_time: Tiempo inicio en formato ISO8601
+            end_time: Tiempo fin en formato ISO8601
+            detailed: Si usar endpoint detallado
+
+        Returns:
+            Estado de la bomba
+        """
+        return self._get_bomba_data(
+            bomba_id, "status", start_time, end_time, detailed, "status"
+        )
+
+    def get_bomba_power(
+        self,
+        bomba_id: str,
+        start_time: str = None,
+        end_time: str = None,
+        detailed: bool = False,
+    ) -> Any:
+        """
+        Obtener potencia de una bomba usando los enlaces href
+
+        Args:
+            bomba_id: ID de la bomba
+            start_time: Tiempo inicio en formato ISO8601
+            end_time: Tiempo fin en formato ISO8601
+            detailed: Si usar endpoint detallado
+
+        Returns:
+            Datos de potencia de la bomba
+        """
+        return self._get_bomba_data(
+            bomba_id, "rawpower", start_time, end_time, detailed, "potencia"
+        )
 
     def get_bomba_speed(
         self,
@@ -365,45 +1277,9 @@ class AquaAdvancedClient:
         Returns:
             Datos de velocidad de la bomba
         """
-        try:
-            # Primero obtener info de la bomba para los enlaces href
-            info = self.get_bomba_info(bomba_id)
-            if not info:
-                return {}
-
-            # Usar el href proporcionado por la API
-            endpoint_key = "speed/detailed" if detailed else "speed"
-            if endpoint_key not in info:
-                logger.error(
-                    f"Endpoint {endpoint_key} no disponible para bomba {bomba_id}"
-                )
-                return {}
-
-            href = info[endpoint_key]["href"]
-
-            params = {}
-            if start_time:
-                params["startTime"] = self._format_datetime_for_api(start_time)
-            if end_time:
-                params["endTime"] = self._format_datetime_for_api(end_time)
-
-            # Hacer petición directa con el href
-            response = requests.get(
-                href,
-                params=params,
-                headers=self.headers,
-                verify=self.verify_ssl,
-                timeout=self.timeout,
-            )
-            response.raise_for_status()
-
-            return self._handle_api_response(response)
-        except Exception as e:
-            logger.error(f"Error al obtener velocidad de bomba {bomba_id}: {e}")
-            logger.debug(
-                f"URL utilizada: {href if 'href' in locals() else 'No disponible'}"
-            )
-            return []
+        return self._get_bomba_data(
+            bomba_id, "speed", start_time, end_time, detailed, "velocidad"
+        )
 
     def get_bomba_onoffschedule(
         self,
@@ -424,49 +1300,158 @@ class AquaAdvancedClient:
         Returns:
             Datos de programación de encendido/apagado de la bomba
         """
-        try:
-            # Primero obtener info de la bomba para los enlaces href
-            info = self.get_bomba_info(bomba_id)
-            if not info:
-                return {}
+        return self._get_bomba_data(
+            bomba_id, "onoffschedule", start_time, end_time, detailed, "programación"
+        )
 
-            # Usar el href proporcionado por la API
-            endpoint_key = "onoffschedule/detailed" if detailed else "onoffschedule"
-            if endpoint_key not in info:
-                logger.error(
-                    f"Endpoint {endpoint_key} no disponible para bomba {bomba_id}"
-                )
-                return {}
 
-            href = info[endpoint_key]["href"].replace(
-                "https://aquadvanced.ccaait.local",
-                "https://aquadvanced.ccaait.local/publication/physicalPumps/"
-                + f"{bomba_id}",
-            )
+def format_datetime_for_api(dt_string: str) -> str:
+    """
+    Convertir fecha ISO a formato requerido por la API
 
-            params = {}
-            if start_time:
-                params["startTime"] = self._format_datetime_for_api(start_time)
-            if end_time:
-                params["endTime"] = self._format_datetime_for_api(end_time)
-
-            # Hacer petición directa con el href
-            response = requests.get(
-                href,
-                params=params,
-                headers=self.headers,
-                verify=self.verify_ssl,
-                timeout=self.timeout,
-            )
-            response.raise_for_status()
+    Args:
+        dt_string: Fecha en formato ISO (ej: '2025-10-22T00:00:00')
 
-            return self._handle_api_response(response)
-        except Exception as e:
-            logger.error(f"Error al obtener velocidad de bomba {bomba_id}: {e}")
-            logger.debug(
-                f"URL utilizada: {href if 'href' in locals() else 'No disponible'}"
-            )
-            return []
+    Returns:
+        Fecha en formato API URL-encoded (ej: '2025-10-22T00%3A00%3A00Z')
+    """
+    try:
+        # Si la fecha ya tiene Z al final, la removemos temporalmente
+        if dt_string.endswith("Z"):
+            dt_string = dt_string[:-1]
+
+        # Parsear la fecha para validar formato
+        dt = datetime.fromisoformat(dt_string)
+
+        # Formatear como ISO con Z al final
+        iso_with_z = dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+        # URL encode los dos puntos (:) que se convierten en %3A
+        # formatted = iso_with_z.replace(":", "%3A")
+        formatted = iso_with_z
+
+        logger.debug(f"Fecha convertida: {dt_string} -> {formatted}")
+        return formatted
+
+    except ValueError as e:
+        logger.error(f"Error al formatear fecha {dt_string}: {e}")
+        # Retornar el string original si no se puede procesar
+        return dt_string
+
+
+def build_time_params(
+    start_time: Optional[str] = None, end_time: Optional[str] = None
+) -> Dict[str, str]:
+    """
+    Construir parámetros startTime/endTime en formato API
+
+    Args:
+        start_time: Tiempo inicio en formato ISO8601
+        end_time: Tiempo fin en formato ISO8601
+
+    Returns:
+        Parámetros de la petición
+    """
+    params = {}
+    if start_time:
+        params["startTime"] = format_datetime_for_api(start_time)
+    if end_time:
+        params["endTime"] = format_datetime_for_api(end_time)
+    return params
+
+
+def request_key(href: str, params: Optional[Dict] = None) -> tuple:
+    """
+    Clave canónica de una petición: href y parámetros ordenados
+
+    Args:
+        href: URL del endpoint
+        params: Parámetros de la petición
+
+    Returns:
+        Tupla hashable que identifica la petición
+    """
+    return (href, tuple(sorted((params or {}).items())))
+
+
+def fix_pump_href(bomba_id: str, endpoint_key: str, href: str) -> str:
+    """
+    Corregir el href de los endpoints que la API devuelve sin ruta completa
+
+    Args:
+        bomba_id: ID de la bomba
+        endpoint_key: Clave del endpoint
+        href: Enlace tal y como lo devuelve la API
+
+    Returns:
+        URL utilizable del endpoint
+    """
+    if endpoint_key.startswith("onoffschedule"):
+        href = href.replace(
+            "https://aquadvanced.ccaait.local",
+            "https://aquadvanced.ccaait.local/publication/physicalPumps/"
+            + f"{bomba_id}",
+        )
+    return href
+
+
+def parse_pumps_payload(data: Any) -> List[Dict]:
+    """
+    Extraer la lista de bombas de los distintos formatos de respuesta
+
+    Args:
+        data: JSON decodificado de /physicalPumps/
+
+    Returns:
+        Lista de bombas
+    """
+    # Manejar diferentes formatos de respuesta
+    if isinstance(data, dict) and "results" in data:
+        return data["results"]
+    if isinstance(data, list):
+        return data
+    logger.warning(f"Formato de respuesta inesperado: {type(data)}")
+    return []
+
+
+class InvalidResponseError(ValueError):
+    """Cuerpo de respuesta que no es JSON válido (truncado o corrupto)"""
+
+
+def decode_api_content(content: bytes, strict: bool = False) -> Any:
+    """
+    Decodificar el cuerpo de una respuesta de la API
+
+    Elimina el BOM UTF-8 y devuelve [] para respuestas vacías o, salvo con
+    strict, para JSON inválido.
+
+    Args:
+        content: Cuerpo de la respuesta en bytes
+        strict: Lanzar InvalidResponseError si el JSON no es válido en vez
+            de devolver [] (para no guardar como vacío un cuerpo corrupto)
+
+    Returns:
+        Datos decodificados
+
+    Raises:
+        InvalidResponseError: JSON inválido con strict=True
+    """
+    # Manejar respuestas vacías (con o sin BOM UTF-8)
+    if is_empty_body(content):
+        logger.info(
+            "Respuesta vacía. Puede que no haya datos para el rango especificado."
+        )
+        return []
+
+    try:
+        # Intentar decodificar como JSON (el BOM se salta sin copiar)
+        return json_loads(content)
+    except ValueError as e:
+        logger.warning(f"Error al decodificar JSON: {e}")
+        logger.debug(f"Contenido de respuesta: {content[:200]}...")
+        if strict:
+            raise InvalidResponseError(f"Respuesta no decodificable: {e}") from e
+        return []
 
 
 def load_bmb_list_from_file(file_path: str = "aquadapt BMB Id.json") -> List[Dict]:
@@ -484,8 +1469,18 @@ def load_bmb_list_from_file(file_path: str = "aquadapt BMB Id.json") -> List[Dic
             logger.error(f"Archivo no encontrado: {file_path}")
             return []
 
-        with open(file_path, "r", encoding="utf-8-sig") as f:
-            data = json.load(f)
+        # Instantánea compilada: evita reprocesar el JSON si no ha cambiado
+        use_snapshot = getattr(config, "CATALOG_SNAPSHOT_ENABLED", True)
+        snapshot_dir = getattr(config, "CATALOG_SNAPSHOT_DIR", ".aquadapt_cache")
+        if use_snapshot:
+            pumps = load_catalog_snapshot(file_path, snapshot_dir)
+            if pumps is not None:
+                logger.info(f"Cargadas {len(pumps)} bombas desde instantánea local")
+                return pumps
+
+        with open(file_path, "rb") as f:
+            content = f.read()
+        data = json_loads(content)
 
         if isinstance(data, dict) and "results" in data:
             pumps = data["results"]
@@ -495,6 +1490,8 @@ def load_bmb_list_from_file(file_path: str = "aquadapt BMB Id.json") -> List[Dic
             logger.error("Formato de archivo no válido")
             return []
 
+        if use_snapshot:
+            save_catalog_snapshot(file_path, content, pumps, snapshot_dir)
         logger.info(f"Cargadas {len(pumps)} bombas desde archivo local")
         return pumps
 
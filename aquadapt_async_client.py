@@ -0,0 +1,445 @@
+#!/usr/bin/env python3
+"""
+AquaAdvanced API Client asíncrono
+Versión asyncio de AquaAdvancedClient con la misma API, basada en aiohttp.
+La concurrencia se limita con semáforos por host y por endpoint.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlsplit
+
+import config
+from aquadapt_api_client_oficial_v2 import (
+    build_time_params,
+    decode_api_content,
+    fix_pump_href,
+    load_bmb_list_from_file,
+    parse_pumps_payload,
+    request_key,
+)
+from aquadapt_catalog import HrefCatalog
+from aquadapt_json import loads as json_loads
+from aquadapt_resilience import (
+    AsyncSingleFlight,
+    CircuitBreaker,
+    CircuitOpenError,
+    FallbackCache,
+    RetryPolicy,
+    endpoint_kind,
+)
+
+try:
+    import aiohttp
+except ImportError:  # pragma: no cover - dependencia opcional
+    aiohttp = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncAquaAdvancedClient:
+    """Cliente asíncrono para la API de AquaAdvanced"""
+
+    def __init__(
+        self,
+        max_per_host: Optional[int] = None,
+        max_per_endpoint: Optional[int] = None,
+    ):
+        """
+        Inicializar cliente con configuración
+
+        Args:
+            max_per_host: Peticiones simultáneas máximas por host
+            max_per_endpoint: Peticiones simultáneas máximas por tipo de endpoint
+        """
+        if aiohttp is None:
+            raise ImportError(
+                "AsyncAquaAdvancedClient requiere aiohttp: pip install aiohttp"
+            )
+
+        self.config = config
+        self.base_url = config.API_BASE_URL
+        self.timeout = getattr(config, "REQUEST_TIMEOUT", 10)
+        self.retry_count = getattr(config, "RETRY_COUNT", 3)
+        self.retry_policy = RetryPolicy(
+            max_attempts=self.retry_count,
+            backoff_base=getattr(config, "RETRY_BACKOFF_BASE", 0.5),
+            backoff_max=getattr(config, "RETRY_BACKOFF_MAX", 30.0),
+            budget=getattr(config, "RETRY_BUDGET", 60.0),
+        )
+        self.verify_ssl = getattr(config, "VERIFY_SSL", False)
+        self.max_per_host = max_per_host or getattr(config, "ASYNC_MAX_PER_HOST", 20)
+        self.max_per_endpoint = max_per_endpoint or getattr(
+            config, "ASYNC_MAX_PER_ENDPOINT", 8
+        )
+
+        self.headers = {
+            "Content-Type": "application/json",
+            "Accept": "application/json",
+        }
+        if hasattr(config, "API_KEY") and config.API_KEY:
+            self.headers["X-Api-Key"] = config.API_KEY
+
+        self.circuit_breaker = CircuitBreaker(
+            failure_threshold=getattr(config, "CIRCUIT_FAILURE_THRESHOLD", 5),
+            reset_timeout=getattr(config, "CIRCUIT_RESET_TIMEOUT", 30.0),
+            half_open_max=getattr(config, "CIRCUIT_HALF_OPEN_MAX", 1),
+        )
+        self.fallback_cache = FallbackCache(getattr(config, "FALLBACK_CACHE_SIZE", 512))
+
+        self.single_flight = AsyncSingleFlight()
+
+        self.href_catalog = HrefCatalog(ttl=getattr(config, "HREF_CATALOG_TTL", 3600))
+
+        self._session: Optional["aiohttp.ClientSession"] = None
+        self._host_semaphores: Dict[str, asyncio.Semaphore] = {}
+        self._endpoint_semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def close(self):
+        """Cerrar la sesión HTTP y sus conexiones"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _get_session(self) -> "aiohttp.ClientSession":
+        """Crear la sesión aiohttp de forma perezosa dentro del event loop"""
+        if self._session is None or self._session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                limit_per_host=self.max_per_host,
+                ssl=bool(self.verify_ssl),
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+            )
+        return self._session
+
+    def _semaphore(self, table: Dict[str, asyncio.Semaphore], key: str, size: int):
+        semaphore = table.get(key)
+        if semaphore is None:
+            semaphore = table[key] = asyncio.Semaphore(size)
+        return semaphore
+
+    async def _request(
+        self, url: str, params: Optional[Dict] = None, endpoint_key: str = ""
+    ) -> bytes:
+        """
+        Realizar petición GET con reintentos y límites de concurrencia
+
+        Args:
+            url: URL completa
+            params: Parámetros de la petición
+            endpoint_key: Tipo de endpoint para el semáforo por endpoint
+
+        Returns:
+            Cuerpo de la respuesta en bytes
+
+        Raises:
+            CircuitOpenError: Circuito abierto, la petición no se envía
+            aiohttp.ClientError: Error en la petición
+        """
+        breaker_key = f"{urlsplit(url).netloc}/{endpoint_kind(url)}"
+        host_semaphore = self._semaphore(
+            self._host_semaphores, urlsplit(url).netloc, self.max_per_host
+        )
+        endpoint_semaphore = self._semaphore(
+            self._endpoint_semaphores, endpoint_key, self.max_per_endpoint
+        )
+
+        policy = self.retry_policy
+        started = time.monotonic()
+        attempt = 0
+
+        while True:
+            if not self.circuit_breaker.allow(breaker_key):
+                raise CircuitOpenError(
+                    f"Circuito abierto para {breaker_key}: petición no enviada"
+                )
+
+            status = None
+            headers = None
+            try:
+                logger.debug(f"Realizando petición GET a {url}")
+                async with endpoint_semaphore, host_semaphore:
+                    try:
+                        async with self._get_session().get(
+                            url, params=params
+                        ) as response:
+                            status = response.status
+                            headers = response.headers
+                            response.raise_for_status()
+                            content = await response.read()
+                    finally:
+                        if status is None or status >= 500:
+                            self.circuit_breaker.record_failure(breaker_key)
+                        else:
+                            self.circuit_breaker.record_success(breaker_key)
+                policy.record_call(attempt + 1)
+                return content
+
+            except aiohttp.ClientResponseError as e:
+                if e.status in [401, 403]:
+                    logger.error(f"Error de autenticación: {e}")
+                    raise
+                if not policy.is_retryable_status(e.status):
+                    raise
+                error = e
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+
+            delay = policy.next_delay(attempt, started, status, headers)
+            if delay is None:
+                raise error
+
+            logger.warning(
+                f"Intento {attempt + 1}/{policy.max_attempts} falló: {error}. "
+                f"Reintentando en {delay:.2f}s"
+            )
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def get_retry_stats(self) -> Dict[str, int]:
+        """Obtener estadísticas de la política de reintentos"""
+        return self.retry_policy.get_stats()
+
+    async def get_bombas_list(self) -> List[Dict]:
+        """
+        Obtener lista de bombas desde la API o archivo local
+
+        Returns:
+            Lista de bombas con sus IDs y nombres
+        """
+        try:
+            content = await self._request(
+                f"{self.base_url}{config.ENDPOINTS['pumps_list']}",
+                endpoint_key="pumps_list",
+            )
+            pumps = parse_pumps_payload(json_loads(content))
+            logger.info(f"Obtenidas {len(pumps)} bombas de la API")
+
+        except Exception as e:
+            logger.error(f"Error al obtener bombas de la API: {e}")
+            logger.info("Intentando cargar desde archivo local...")
+            loop = asyncio.get_running_loop()
+            pumps = await loop.run_in_executor(None, load_bmb_list_from_file)
+
+        self.href_catalog.seed(pumps)
+        return pumps
+
+    async def get_bomba_info(self, bomba_id: str) -> Dict:
+        """
+        Obtener información detallada de una bomba
+
+        Args:
+            bomba_id: ID de la bomba
+
+        Las llamadas simultáneas para la misma bomba comparten una petición.
+
+        Returns:
+            Información de la bomba con enlaces href
+        """
+        return await self.single_flight.do(
+            ("individual_pump", bomba_id), lambda: self._load_bomba_info(bomba_id)
+        )
+
+    async def _load_bomba_info(self, bomba_id: str) -> Dict:
+        """Pedir /physicalPumps/{id}/ y actualizar el catálogo de enlaces"""
+        try:
+            content = await self._request(
+                f"{self.base_url}{config.ENDPOINTS['individual_pump']}/{bomba_id}/",
+                endpoint_key="individual_pump",
+            )
+            info = json_loads(content)
+            if isinstance(info, dict):
+                self.href_catalog.update(bomba_id, info)
+            return info
+        except Exception as e:
+            logger.error(f"Error al obtener info de bomba {bomba_id}: {e}")
+            return {}
+
+    async def _resolve_href(self, bomba_id: str, endpoint_key: str) -> str:
+        """
+        Obtener el href de un endpoint de bomba, usando el catálogo en caché
+
+        Raises:
+            LookupError: La bomba no tiene enlace para el endpoint
+        """
+        links = self.href_catalog.get_links(bomba_id)
+        if links is None:
+            info = await self.get_bomba_info(bomba_id)
+            if not info:
+                raise LookupError(f"Sin información de enlaces para bomba {bomba_id}")
+            links = self.href_catalog.update(bomba_id, info)
+
+        if endpoint_key not in links:
+            raise LookupError(
+                f"Endpoint {endpoint_key} no disponible para bomba {bomba_id}"
+            )
+
+        return fix_pump_href(bomba_id, endpoint_key, links[endpoint_key])
+
+    async def _fetch_bomba_data(
+        self,
+        bomba_id: str,
+        endpoint_key: str,
+        start_time: str = None,
+        end_time: str = None,
+    ) -> Any:
+        """
+        Obtener datos de un endpoint de bomba propagando los errores
+
+        Raises:
+            LookupError: La bomba no tiene enlace para el endpoint
+            aiohttp.ClientError: Error en la petición
+        """
+        href = await self._resolve_href(bomba_id, endpoint_key)
+        params = build_time_params(start_time, end_time)
+        key = request_key(href, params)
+
+        # Las peticiones idénticas simultáneas comparten una sola llamada
+        return await self.single_flight.do(
+            key,
+            lambda: self._fetch_href_data(bomba_id, endpoint_key, href, params, key),
+        )
+
+    async def _fetch_href_data(
+        self,
+        bomba_id: str,
+        endpoint_key: str,
+        href: str,
+        params: Dict[str, str],
+        key: tuple,
+    ) -> Any:
+        """Pedir y decodificar un href de bomba, con datos locales si el
+        circuito está abierto"""
+        try:
+            content = await self._request(href, params, endpoint_key)
+        except CircuitOpenError as e:
+            data = self.fallback_cache.get(key)
+            if data is None:
+                raise
+            logger.warning(f"{e}. Usando últimos datos locales de bomba {bomba_id}")
+            return data
+        except aiohttp.ClientResponseError as e:
+            if e.status == 404:
+                # El href puede haber cambiado: forzar recarga del catálogo
+                self.href_catalog.invalidate(bomba_id)
+            raise
+
+        data = decode_api_content(content)
+        self.fallback_cache.put(key, data)
+        return data
+
+    async def _get_bomba_data(
+        self,
+        bomba_id: str,
+        endpoint: str,
+        start_time: str = None,
+        end_time: str = None,
+        detailed: bool = False,
+        descripcion: str = None,
+    ) -> Any:
+        """
+        Obtener datos de un endpoint de bomba registrando los errores
+
+        Returns:
+            Datos del endpoint, {} si no hay enlace o [] si la petición falla
+        """
+        endpoint_key = f"{endpoint}/detailed" if detailed else endpoint
+        descripcion = descripcion or endpoint_key
+        try:
+            return await self._fetch_bomba_data(
+                bomba_id, endpoint_key, start_time, end_time
+            )
+        except LookupError as e:
+            logger.error(str(e))
+            return {}
+        except Exception as e:
+            logger.error(f"Error al obtener {descripcion} de bomba {bomba_id}: {e}")
+            return []
+
+    async def get_bomba_endpoint(
+        self,
+        bomba_id: str,
+        endpoint: str,
+        start_time: str = None,
+        end_time: str = None,
+        detailed: bool = False,
+    ) -> Any:
+        """Obtener datos de cualquier endpoint href de una bomba"""
+        return await self._get_bomba_data(
+            bomba_id, endpoint, start_time, end_time, detailed
+        )
+
+    async def get_bomba_status(
+        self,
+        bomba_id: str,
+        start_time: str = None,
+        end_time: str = None,
+        detailed: bool = False,
+    ) -> Any:
+        """Obtener estado de una bomba usando los enlaces href"""
+        return await self._get_bomba_data(
+            bomba_id, "status", start_time, end_time, detailed, "status"
+        )
+
+    async def get_bomba_power(
+        self,
+        bomba_id: str,
+        start_time: str = None,
+        end_time: str = None,
+        detailed: bool = False,
+    ) -> Any:
+        """Obtener potencia de una bomba usando los enlaces href"""
+        return await self._get_bomba_data(
+            bomba_id, "rawpower", start_time, end_time, detailed, "potencia"
+        )
+
+    async def get_bomba_speed(
+        self,
+        bomba_id: str,
+        start_time: str = None,
+        end_time: str = None,
+        detailed: bool = False,
+    ) -> Any:
+        """Obtener velocidad de una bomba usando los enlaces href"""
+        return await self._get_bomba_data(
+            bomba_id, "speed", start_time, end_time, detailed, "velocidad"
+        )
+
+    async def get_bomba_onoffschedule(
+        self,
+        bomba_id: str,
+        start_time: str = None,
+        end_time: str = None,
+        detailed: bool = False,
+    ) -> Any:
+        """Obtener programación de encendido/apagado de una bomba"""
+        return await self._get_bomba_data(
+            bomba_id, "onoffschedule", start_time, end_time, detailed, "programación"
+        )
+
+
+if __name__ == "__main__":
+
+    async def _demo():
+        async with AsyncAquaAdvancedClient() as client:
+            bombas = await client.get_bombas_list()
+            print(f"Encontradas {len(bombas)} bombas")
+            resultados = await asyncio.gather(
+                *(client.get_bomba_status(b["id"]) for b in bombas[:3])
+            )
+            for bmb, datos in zip(bombas[:3], resultados):
+                print(f"- {bmb.get('name', 'Sin nombre')}: {len(datos)} puntos")
+
+    asyncio.run(_demo())
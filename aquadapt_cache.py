@@ -0,0 +1,682 @@
+#!/usr/bin/env python3
+"""
+Cachés en disco de AquaAdvanced
+HttpCache guarda el cuerpo de /physicalPumps/ y /physicalPumps/{id}/ junto
+con sus validadores (ETag, Last-Modified) para revalidar con If-None-Match /
+If-Modified-Since y reutilizar el cuerpo cuando el servidor responde 304.
+Si el servidor no envía validadores, la entrada se sirve sin preguntar
+durante un TTL. SharedCache guarda las respuestas de series en una base
+SQLite compartida por todos los procesos del equipo, y TieredCache pone
+delante una caché en memoria con presupuesto en bytes. StaleWhileRevalidate
+sirve lecturas de panel al momento y las refresca en segundo plano.
+"""
+
+import hashlib
+import heapq
+import itertools
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Mapping, Optional, Tuple
+from urllib.parse import urlencode
+
+from aquadapt_resilience import SingleFlight
+
+logger = logging.getLogger(__name__)
+
+_SHARED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at);
+"""
+
+
+def cache_key(url: str) -> str:
+    """Nombre de archivo estable para una URL"""
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+class HttpCache:
+    """Caché de respuestas con validadores, persistida en un directorio"""
+
+    def __init__(self, directory: str = ".aquadapt_cache/http", ttl: float = 3600):
+        """
+        Args:
+            directory: Directorio donde se guardan las entradas
+            ttl: Segundos que se sirve sin revalidar una entrada sin validadores
+        """
+        self.directory = directory
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._stats = {"fresh": 0, "revalidated": 0, "stored": 0}
+
+    def _paths(self, url: str):
+        base = os.path.join(self.directory, cache_key(url))
+        return base + ".json", base + ".body"
+
+    def get(self, url: str) -> Optional[Dict]:
+        """
+        Obtener la entrada guardada de una URL
+
+        Returns:
+            Diccionario con url, etag, last_modified, stored_at y body, o None
+        """
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+            with open(body_path, "rb") as f:
+                entry["body"] = f.read()
+        except (OSError, ValueError):
+            return None
+        return entry if entry.get("url") == url else None
+
+    def put(self, url: str, body: bytes, headers: Mapping[str, str]):
+        """
+        Guardar el cuerpo y los validadores de una respuesta 200
+
+        Args:
+            url: URL pedida
+            body: Cuerpo de la respuesta
+            headers: Cabeceras de la respuesta
+        """
+        if self._save(url, body, headers.get("ETag"), headers.get("Last-Modified")):
+            with self._lock:
+                self._stats["stored"] += 1
+
+    def touch(self, url: str, entry: Dict, headers: Mapping[str, str]):
+        """Renovar una entrada tras un 304, con los validadores que lleguen"""
+        self._save(
+            url,
+            entry["body"],
+            headers.get("ETag") or entry.get("etag"),
+            headers.get("Last-Modified") or entry.get("last_modified"),
+        )
+        with self._lock:
+            self._stats["revalidated"] += 1
+
+    def invalidate(self, url: str):
+        """Eliminar la entrada de una URL (ej: tras un 404 de sus enlaces)"""
+        # Metadatos primero: sin ellos get() no devuelve la entrada
+        for path in self._paths(url):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                logger.warning(f"No se pudo borrar de la caché {url}: {e}")
+
+    def _save(
+        self,
+        url: str,
+        body: bytes,
+        etag: Optional[str],
+        last_modified: Optional[str],
+    ) -> bool:
+        """Escribir una entrada en disco; devuelve False si no se pudo"""
+        entry = {
+            "url": url,
+            "etag": etag,
+            "last_modified": last_modified,
+            "stored_at": time.time(),
+        }
+        meta_path, body_path = self._paths(url)
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            # Cuerpo primero: los metadatos solo apuntan a cuerpos completos
+            self._write(body_path, body)
+            self._write(meta_path, json.dumps(entry).encode("utf-8"))
+        except OSError as e:
+            logger.warning(f"No se pudo guardar en caché {url}: {e}")
+            return False
+        return True
+
+    @staticmethod
+    def _write(path: str, content: bytes):
+        """Escribir un archivo de forma atómica"""
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(content)
+        os.replace(tmp_path, path)
+
+    def is_fresh(self, entry: Dict) -> bool:
+        """Indicar si una entrada sin validadores puede servirse sin petición"""
+        fresh = (
+            not entry.get("etag")
+            and not entry.get("last_modified")
+            and time.time() - entry.get("stored_at", 0) < self.ttl
+        )
+        if fresh:
+            with self._lock:
+                self._stats["fresh"] += 1
+        return fresh
+
+    @staticmethod
+    def conditional_headers(entry: Optional[Dict]) -> Dict[str, str]:
+        """Cabeceras If-None-Match / If-Modified-Since para revalidar una entrada"""
+        headers = {}
+        if entry:
+            if entry.get("etag"):
+                headers["If-None-Match"] = entry["etag"]
+            if entry.get("last_modified"):
+                headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener entradas servidas sin petición, revalidadas (304) y guardadas"""
+        with self._lock:
+            return dict(self._stats)
+
+
+def canonical_key(key: tuple) -> str:
+    """
+    Clave textual de una petición a partir de request_key()
+
+    Args:
+        key: Tupla (href, parámetros ordenados)
+
+    Returns:
+        URL canónica (ej: 'https://.../status/?endTime=...&startTime=...')
+    """
+    href, params = key
+    return f"{href}?{urlencode(params)}" if params else href
+
+
+class SharedCache:
+    """
+    Caché de respuestas en disco compartida entre procesos
+
+    Usa SQLite en modo WAL (varios lectores y un escritor a la vez, con
+    espera ante bloqueos), limita el tamaño total expulsando las entradas
+    usadas hace más tiempo (LRU) y admite entradas con caducidad o sin ella.
+    """
+
+    def __init__(
+        self,
+        path: str = ".aquadapt_cache/responses.db",
+        max_bytes: int = 256 * 1024 * 1024,
+    ):
+        """
+        Args:
+            path: Ruta de la base de datos compartida
+            max_bytes: Tamaño máximo de los cuerpos guardados
+        """
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._conn = sqlite3.connect(
+            path, timeout=30, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SHARED_SCHEMA)
+
+    def close(self):
+        """Cerrar la conexión con la base de datos"""
+        with self._lock:
+            self._conn.close()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Obtener el cuerpo guardado de una petición
+
+        Args:
+            key: Clave canónica de la petición
+
+        Returns:
+            Cuerpo en bytes o None si no está o ha caducado
+        """
+        entry = self.get_entry(key)
+        return entry[0] if entry else None
+
+    def get_entry(self, key: str) -> Optional[Tuple[bytes, Optional[float]]]:
+        """
+        Obtener el cuerpo guardado y los segundos de validez que le quedan
+
+        Returns:
+            Tupla (cuerpo, ttl restante o None si no caduca), o None
+        """
+        now = time.time()
+        with self._lock:
+            try:
+                row = self._conn.execute(
+                    "SELECT value, expires_at FROM entries WHERE key = ?", (key,)
+                ).fetchone()
+                if row is not None and (row[1] is None or row[1] > now):
+                    self._conn.execute(
+                        "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+                    )
+                    self._stats["hits"] += 1
+                    return row[0], None if row[1] is None else row[1] - now
+            except sqlite3.Error as e:
+                logger.warning(f"Caché compartida no disponible: {e}")
+            self._stats["misses"] += 1
+            return None
+
+    def put(self, key: str, value: bytes, ttl: Optional[float] = None):
+        """
+        Guardar el cuerpo de una petición
+
+        Args:
+            key: Clave canónica de la petición
+            value: Cuerpo en bytes
+            ttl: Segundos de validez (None = hasta que lo expulse el LRU)
+        """
+        if len(value) > self.max_bytes:
+            return
+        now = time.time()
+        expires_at = now + ttl if ttl is not None else None
+        with self._lock:
+            try:
+                self._conn.execute("BEGIN IMMEDIATE")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO entries "
+                    "(key, value, size, expires_at, accessed_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (key, value, len(value), expires_at, now),
+                )
+                evicted = self._evict(now)
+                self._conn.execute("COMMIT")
+            except sqlite3.Error as e:
+                if self._conn.in_transaction:
+                    self._conn.execute("ROLLBACK")
+                logger.warning(f"No se pudo guardar en la caché compartida: {e}")
+                return
+            self._stats["stored"] += 1
+            self._stats["evicted"] += evicted
+
+    def delete(self, key: str):
+        """Eliminar el cuerpo guardado de una petición"""
+        with self._lock:
+            try:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+            except sqlite3.Error as e:
+                logger.warning(f"No se pudo borrar de la caché compartida: {e}")
+
+    def _evict(self, now: float) -> int:
+        """Eliminar caducadas y, si se supera max_bytes, las menos usadas"""
+        evicted = self._conn.execute(
+            "DELETE FROM entries WHERE expires_at IS NOT NULL AND expires_at <= ?",
+            (now,),
+        ).rowcount
+        total = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()[0]
+        while total > self.max_bytes:
+            rows = self._conn.execute(
+                "SELECT key, size FROM entries ORDER BY accessed_at LIMIT 64"
+            ).fetchall()
+            if not rows:
+                break
+            for key, size in rows:
+                self._conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+                total -= size
+                evicted += 1
+                if total <= self.max_bytes:
+                    break
+        return evicted
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener aciertos, fallos, entradas guardadas y expulsadas"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"], stats["bytes"] = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+            ).fetchone()
+        return stats
+
+
+def estimate_size(value: Any) -> int:
+    """
+    Estimar los bytes que ocupa en memoria un resultado decodificado
+
+    Para listas de puntos se mide en profundidad el primer elemento y se
+    multiplica por la longitud, lo que evita recorrer series de miles de
+    puntos en cada inserción.
+    """
+    if isinstance(value, list):
+        size = sys.getsizeof(value)
+        if value:
+            size += _deep_size(value[0]) * len(value)
+        return size
+    return _deep_size(value)
+
+
+def _deep_size(value: Any) -> int:
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_deep_size(k) + _deep_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_deep_size(item) for item in value)
+    return size
+
+
+class MemoryCache:
+    """
+    Caché en memoria con presupuesto en bytes y expulsión GreedyDual-Size
+
+    Cada entrada tiene prioridad L + coste / tamaño, donde L sube hasta la
+    prioridad de la última expulsada: las entradas poco usadas envejecen
+    como en un LRU, y a igualdad de uso se expulsan antes las grandes y las
+    baratas de volver a obtener.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Args:
+            max_bytes: Presupuesto de memoria para los valores guardados
+        """
+        self.max_bytes = max_bytes
+        # clave -> [valor, tamaño, caduca, coste, prioridad]
+        self._entries: Dict[str, list] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = itertools.count()
+        self._clock = 0.0
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "stored": 0, "evicted": 0}
+
+    def get(self, key: str) -> Optional[Any]:
+        """Obtener un valor guardado, o None si no está o ha caducado"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and entry[2] <= time.time():
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self._stats["misses"] += 1
+                return None
+            self._touch(key, entry)
+            self._stats["hits"] += 1
+            return entry[0]
+
+    def put(
+        self,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        cost: float = 1.0,
+        size: Optional[int] = None,
+    ):
+        """
+        Guardar un valor
+
+        Args:
+            key: Clave de la entrada
+            value: Valor decodificado (tratarlo como de solo lectura)
+            ttl: Segundos de validez (None = sin caducidad)
+            cost: Coste de volver a obtenerlo (ej: segundos de la petición)
+            size: Bytes que ocupa (por defecto se estima)
+        """
+        if size is None:
+            size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        expires_at = time.time() + ttl if ttl is not None else None
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            entry = [value, size, expires_at, max(cost, 1e-6), 0.0]
+            self._entries[key] = entry
+            self._bytes += size
+            self._touch(key, entry)
+            self._stats["stored"] += 1
+            self._evict()
+
+    def _touch(self, key: str, entry: list):
+        """Renovar la prioridad de una entrada; requiere el lock"""
+        entry[4] = self._clock + entry[3] / max(entry[1], 1)
+        heapq.heappush(self._heap, (entry[4], next(self._counter), key))
+        # Compactar el montículo si acumula demasiadas prioridades obsoletas
+        if len(self._heap) > 4 * len(self._entries) + 64:
+            self._heap = [
+                (e[4], next(self._counter), k) for k, e in self._entries.items()
+            ]
+            heapq.heapify(self._heap)
+
+    def _remove(self, key: str):
+        entry = self._entries.pop(key)
+        self._bytes -= entry[1]
+
+    def _evict(self):
+        """Expulsar las entradas de menor prioridad hasta cumplir el presupuesto"""
+        while self._bytes > self.max_bytes and self._heap:
+            priority, _, key = heapq.heappop(self._heap)
+            entry = self._entries.get(key)
+            if entry is None or entry[4] != priority:
+                continue  # Prioridad obsoleta
+            self._clock = priority
+            self._remove(key)
+            self._stats["evicted"] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener aciertos, fallos, entradas guardadas, expulsadas y bytes"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["bytes"] = self._bytes
+        return stats
+
+
+class TieredCache:
+    """
+    Caché de dos niveles: L1 en memoria (valores decodificados) sobre L2 en
+    disco compartido (cuerpos en bytes)
+
+    Un acierto en L2 se decodifica y se promociona a L1 con el coste medido
+    de leerlo del disco. Si decode lanza ValueError el cuerpo se borra de L2
+    y cuenta como fallo.
+    """
+
+    def __init__(
+        self,
+        l1: MemoryCache,
+        l2: Optional[SharedCache],
+        decode: Callable[[bytes], Any],
+    ):
+        """
+        Args:
+            l1: Caché en memoria
+            l2: Caché compartida en disco (None = solo memoria)
+            decode: Función que convierte un cuerpo de L2 en su valor (lanza
+                ValueError si el cuerpo no es válido)
+        """
+        self.l1 = l1
+        self.l2 = l2
+        self.decode = decode
+
+    def get(self, key: str) -> Optional[Any]:
+        """Buscar en L1 y después en L2, promocionando a L1"""
+        value = self.l1.get(key)
+        if value is not None or self.l2 is None:
+            return value
+
+        started = time.perf_counter()
+        entry = self.l2.get_entry(key)
+        if entry is None:
+            return None
+        content, ttl = entry
+        try:
+            value = self.decode(content)
+        except ValueError as e:
+            logger.warning(f"Cuerpo inválido en la caché compartida ({key}): {e}")
+            self.l2.delete(key)
+            return None
+        self.l1.put(key, value, ttl, cost=time.perf_counter() - started)
+        return value
+
+    def put(
+        self,
+        key: str,
+        value: Any,
+        content: bytes,
+        ttl: Optional[float] = None,
+        cost: float = 1.0,
+    ):
+        """
+        Guardar en ambos niveles
+
+        Args:
+            key: Clave canónica de la petición
+            value: Valor decodificado (para L1)
+            content: Cuerpo en bytes (para L2)
+            ttl: Segundos de validez (None = sin caducidad)
+            cost: Coste de volver a obtenerlo (segundos de la petición)
+        """
+        self.l1.put(key, value, ttl, cost)
+        if self.l2 is not None:
+            self.l2.put(key, content, ttl)
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """Estadísticas por nivel"""
+        return {
+            "l1": self.l1.get_stats(),
+            "l2": self.l2.get_stats() if self.l2 is not None else {},
+        }
+
+
+class StaleWhileRevalidate:
+    """
+    Caché en memoria que sirve resultados obsoletos mientras se revalidan
+
+    Un resultado con edad <= max_age se devuelve tal cual. Si es más antiguo
+    pero no supera max_age + stale, también se devuelve al momento y se
+    lanza un refresco en segundo plano (uno solo por clave aunque lleguen
+    muchas lecturas). Sin entrada, o demasiado antigua, se carga en la misma
+    llamada; las cargas simultáneas de una clave comparten la petición.
+    """
+
+    def __init__(
+        self,
+        max_age: float = 60,
+        stale: float = 600,
+        max_entries: int = 1024,
+        max_workers: int = 4,
+    ):
+        """
+        Args:
+            max_age: Segundos en que un resultado se sirve sin revalidar
+            stale: Segundos adicionales en que se sirve mientras se refresca
+            max_entries: Número máximo de resultados guardados (LRU)
+            max_workers: Hilos para los refrescos en segundo plano
+        """
+        self.max_age = max_age
+        self.stale = stale
+        self.max_entries = max_entries
+        self.max_workers = max_workers
+        self._entries: "OrderedDict[Any, Tuple[Any, float]]" = OrderedDict()
+        self._refreshing = set()
+        self._single_flight = SingleFlight()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {
+            "fresh": 0,
+            "stale": 0,
+            "misses": 0,
+            "refreshes": 0,
+            "deduplicated": 0,
+            "refresh_errors": 0,
+        }
+
+    def close(self):
+        """Detener el pool de refrescos (los que estén en curso terminan)"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    def get(self, key: Any, loader: Callable[[], Any]) -> Any:
+        """
+        Obtener un resultado, cargándolo o revalidándolo según su edad
+
+        Args:
+            key: Clave hashable del resultado
+            loader: Función sin argumentos que obtiene el valor actual
+
+        Returns:
+            Valor guardado o recién cargado (tratarlo como de solo lectura)
+
+        Raises:
+            Exception: Los errores de `loader` cuando no hay valor servible
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                age = time.monotonic() - entry[1]
+                if age <= self.max_age:
+                    self._stats["fresh"] += 1
+                    return entry[0]
+                if age <= self.max_age + self.stale:
+                    self._stats["stale"] += 1
+                    self._revalidate(key, loader)
+                    return entry[0]
+            self._stats["misses"] += 1
+
+        return self._single_flight.do(key, lambda: self._load(key, loader))
+
+    def invalidate(self, key: Any = None):
+        """Descartar un resultado (o todos si key es None)"""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _load(self, key: Any, loader: Callable[[], Any]) -> Any:
+        value = loader()
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return value
+
+    def _revalidate(self, key: Any, loader: Callable[[], Any]):
+        """Programar un refresco si no hay otro en curso; requiere el lock"""
+        if key in self._refreshing:
+            self._stats["deduplicated"] += 1
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=max(1, self.max_workers),
+                thread_name_prefix="aquadapt-swr",
+            )
+        self._refreshing.add(key)
+        self._stats["refreshes"] += 1
+        self._executor.submit(self._refresh, key, loader)
+
+    def _refresh(self, key: Any, loader: Callable[[], Any]):
+        try:
+            self._single_flight.do(key, lambda: self._load(key, loader))
+        except Exception as e:
+            logger.warning(f"Error al revalidar {key}: {e}. Se mantiene el valor")
+            with self._lock:
+                self._stats["refresh_errors"] += 1
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener lecturas frescas, obsoletas, fallos y refrescos en segundo plano"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["entries"] = len(self._entries)
+            stats["refreshing"] = len(self._refreshing)
+        return stats
@@ -0,0 +1,460 @@
+#!/usr/bin/env python3
+"""
+Catálogo de bombas de AquaAdvanced
+Caché de enlaces href por bomba para evitar consultar /physicalPumps/{id}/
+antes de cada petición de series temporales, instantánea compilada del
+archivo local de bombas para no reprocesar el JSON en cada arranque e índice
+de búsqueda por nombre, estación y grupo
+"""
+
+import hashlib
+import heapq
+import logging
+import os
+import pickle
+import re
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Se incrementa si cambia el formato de la instantánea
+SNAPSHOT_VERSION = 1
+
+# Nombres tipo 'EB3 G4': prefijo y número de estación, prefijo y número de grupo
+_NAME_PATTERN = re.compile(r"^\s*([A-Za-z]+)\s*(\d+)\W*([A-Za-z]+)\s*(\d+)\s*$")
+_NAME_TOKENS = re.compile(r"[A-Z]+|\d+")
+
+
+def extract_links(info: Dict) -> Dict[str, str]:
+    """
+    Extraer los enlaces href de la información de una bomba
+
+    Args:
+        info: Diccionario de la bomba tal y como lo devuelve la API
+
+    Returns:
+        Diccionario endpoint -> href (ej: {'status/detailed': 'https://...'})
+    """
+    return {
+        key: value["href"]
+        for key, value in info.items()
+        if isinstance(value, dict) and "href" in value
+    }
+
+
+class HrefCatalog:
+    """Caché de enlaces href por bomba con caducidad (TTL)"""
+
+    def __init__(self, ttl: float = 3600):
+        """
+        Args:
+            ttl: Segundos que una entrada se considera válida (0 = sin caducidad)
+        """
+        self.ttl = ttl
+        self._entries: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+    def _is_expired(self, stored_at: float) -> bool:
+        return bool(self.ttl) and time.monotonic() - stored_at > self.ttl
+
+    def update(self, bomba_id: str, info: Dict) -> Dict[str, str]:
+        """
+        Guardar los enlaces de una bomba
+
+        Args:
+            bomba_id: ID de la bomba
+            info: Información de la bomba con enlaces href
+
+        Returns:
+            Enlaces guardados
+        """
+        links = extract_links(info)
+        if links:
+            with self._lock:
+                self._entries[bomba_id] = (time.monotonic(), links)
+        return links
+
+    def seed(self, pumps: Iterable[Dict]) -> int:
+        """
+        Poblar el catálogo a partir de la lista de bombas
+
+        Args:
+            pumps: Lista de bombas (API o archivo local)
+
+        Returns:
+            Número de bombas con enlaces añadidas
+        """
+        count = 0
+        for pump in pumps:
+            if (
+                isinstance(pump, dict)
+                and pump.get("id")
+                and self.update(pump["id"], pump)
+            ):
+                count += 1
+        return count
+
+    def get_links(self, bomba_id: str) -> Optional[Dict[str, str]]:
+        """
+        Obtener los enlaces de una bomba si están en caché y vigentes
+
+        Args:
+            bomba_id: ID de la bomba
+
+        Returns:
+            Enlaces de la bomba o None si no están o han caducado
+        """
+        with self._lock:
+            entry = self._entries.get(bomba_id)
+            if entry is None:
+                return None
+            if self._is_expired(entry[0]):
+                del self._entries[bomba_id]
+                return None
+            return entry[1]
+
+    def get(self, bomba_id: str, endpoint_key: str) -> Optional[str]:
+        """Obtener el href de un endpoint concreto de una bomba"""
+        links = self.get_links(bomba_id)
+        return links.get(endpoint_key) if links else None
+
+    def invalidate(self, bomba_id: Optional[str] = None):
+        """
+        Invalidar los enlaces de una bomba o de todo el catálogo
+
+        Args:
+            bomba_id: ID de la bomba (None = invalidar todo)
+        """
+        with self._lock:
+            if bomba_id is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(bomba_id, None)
+
+
+def compile_catalog(pumps: Iterable[Dict]) -> Dict:
+    """
+    Compilar la lista de bombas en una representación compacta
+
+    Cada href se guarda como plantilla compartida (prefijo, sufijo) alrededor
+    del ID de la bomba, y las bombas con los mismos endpoints comparten la
+    misma tupla de enlaces, así que los 16 href por bomba se reducen a una
+    referencia.
+
+    Args:
+        pumps: Lista de bombas tal y como la devuelve la API
+
+    Returns:
+        Diccionario con 'templates' y 'pumps' (campos y enlaces por bomba)
+    """
+    templates: List[tuple] = []
+    template_index: Dict[tuple, int] = {}
+    link_sets: Dict[tuple, tuple] = {}
+    compiled = []
+    for pump in pumps:
+        pump_id = pump.get("id")
+        fields = {}
+        links = []
+        for key, value in pump.items():
+            href = value.get("href") if isinstance(value, dict) else None
+            if (
+                isinstance(href, str)
+                and len(value) == 1
+                and pump_id
+                and pump_id in href
+            ):
+                template = tuple(href.split(pump_id, 1))
+                if template not in template_index:
+                    template_index[template] = len(templates)
+                    templates.append(template)
+                links.append((key, template_index[template]))
+            else:
+                fields[key] = value
+        links = tuple(links)
+        compiled.append((fields, link_sets.setdefault(links, links)))
+    return {"templates": tuple(templates), "pumps": tuple(compiled)}
+
+
+def expand_catalog(compiled: Dict) -> List[Dict]:
+    """Reconstruir la lista de bombas a partir de compile_catalog()"""
+    templates = compiled["templates"]
+    pumps = []
+    for fields, links in compiled["pumps"]:
+        pump = dict(fields)
+        pump_id = pump.get("id", "")
+        for key, index in links:
+            prefix, suffix = templates[index]
+            pump[key] = {"href": prefix + pump_id + suffix}
+        pumps.append(pump)
+    return pumps
+
+
+def snapshot_path(file_path: str, directory: str = ".aquadapt_cache") -> str:
+    """Ruta de la instantánea compilada de un archivo de bombas"""
+    return os.path.join(directory, os.path.basename(file_path) + ".snapshot")
+
+
+def load_catalog_snapshot(
+    file_path: str, directory: str = ".aquadapt_cache"
+) -> Optional[List[Dict]]:
+    """
+    Cargar la instantánea compilada si corresponde al archivo actual
+
+    Si coinciden mtime y tamaño no se lee el JSON; si solo cambió el mtime
+    se compara el hash del contenido antes de descartarla.
+
+    Args:
+        file_path: Archivo JSON de bombas
+        directory: Directorio de las instantáneas
+
+    Returns:
+        Lista de bombas o None si no hay instantánea válida
+    """
+    try:
+        stat = os.stat(file_path)
+        with open(snapshot_path(file_path, directory), "rb") as f:
+            snapshot = pickle.load(f)
+        if snapshot.get("version") != SNAPSHOT_VERSION or snapshot.get(
+            "source"
+        ) != os.path.abspath(file_path):
+            return None
+        if (snapshot["mtime_ns"], snapshot["size"]) != (stat.st_mtime_ns, stat.st_size):
+            with open(file_path, "rb") as f:
+                content = f.read()
+            if hashlib.sha256(content).hexdigest() != snapshot["sha256"]:
+                return None
+            # Mismo contenido con otro mtime (ej: copia o checkout)
+            _write_snapshot(
+                file_path, directory, snapshot["sha256"], snapshot["catalog"]
+            )
+        return expand_catalog(snapshot["catalog"])
+    except Exception as e:
+        logger.debug(f"Instantánea de catálogo no disponible: {e}")
+        return None
+
+
+def save_catalog_snapshot(
+    file_path: str,
+    content: bytes,
+    pumps: List[Dict],
+    directory: str = ".aquadapt_cache",
+):
+    """
+    Guardar la instantánea compilada de un archivo de bombas
+
+    Args:
+        file_path: Archivo JSON de bombas
+        content: Contenido leído del archivo (para su hash)
+        pumps: Bombas extraídas del archivo
+        directory: Directorio de las instantáneas
+    """
+    try:
+        _write_snapshot(
+            file_path,
+            directory,
+            hashlib.sha256(content).hexdigest(),
+            compile_catalog(pumps),
+        )
+    except Exception as e:
+        logger.warning(f"No se pudo guardar la instantánea del catálogo: {e}")
+
+
+def _write_snapshot(file_path: str, directory: str, sha256: str, catalog: Dict):
+    """Escribir la instantánea de forma atómica con el mtime actual del archivo"""
+    stat = os.stat(file_path)
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "source": os.path.abspath(file_path),
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": sha256,
+        "catalog": catalog,
+    }
+    os.makedirs(directory, exist_ok=True)
+    path = snapshot_path(file_path, directory)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        pickle.dump(snapshot, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def normalize_pump_name(name: str) -> str:
+    """
+    Clave normalizada de un nombre de bomba para búsquedas exactas
+
+    Ignora mayúsculas, espacios, separadores y ceros a la izquierda
+    (ej: 'eb03 - g4' -> 'EB3G4').
+    """
+    tokens = _NAME_TOKENS.findall(name.upper())
+    return "".join(str(int(t)) if t.isdigit() else t for t in tokens)
+
+
+def parse_pump_name(name: str) -> Optional[Tuple[str, int]]:
+    """
+    Separar un nombre tipo 'EB3 G4' en estación y grupo
+
+    Returns:
+        Tupla (estación, grupo) (ej: ('EB3', 4)) o None si no sigue el patrón
+    """
+    match = _NAME_PATTERN.match(name or "")
+    if not match:
+        return None
+    prefix, station, group_prefix, group = match.groups()
+    return f"{prefix.upper()}{int(station)}", int(group)
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class PumpIndex:
+    """
+    Índice del catálogo de bombas por ID, nombre, estación y grupo
+
+    Búsqueda exacta O(1), consultas por prefijo con búsqueda binaria sobre
+    los nombres ordenados y búsqueda aproximada con un índice de trigramas,
+    de modo que el coste no crece con un recorrido lineal del catálogo.
+    """
+
+    def __init__(self, pumps: Iterable[Dict]):
+        """
+        Args:
+            pumps: Lista de bombas (API, archivo local o instantánea)
+        """
+        self.pumps: List[Dict] = [p for p in pumps if isinstance(p, dict)]
+        self._by_id: Dict[str, Dict] = {}
+        self._by_name: Dict[str, Dict] = {}
+        self._by_station: Dict[str, List[int]] = {}
+        self._names: List[Tuple[str, int]] = []  # (clave, nº de trigramas)
+        self._sorted: List[Tuple[str, int]] = []  # (clave, posición) ordenado
+        self._trigrams: Dict[str, List[int]] = {}
+
+        groups = []
+        for position, pump in enumerate(self.pumps):
+            if pump.get("id"):
+                self._by_id[pump["id"]] = pump
+            name = pump.get("name") or ""
+            key = normalize_pump_name(name)
+            trigrams = _trigrams(key) if key else set()
+            self._names.append((key, len(trigrams)))
+            parsed = parse_pump_name(name)
+            groups.append(parsed[1] if parsed else 0)
+            if not key:
+                continue
+            self._by_name.setdefault(key, pump)
+            self._sorted.append((key, position))
+            for trigram in trigrams:
+                self._trigrams.setdefault(trigram, []).append(position)
+            if parsed:
+                self._by_station.setdefault(parsed[0], []).append(position)
+
+        self._sorted.sort()
+        for positions in self._by_station.values():
+            positions.sort(key=lambda position: groups[position])
+
+    def __len__(self) -> int:
+        return len(self.pumps)
+
+    def get(self, id_or_name: str) -> Optional[Dict]:
+        """Buscar una bomba por ID o por nombre exacto (normalizado)"""
+        pump = self._by_id.get(id_or_name)
+        if pump is None:
+            pump = self._by_name.get(normalize_pump_name(id_or_name))
+        return pump
+
+    def stations(self) -> List[str]:
+        """Estaciones del catálogo en orden natural (EB0, EB1, ..., EB10)"""
+        return sorted(self._by_station, key=lambda s: (len(s), s))
+
+    def station(self, station: str) -> List[Dict]:
+        """Bombas de una estación ordenadas por grupo (ej: 'EB3')"""
+        positions = self._by_station.get(normalize_pump_name(station), [])
+        return [self.pumps[position] for position in positions]
+
+    def prefix(self, text: str) -> List[Dict]:
+        """Bombas cuyo nombre normalizado empieza por el texto dado"""
+        positions = self._prefix_positions(normalize_pump_name(text))
+        return [self.pumps[position] for position in positions]
+
+    def _prefix_positions(self, key: str) -> List[int]:
+        start = bisect_left(self._sorted, (key, -1))
+        positions = []
+        for name, position in self._sorted[start:]:
+            if not name.startswith(key):
+                break
+            positions.append(position)
+        return positions
+
+    def search(self, query: str, limit: int = 10) -> List[Tuple[Dict, float]]:
+        """
+        Búsqueda aproximada ordenada por relevancia
+
+        Puntúa por coincidencia de trigramas (coeficiente de Dice) con
+        bonificación para coincidencia exacta, de estación y de prefijo.
+
+        Args:
+            query: Texto a buscar (ej: 'eb3g4', 'EB 3', 'b25 g')
+            limit: Número máximo de resultados
+
+        Returns:
+            Lista de (bomba, puntuación) de mayor a menor puntuación
+        """
+        key = normalize_pump_name(query)
+        if not key:
+            return []
+        query_trigrams = _trigrams(key)
+
+        shared: Dict[int, int] = {}
+        for trigram in query_trigrams:
+            for position in self._trigrams.get(trigram, ()):
+                shared[position] = shared.get(position, 0) + 1
+
+        bonus = dict.fromkeys(self._prefix_positions(key), 1)
+        bonus.update(dict.fromkeys(self._by_station.get(key, ()), 2))
+        exact = self._by_name.get(key)
+        for position in bonus:
+            shared.setdefault(position, 0)
+
+        scored = []
+        for position, common in shared.items():
+            name_key, size = self._names[position]
+            score = 2 * common / (len(query_trigrams) + size)
+            if self.pumps[position] is exact:
+                score += 3
+            else:
+                score += bonus.get(position, 0)
+            scored.append((-score, len(name_key), name_key, position))
+
+        best = heapq.nsmallest(limit, scored)
+        return [
+            (self.pumps[position], round(-score, 3)) for score, _, _, position in best
+        ]
+
+    def select(self, patterns: Iterable[str]) -> List[Dict]:
+        """
+        Seleccionar bombas por una lista de patrones (ej: FILTER_BY_NAME)
+
+        Cada patrón se resuelve como ID o nombre exacto, estación ('EB3') o,
+        en su defecto, prefijo del nombre. El resultado conserva el orden del
+        catálogo y no repite bombas. Un único patrón como cadena equivale a
+        una lista de un elemento.
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+        selected = set()
+        for pattern in patterns:
+            pump = self.get(pattern)
+            if pump is not None:
+                selected.add(id(pump))
+                continue
+            matches = self.station(pattern) or self.prefix(pattern)
+            selected.update(id(p) for p in matches)
+        return [p for p in self.pumps if id(p) in selected]
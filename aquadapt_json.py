@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Decodificación JSON para las respuestas de AquaAdvanced
+Usa el backend más rápido instalado (orjson, simdjson, ujson) y recurre a la
+librería estándar si no hay ninguno. El BOM UTF-8 se salta sin copiar el
+cuerpo cuando el backend acepta memoryview. Incluye un parser incremental
+para arrays grandes recibidos en streaming.
+"""
+
+import codecs
+import json
+import logging
+import re
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+BOM = b"\xef\xbb\xbf"
+
+# Cuerpo vacío: solo BOM y/o espacios (se comprueba sin copiar el contenido)
+_EMPTY_BODY = re.compile(rb"(?:\xef\xbb\xbf)?\s*")
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Orden de preferencia en modo "auto"
+BACKENDS = ("orjson", "simdjson", "ujson", "json")
+
+
+def _load_backend(name: str) -> Optional[Callable[[Any], Any]]:
+    """Importar un backend y devolver su función loads, o None si no existe"""
+    try:
+        if name == "orjson":
+            import orjson
+
+            return orjson.loads
+        if name == "simdjson":
+            import simdjson
+
+            return simdjson.loads
+        if name == "ujson":
+            import ujson
+
+            return ujson.loads
+    except ImportError:
+        return None
+    if name == "json":
+        return json.loads
+    raise ValueError(f"Backend JSON desconocido: {name}")
+
+
+def available_backends() -> list:
+    """Obtener los backends instalados, en orden de preferencia"""
+    return [name for name in BACKENDS if _load_backend(name) is not None]
+
+
+def is_empty_body(content: bytes) -> bool:
+    """Indicar si un cuerpo solo contiene BOM y/o espacios"""
+    return _EMPTY_BODY.fullmatch(content) is not None
+
+
+class JsonDecoder:
+    """Decodificador JSON con backend intercambiable"""
+
+    def __init__(self, backend: str = "auto"):
+        """
+        Args:
+            backend: 'auto' o uno de BACKENDS
+        """
+        candidates = BACKENDS if backend == "auto" else (backend,)
+        for name in candidates:
+            loads = _load_backend(name)
+            if loads is not None:
+                self.name = name
+                self._loads = loads
+                break
+        else:
+            logger.warning(f"Backend JSON {backend} no instalado, usando json")
+            self.name = "json"
+            self._loads = json.loads
+
+    def loads(self, content: bytes) -> Any:
+        """
+        Decodificar un cuerpo JSON en bytes, con o sin BOM UTF-8
+
+        Args:
+            content: Cuerpo de la respuesta
+
+        Returns:
+            Datos decodificados
+
+        Raises:
+            ValueError: JSON inválido (json.JSONDecodeError es subclase)
+        """
+        if self.name == "json":
+            # json.loads detecta el BOM en bytes y decodifica una sola vez
+            return self._loads(content)
+        if content.startswith(BOM):
+            if self.name == "orjson":
+                return self._loads(memoryview(content)[3:])
+            content = content[3:]
+        return self._loads(content)
+
+
+_default_decoder: Optional[JsonDecoder] = None
+
+
+def get_decoder() -> JsonDecoder:
+    """Obtener el decodificador por defecto según config.JSON_BACKEND"""
+    global _default_decoder
+    if _default_decoder is None:
+        try:
+            import config
+
+            backend = getattr(config, "JSON_BACKEND", "auto")
+        except ImportError:
+            backend = "auto"
+        _default_decoder = JsonDecoder(backend)
+        logger.debug(f"Backend JSON: {_default_decoder.name}")
+    return _default_decoder
+
+
+def loads(content: bytes) -> Any:
+    """Decodificar un cuerpo JSON con el decodificador por defecto"""
+    return get_decoder().loads(content)
+
+
+def iter_json_array(chunks: Iterable[bytes]) -> Iterator[Any]:
+    """
+    Decodificar de forma incremental un array JSON recibido por trozos
+
+    Produce cada elemento en cuanto está completo, por lo que la memoria
+    ocupada se limita a un elemento más un trozo. Mantiene la semántica de
+    decode_api_content: el BOM UTF-8 se ignora, un cuerpo vacío no produce
+    elementos y un JSON inválido se registra y termina la iteración. Si el
+    cuerpo no es un array se produce el valor completo una sola vez.
+
+    Args:
+        chunks: Trozos del cuerpo en bytes (ej: response.iter_content())
+
+    Yields:
+        Elementos del array
+    """
+    text_decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    scanner = json.JSONDecoder()
+    buffer = ""
+    pos = 0
+    state = "start"  # start -> item <-> separator -> done | whole
+
+    def parse(final: bool) -> Iterator[Any]:
+        nonlocal pos, state
+        while True:
+            if state == "whole":
+                return
+            match = _WHITESPACE.match(buffer, pos)
+            pos = match.end()
+            if pos >= len(buffer):
+                return
+
+            if state == "start":
+                if buffer[pos] != "[":
+                    state = "whole"
+                    return
+                pos += 1
+                state = "item"
+            elif state == "item":
+                if buffer[pos] == "]":
+                    pos += 1
+                    state = "done"
+                    continue
+                try:
+                    item, end = scanner.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if final:
+                        raise
+                    return  # Elemento incompleto: esperar más datos
+                if not final and (end >= len(buffer) or buffer[end] not in " \t\n\r,]"):
+                    return  # Un número podría continuar en el siguiente trozo
+                pos = end
+                state = "separator"
+                yield item
+            elif state == "separator":
+                if buffer[pos] == ",":
+                    pos += 1
+                    state = "item"
+                elif buffer[pos] == "]":
+                    pos += 1
+                    state = "done"
+                else:
+                    raise json.JSONDecodeError("Se esperaba ',' o ']'", buffer, pos)
+            else:  # done
+                raise json.JSONDecodeError("Datos extra tras el array", buffer, pos)
+
+    try:
+        for chunk in chunks:
+            if not chunk:
+                continue
+            buffer += text_decoder.decode(chunk)
+            yield from parse(final=False)
+            if state != "whole":
+                # Descartar lo ya consumido para mantener el buffer acotado
+                buffer = buffer[pos:]
+                pos = 0
+
+        buffer += text_decoder.decode(b"", final=True)
+        if state == "whole":
+            yield json.loads(buffer)
+            return
+        yield from parse(final=True)
+        if state in ("item", "separator"):
+            raise json.JSONDecodeError("Array sin cerrar", buffer, pos)
+        if state == "start":
+            logger.info(
+                "Respuesta vacía. Puede que no haya datos para el rango especificado."
+            )
+    except ValueError as e:
+        logger.warning(f"Error al decodificar JSON en streaming: {e}")
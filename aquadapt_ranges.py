@@ -0,0 +1,458 @@
+#!/usr/bin/env python3
+"""
+Rangos temporales para las series de AquaAdvanced
+División de rangos largos en ventanas alineadas a la cadencia de los datos,
+tamaño de ventana adaptativo, fusión ordenada de los resultados, caché por
+rangos cubiertos y caché de rangos vacíos.
+"""
+
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def parse_time(value: str) -> datetime:
+    """
+    Convertir una fecha ISO8601 (con o sin Z) en datetime UTC sin zona
+
+    Args:
+        value: Fecha ISO (ej: '2025-10-22T00:00:00Z')
+
+    Returns:
+        Fecha sin tzinfo, en UTC
+    """
+    if value.endswith("Z"):
+        value = value[:-1]
+    dt = datetime.fromisoformat(value)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def format_time(dt: datetime) -> str:
+    """Formatear una fecha UTC como la devuelve la API (ej: '...T15:00:00Z')"""
+    return dt.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def to_epoch(dt: datetime) -> int:
+    """Convertir una fecha UTC sin zona en segundos desde 1970"""
+    return (dt - EPOCH) // timedelta(seconds=1)
+
+
+def from_epoch(seconds: int) -> datetime:
+    """Convertir segundos desde 1970 en fecha UTC sin zona"""
+    return EPOCH + timedelta(seconds=seconds)
+
+
+def align_down(dt: datetime, cadence: timedelta) -> datetime:
+    """Redondear una fecha hacia abajo a un múltiplo de la cadencia"""
+    return dt - (dt - EPOCH) % cadence
+
+
+def split_range(
+    start: datetime, end: datetime, window: timedelta, cadence: timedelta
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Dividir [start, end] en ventanas consecutivas alineadas a la cadencia
+
+    Las ventanas comparten los extremos, así que los puntos que caen justo en
+    una frontera pueden llegar dos veces (merge_series los elimina).
+
+    Args:
+        start: Inicio del rango
+        end: Fin del rango
+        window: Duración deseada de cada ventana
+        cadence: Intervalo entre puntos de la serie
+
+    Returns:
+        Lista de pares (inicio, fin)
+    """
+    if end <= start:
+        return [(start, end)]
+
+    # Ventana múltiplo de la cadencia, nunca menor que un intervalo
+    steps = max(1, int(window / cadence))
+    window = cadence * steps
+
+    windows = []
+    current = start
+    boundary = align_down(start, cadence) + window
+    while boundary < end:
+        windows.append((current, boundary))
+        current = boundary
+        boundary += window
+    windows.append((current, end))
+    return windows
+
+
+def merge_series(chunks: Iterable[Any]) -> List[Dict]:
+    """
+    Fusionar los puntos de varias ventanas en orden temporal sin duplicados
+
+    Args:
+        chunks: Resultados de cada ventana (las que no son listas se ignoran)
+
+    Returns:
+        Puntos ordenados por 'time', uno por instante
+    """
+    by_time = {}
+    untimed = []
+    for chunk in chunks:
+        if not isinstance(chunk, list):
+            continue
+        for point in chunk:
+            if isinstance(point, dict) and "time" in point:
+                by_time[point["time"]] = point
+            else:
+                untimed.append(point)
+    return [by_time[t] for t in sorted(by_time)] + untimed
+
+
+def latest_point(points: Any) -> Optional[Dict]:
+    """Obtener el punto más reciente de una serie (None si no hay ninguno)"""
+    if not isinstance(points, list):
+        return None
+    timed = [p for p in points if isinstance(p, dict) and "time" in p]
+    return max(timed, key=lambda p: parse_time(p["time"]), default=None)
+
+
+class WindowSizer:
+    """
+    Tamaño de ventana adaptativo por endpoint según la densidad observada
+
+    Mantiene una media móvil de puntos por segundo y elige la ventana que
+    contiene aproximadamente `target_points` puntos.
+    """
+
+    def __init__(
+        self,
+        initial: timedelta,
+        minimum: timedelta,
+        maximum: timedelta,
+        target_points: int = 2000,
+        smoothing: float = 0.3,
+    ):
+        """
+        Args:
+            initial: Ventana usada mientras no hay observaciones
+            minimum: Ventana mínima
+            maximum: Ventana máxima
+            target_points: Puntos deseados por ventana
+            smoothing: Peso de cada nueva observación en la media móvil
+        """
+        self.initial = initial
+        self.minimum = minimum
+        self.maximum = maximum
+        self.target_points = target_points
+        self.smoothing = smoothing
+        self._density: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def window(self, key: str) -> timedelta:
+        """Obtener la ventana recomendada para un endpoint"""
+        with self._lock:
+            density = self._density.get(key)
+        if not density:
+            return self.initial
+        seconds = self.target_points / density
+        return min(self.maximum, max(self.minimum, timedelta(seconds=seconds)))
+
+    def observe(self, key: str, points: int, duration: timedelta):
+        """
+        Registrar los puntos recibidos para una ventana
+
+        Args:
+            key: Endpoint (ej: 'rawpower/detailed')
+            points: Puntos devueltos
+            duration: Duración de la ventana pedida
+        """
+        seconds = duration.total_seconds()
+        if seconds <= 0 or points <= 0:
+            return
+        density = points / seconds
+        with self._lock:
+            previous = self._density.get(key)
+            self._density[key] = (
+                density
+                if previous is None
+                else previous + self.smoothing * (density - previous)
+            )
+
+
+def merge_intervals(
+    intervals: Iterable[Tuple[datetime, datetime]],
+) -> List[Tuple[datetime, datetime]]:
+    """Unir intervalos cerrados que se solapan o se tocan"""
+    merged: List[Tuple[datetime, datetime]] = []
+    for start, end in sorted(intervals):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
+
+
+def subtract_intervals(
+    start: datetime, end: datetime, covered: List[Tuple[datetime, datetime]]
+) -> List[Tuple[datetime, datetime]]:
+    """
+    Calcular los huecos de [start, end] no cubiertos por `covered`
+
+    Los huecos comparten el extremo con el intervalo cubierto vecino, de modo
+    que el punto de la frontera se vuelve a pedir (y se deduplica al guardar).
+
+    Args:
+        start: Inicio del rango pedido
+        end: Fin del rango pedido
+        covered: Intervalos cubiertos, ordenados y sin solapes
+
+    Returns:
+        Huecos (inicio, fin) en orden
+    """
+    gaps = []
+    current = start
+    for covered_start, covered_end in covered:
+        if covered_end < current:
+            continue
+        if covered_start > end:
+            break
+        if covered_start > current:
+            gaps.append((current, covered_start))
+        current = max(current, covered_end)
+        if current >= end:
+            break
+    if current < end:
+        gaps.append((current, end))
+    return gaps
+
+
+class RangeCache:
+    """
+    Caché de series por rangos cubiertos
+
+    Para cada serie (bomba, endpoint) guarda los puntos recibidos y los
+    intervalos ya consultados; una petición nueva solo necesita los huecos.
+    La parte más reciente no se marca como cubierta porque el servidor aún
+    puede completar esos datos.
+    """
+
+    def __init__(self, recent_lag: timedelta = timedelta(hours=1), max_series=512):
+        """
+        Args:
+            recent_lag: Margen desde ahora que nunca se considera cubierto
+            max_series: Series máximas en memoria (LRU)
+        """
+        self.recent_lag = recent_lag
+        self.max_series = max_series
+        self._series: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "partial": 0, "misses": 0}
+
+    def _entry(self, key: Tuple) -> Dict:
+        entry = self._series.get(key)
+        if entry is None:
+            entry = self._series[key] = {"covered": [], "points": {}, "order": None}
+            while len(self._series) > self.max_series:
+                self._series.popitem(last=False)
+        self._series.move_to_end(key)
+        return entry
+
+    def gaps(
+        self, key: Tuple, start: datetime, end: datetime
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Obtener los huecos de [start, end] que hay que pedir al servidor
+
+        Args:
+            key: Clave de la serie (bomba_id, endpoint_key)
+            start: Inicio del rango
+            end: Fin del rango
+
+        Returns:
+            Huecos (inicio, fin); lista vacía si todo está en caché
+        """
+        with self._lock:
+            entry = self._series.get(key)
+            covered = list(entry["covered"]) if entry else []
+            gaps = subtract_intervals(start, end, covered)
+            if not gaps:
+                self._stats["hits"] += 1
+            elif gaps == [(start, end)]:
+                self._stats["misses"] += 1
+            else:
+                self._stats["partial"] += 1
+            return gaps
+
+    def store(self, key: Tuple, start: datetime, end: datetime, points: List[Dict]):
+        """
+        Guardar los puntos de un rango consultado
+
+        Args:
+            key: Clave de la serie
+            start: Inicio del rango consultado
+            end: Fin del rango consultado
+            points: Puntos devueltos por la API
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        covered_end = min(end, now - self.recent_lag)
+        with self._lock:
+            entry = self._entry(key)
+            for point in points:
+                if isinstance(point, dict) and "time" in point:
+                    entry["points"][point["time"]] = point
+            entry["order"] = None
+            if covered_end > start:
+                entry["covered"] = merge_intervals(
+                    entry["covered"] + [(start, covered_end)]
+                )
+
+    def get(
+        self,
+        key: Tuple,
+        start: datetime,
+        end: datetime,
+        cadence: Optional[timedelta] = None,
+    ) -> List[Dict]:
+        """
+        Obtener los puntos guardados en [start, end], ordenados por tiempo
+
+        Args:
+            key: Clave de la serie
+            start: Inicio del rango
+            end: Fin del rango
+            cadence: Intervalo fijo entre puntos de la serie, si lo tiene; el
+                límite inferior se alinea hacia abajo porque el servidor
+                devuelve también el punto del intervalo que contiene start
+        """
+        if cadence:
+            start = align_down(start, cadence)
+        low, high = format_time(start), format_time(end)
+        with self._lock:
+            entry = self._series.get(key)
+            if entry is None:
+                return []
+            self._series.move_to_end(key)
+            if entry["order"] is None:
+                entry["order"] = sorted(entry["points"])
+            order = entry["order"]
+            first = bisect_left(order, low)
+            last = bisect_right(order, high)
+            return [entry["points"][t] for t in order[first:last]]
+
+    def invalidate(self, key: Optional[Tuple] = None):
+        """Olvidar una serie o toda la caché"""
+        with self._lock:
+            if key is None:
+                self._series.clear()
+            else:
+                self._series.pop(key, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener aciertos completos, parciales, fallos y tamaño"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["series"] = len(self._series)
+            stats["points"] = sum(len(e["points"]) for e in self._series.values())
+            return stats
+
+
+class NegativeCache:
+    """
+    Rangos que la API devolvió vacíos, para no volver a pedirlos
+
+    Los rangos antiguos (terminados hace más de `permanent_after`) se guardan
+    de forma permanente; los recientes caducan tras `ttl` porque el servidor
+    aún puede recibir datos para ellos. Como mucho se recuerdan `max_series`
+    series de cada tipo (LRU) y los recientes caducados se descartan al
+    registrar uno nuevo.
+    """
+
+    def __init__(
+        self,
+        ttl: timedelta = timedelta(minutes=15),
+        permanent_after: timedelta = timedelta(days=7),
+        max_series: int = 512,
+    ):
+        """
+        Args:
+            ttl: Validez de un rango vacío reciente
+            permanent_after: Antigüedad a partir de la cual un vacío es permanente
+            max_series: Series máximas en memoria por tipo (LRU)
+        """
+        self.ttl = ttl
+        self.permanent_after = permanent_after
+        self.max_series = max_series
+        # clave -> [(inicio, fin)] y clave -> [(inicio, fin, caduca)]
+        self._permanent: "OrderedDict[Tuple, List[Tuple]]" = OrderedDict()
+        self._temporary: "OrderedDict[Tuple, List[Tuple]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"skipped": 0, "recorded": 0}
+
+    def record(self, key: Tuple, start: datetime, end: datetime):
+        """
+        Registrar que [start, end] no tiene datos para una serie
+
+        Args:
+            key: Clave de la serie (bomba_id, endpoint_key)
+            start: Inicio del rango vacío
+            end: Fin del rango vacío
+        """
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        with self._lock:
+            self._stats["recorded"] += 1
+            if end < now - self.permanent_after:
+                series = self._permanent
+                series[key] = merge_intervals(series.get(key, []) + [(start, end)])
+            else:
+                series = self._temporary
+                current = time.monotonic()
+                for known in list(series):
+                    entries = [e for e in series[known] if e[2] > current]
+                    if entries:
+                        series[known] = entries
+                    else:
+                        del series[known]
+                expires = current + self.ttl.total_seconds()
+                series[key] = series.get(key, []) + [(start, end, expires)]
+            series.move_to_end(key)
+            while len(series) > self.max_series:
+                series.popitem(last=False)
+
+    def is_empty(self, key: Tuple, start: datetime, end: datetime) -> bool:
+        """Indicar si [start, end] está dentro de un rango vacío conocido"""
+        with self._lock:
+            for known_start, known_end in self._permanent.get(key, []):
+                if known_start <= start and end <= known_end:
+                    self._permanent.move_to_end(key)
+                    self._stats["skipped"] += 1
+                    return True
+            now = time.monotonic()
+            for known_start, known_end, expires in self._temporary.get(key, []):
+                if expires > now and known_start <= start and end <= known_end:
+                    self._temporary.move_to_end(key)
+                    self._stats["skipped"] += 1
+                    return True
+            return False
+
+    def invalidate(self, key: Optional[Tuple] = None):
+        """Olvidar los rangos vacíos de una serie o de todas"""
+        with self._lock:
+            if key is None:
+                self._permanent.clear()
+                self._temporary.clear()
+            else:
+                self._permanent.pop(key, None)
+                self._temporary.pop(key, None)
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener peticiones evitadas y rangos vacíos registrados"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["permanent_series"] = len(self._permanent)
+            stats["temporary_series"] = len(self._temporary)
+            return stats
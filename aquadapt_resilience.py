@@ -0,0 +1,584 @@
+#!/usr/bin/env python3
+"""
+Resiliencia de peticiones para el cliente AquaAdvanced
+Política de reintentos con backoff exponencial, jitter y Retry-After, y
+control adaptativo (AIMD) del número de peticiones simultáneas y circuit
+breaker por familia de endpoint y agrupación de peticiones idénticas
+"""
+
+import asyncio
+import random
+import re
+import threading
+import time
+from collections import OrderedDict, deque
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Awaitable, Callable, Dict, Mapping, Optional, Tuple
+from urllib.parse import urlsplit
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Interpretar la cabecera Retry-After
+
+    Args:
+        value: Valor de la cabecera (segundos o fecha HTTP)
+
+    Returns:
+        Segundos de espera o None si no se puede interpretar
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max((when - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class RetryPolicy:
+    """Política de reintentos compartida por todas las peticiones del cliente"""
+
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+    RETRY_AFTER_STATUSES = (429, 503)
+
+    def __init__(
+        self,
+        max_attempts: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        budget: float = 60.0,
+    ):
+        """
+        Args:
+            max_attempts: Intentos máximos por llamada (incluye el primero)
+            backoff_base: Espera base en segundos del backoff exponencial
+            backoff_max: Espera máxima entre intentos
+            budget: Tiempo total máximo por llamada, esperas incluidas
+        """
+        self.max_attempts = max(1, max_attempts)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.budget = budget
+
+        self._lock = threading.Lock()
+        self._stats = {
+            "calls": 0,
+            "retries": 0,
+            "retry_after_honoured": 0,
+            "successes_after_retry": 0,
+            "giveups": 0,
+        }
+
+    def is_retryable_status(self, status: int) -> bool:
+        """Indicar si un código HTTP justifica reintentar"""
+        return status in self.RETRY_STATUSES
+
+    def backoff(self, attempt: int) -> float:
+        """
+        Espera exponencial con jitter completo para un intento
+
+        Args:
+            attempt: Número de intento fallido (0 = primero)
+
+        Returns:
+            Segundos de espera aleatorios en [0, min(max, base * 2^attempt)]
+        """
+        return random.uniform(
+            0, min(self.backoff_max, self.backoff_base * (2**attempt))
+        )
+
+    def next_delay(
+        self,
+        attempt: int,
+        started: float,
+        status: Optional[int] = None,
+        headers: Optional[Mapping[str, str]] = None,
+    ) -> Optional[float]:
+        """
+        Calcular la espera antes del siguiente intento
+
+        Args:
+            attempt: Número de intento fallido (0 = primero)
+            started: Instante (time.monotonic) en que empezó la llamada
+            status: Código HTTP de la respuesta fallida, si la hubo
+            headers: Cabeceras de la respuesta fallida, si la hubo
+
+        Returns:
+            Segundos de espera o None si no quedan intentos o presupuesto
+        """
+        if attempt + 1 >= self.max_attempts:
+            self._record("giveups")
+            return None
+
+        delay = None
+        if status in self.RETRY_AFTER_STATUSES and headers is not None:
+            delay = parse_retry_after(headers.get("Retry-After"))
+        honoured = delay is not None
+        if delay is None:
+            delay = self.backoff(attempt)
+
+        if self.budget and time.monotonic() - started + delay > self.budget:
+            self._record("giveups")
+            return None
+
+        self._record("retries")
+        if honoured:
+            self._record("retry_after_honoured")
+        return delay
+
+    def record_call(self, attempts: int):
+        """Registrar una llamada terminada con éxito tras `attempts` intentos"""
+        with self._lock:
+            self._stats["calls"] += 1
+            if attempts > 1:
+                self._stats["successes_after_retry"] += 1
+
+    def _record(self, key: str):
+        with self._lock:
+            self._stats[key] += 1
+            if key == "giveups":
+                self._stats["calls"] += 1
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener estadísticas de reintentos"""
+        with self._lock:
+            return dict(self._stats)
+
+
+class _LimiterSlot:
+    """Hueco de concurrencia adquirido; mide latencia y resultado al salir"""
+
+    __slots__ = ("_limiter", "started", "overloaded")
+
+    def __init__(self, limiter: "AdaptiveConcurrencyLimiter"):
+        self._limiter = limiter
+        self.started = 0.0
+        self.overloaded = False
+
+    def __enter__(self) -> "_LimiterSlot":
+        self._limiter.acquire()
+        self.started = time.monotonic()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        # Cualquier excepción dentro del hueco (timeout, conexión) es sobrecarga
+        self._limiter.release(self.started, self.overloaded or exc_type is not None)
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    Límite de peticiones simultáneas con control AIMD
+
+    Aumenta el límite en uno por cada ventana de peticiones sanas (p95 de
+    latencia y tasa de error por debajo del objetivo) y lo reduce de forma
+    multiplicativa ante respuestas 5xx o timeouts, como mucho una vez por
+    ventana de latencia (el mayor entre el p95 y latency_target).
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        latency_target: float = 2.0,
+        error_threshold: float = 0.05,
+        decrease_factor: float = 0.5,
+        window: int = 50,
+    ):
+        """
+        Args:
+            initial: Límite inicial de peticiones simultáneas
+            min_limit: Límite mínimo
+            max_limit: Límite máximo
+            latency_target: p95 de latencia (segundos) considerado sano
+            error_threshold: Tasa de errores 5xx/timeouts considerada sana
+            decrease_factor: Factor multiplicativo de reducción
+            window: Número de muestras recientes para p95 y tasa de error
+        """
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.latency_target = latency_target
+        self.error_threshold = error_threshold
+        self.decrease_factor = decrease_factor
+
+        self._limit = float(min(max(initial, self.min_limit), self.max_limit))
+        self._in_flight = 0
+        self._latencies = deque(maxlen=window)
+        self._failures = deque(maxlen=window)
+        self._healthy_since_change = 0
+        self._last_decrease = float("-inf")
+        self._stats = {"increases": 0, "decreases": 0, "waits": 0}
+        self._condition = threading.Condition()
+
+    @property
+    def limit(self) -> int:
+        """Límite actual de peticiones simultáneas"""
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        """Peticiones en curso"""
+        return self._in_flight
+
+    def slot(self) -> _LimiterSlot:
+        """Adquirir un hueco como context manager"""
+        return _LimiterSlot(self)
+
+    def acquire(self):
+        """Esperar hasta que haya hueco bajo el límite actual"""
+        with self._condition:
+            if self._in_flight >= self.limit:
+                self._stats["waits"] += 1
+            while self._in_flight >= self.limit:
+                self._condition.wait()
+            self._in_flight += 1
+
+    def release(self, started: float, overloaded: bool = False):
+        """
+        Liberar un hueco y ajustar el límite
+
+        Args:
+            started: Instante (time.monotonic) en que empezó la petición
+            overloaded: Si la petición acabó en 5xx o timeout
+        """
+        with self._condition:
+            self._in_flight -= 1
+            self._latencies.append(time.monotonic() - started)
+            self._failures.append(overloaded)
+
+            if overloaded:
+                # Una sola reducción por ráfaga: ignorar los fallos de
+                # peticiones lanzadas antes de la última reducción, los que
+                # llegan dentro de la misma ventana de latencia (reintentos
+                # seguidos de una llamada) y los aislados entre respuestas
+                # sanas (sondas de un circuito semiabierto)
+                now = time.monotonic()
+                window = max(self._p95(), self.latency_target)
+                error_rate = sum(self._failures) / len(self._failures)
+                if (
+                    started >= self._last_decrease
+                    and now - self._last_decrease >= window
+                    and error_rate > self.error_threshold
+                ):
+                    self._limit = max(
+                        float(self.min_limit), self._limit * self.decrease_factor
+                    )
+                    self._last_decrease = now
+                    self._healthy_since_change = 0
+                    self._stats["decreases"] += 1
+            elif self._is_healthy():
+                self._healthy_since_change += 1
+                if (
+                    self._healthy_since_change >= self.limit
+                    and self._limit < self.max_limit
+                ):
+                    self._limit = min(float(self.max_limit), self._limit + 1)
+                    self._healthy_since_change = 0
+                    self._stats["increases"] += 1
+
+            self._condition.notify_all()
+
+    def _is_healthy(self) -> bool:
+        error_rate = sum(self._failures) / len(self._failures)
+        return error_rate <= self.error_threshold and self._p95() <= self.latency_target
+
+    def _p95(self) -> float:
+        latencies = sorted(self._latencies)
+        return latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+
+    def get_stats(self) -> Dict[str, float]:
+        """Obtener límite actual, peticiones en curso y p95 de latencia"""
+        with self._condition:
+            stats = dict(self._stats)
+            stats["limit"] = self.limit
+            stats["in_flight"] = self._in_flight
+            stats["p95_latency"] = self._p95() if self._latencies else 0.0
+            return stats
+
+
+class CircuitOpenError(RuntimeError):
+    """Petición rechazada sin llamar al servidor porque el circuito está abierto"""
+
+
+_ID_SEGMENT = re.compile(r"^[0-9a-fA-F]{8}(-?[0-9a-fA-F]{4}){3}-?[0-9a-fA-F]{12}$")
+
+
+def endpoint_kind(url: str) -> str:
+    """
+    Obtener la familia de endpoint de una URL, sin IDs de bomba
+
+    Args:
+        url: URL completa (ej: 'https://host/<id>/rawpower/detailed/')
+
+    Returns:
+        Familia del endpoint (ej: 'rawpower/detailed', 'physicalPumps')
+    """
+    segments = [s for s in urlsplit(url).path.split("/") if s]
+    ids = [i for i, segment in enumerate(segments) if _ID_SEGMENT.match(segment)]
+    if ids and ids[-1] < len(segments) - 1:
+        segments = segments[ids[-1] + 1 :]
+    else:
+        segments = [
+            s for s in segments if s != "publication" and not _ID_SEGMENT.match(s)
+        ]
+    return "/".join(segments)
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker por clave (host y familia de endpoint)
+
+    Tras `failure_threshold` fallos consecutivos el circuito se abre y las
+    peticiones fallan al instante; pasado `reset_timeout` se deja pasar un
+    número limitado de peticiones de prueba (semiabierto) que lo cierran si
+    tienen éxito o lo vuelven a abrir si fallan.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        half_open_max: int = 1,
+    ):
+        """
+        Args:
+            failure_threshold: Fallos consecutivos que abren el circuito
+            reset_timeout: Segundos abierto antes de probar de nuevo
+            half_open_max: Peticiones de prueba simultáneas en semiabierto
+        """
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.half_open_max = max(1, half_open_max)
+
+        self._circuits: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    def _circuit(self, key: str) -> Dict:
+        circuit = self._circuits.get(key)
+        if circuit is None:
+            circuit = self._circuits[key] = {
+                "state": self.CLOSED,
+                "failures": 0,
+                "opened_at": 0.0,
+                "probes": 0,
+                "rejected": 0,
+            }
+        return circuit
+
+    def allow(self, key: str) -> bool:
+        """
+        Indicar si una petición puede salir hacia el servidor
+
+        Cada llamada que devuelve True debe cerrarse con record_success o
+        record_failure.
+        """
+        with self._lock:
+            circuit = self._circuit(key)
+            if circuit["state"] == self.OPEN:
+                if time.monotonic() - circuit["opened_at"] < self.reset_timeout:
+                    circuit["rejected"] += 1
+                    return False
+                circuit["state"] = self.HALF_OPEN
+                circuit["probes"] = 0
+
+            if circuit["state"] == self.HALF_OPEN:
+                if circuit["probes"] >= self.half_open_max:
+                    circuit["rejected"] += 1
+                    return False
+                circuit["probes"] += 1
+            return True
+
+    def record_success(self, key: str):
+        """Registrar una respuesta correcta del servidor"""
+        with self._lock:
+            circuit = self._circuit(key)
+            circuit["state"] = self.CLOSED
+            circuit["failures"] = 0
+            circuit["probes"] = 0
+
+    def record_failure(self, key: str):
+        """Registrar un fallo del servidor (5xx, timeout o error de conexión)"""
+        with self._lock:
+            circuit = self._circuit(key)
+            circuit["failures"] += 1
+            if (
+                circuit["state"] == self.HALF_OPEN
+                or circuit["failures"] >= self.failure_threshold
+            ):
+                circuit["state"] = self.OPEN
+                circuit["opened_at"] = time.monotonic()
+                circuit["probes"] = 0
+
+    def get_state(self, key: str) -> str:
+        """Obtener el estado del circuito de una clave"""
+        with self._lock:
+            circuit = self._circuits.get(key)
+            return circuit["state"] if circuit else self.CLOSED
+
+    def get_stats(self) -> Dict[str, Dict]:
+        """Obtener estado, fallos consecutivos y rechazos por clave"""
+        with self._lock:
+            return {
+                key: {
+                    "state": c["state"],
+                    "failures": c["failures"],
+                    "rejected": c["rejected"],
+                }
+                for key, c in self._circuits.items()
+            }
+
+
+class FallbackCache:
+    """Últimas respuestas correctas por petición, para servir con el circuito abierto"""
+
+    def __init__(self, max_entries: int = 512):
+        """
+        Args:
+            max_entries: Número máximo de respuestas guardadas (LRU)
+        """
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def put(self, key: Tuple, value: Any):
+        """Guardar la última respuesta correcta de una petición"""
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, key: Tuple, default: Any = None) -> Any:
+        """Obtener la última respuesta correcta de una petición"""
+        with self._lock:
+            if key not in self._entries:
+                return default
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+
+class _Call:
+    """Llamada en curso compartida por todos los que piden la misma clave"""
+
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Agrupación de peticiones idénticas simultáneas
+
+    La primera llamada para una clave ejecuta la función; las que llegan
+    mientras está en curso esperan y reciben el mismo resultado (o la misma
+    excepción). El resultado es compartido: tratarlo como de solo lectura.
+    """
+
+    def __init__(self):
+        self._calls: Dict[Any, _Call] = {}
+        self._lock = threading.Lock()
+        self._stats = {"executed": 0, "shared": 0}
+
+    def do(self, key: Any, fn: Callable[[], Any]) -> Any:
+        """
+        Ejecutar `fn` una sola vez por clave entre las llamadas simultáneas
+
+        Args:
+            key: Clave hashable de la petición
+            fn: Función sin argumentos que realiza la petición
+
+        Returns:
+            Resultado de `fn`
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                self._stats["shared"] += 1
+                leader = False
+            else:
+                call = self._calls[key] = _Call()
+                self._stats["executed"] += 1
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener llamadas ejecutadas y llamadas que compartieron resultado"""
+        with self._lock:
+            return dict(self._stats)
+
+
+class AsyncSingleFlight:
+    """Versión asyncio de SingleFlight"""
+
+    def __init__(self):
+        self._calls: Dict[Any, "asyncio.Future"] = {}
+        self._stats = {"executed": 0, "shared": 0}
+
+    async def do(self, key: Any, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Esperar `fn()` una sola vez por clave entre las tareas simultáneas
+
+        Args:
+            key: Clave hashable de la petición
+            fn: Función sin argumentos que devuelve la corrutina de la petición
+
+        Returns:
+            Resultado de la corrutina
+        """
+        future = self._calls.get(key)
+        if future is not None:
+            self._stats["shared"] += 1
+            return await asyncio.shield(future)
+
+        future = self._calls[key] = asyncio.get_running_loop().create_future()
+        self._stats["executed"] += 1
+        try:
+            result = await fn()
+        except BaseException as e:
+            future.set_exception(e)
+            # Evitar el aviso de excepción no recuperada si nadie esperaba
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._calls[key]
+
+    def get_stats(self) -> Dict[str, int]:
+        """Obtener llamadas ejecutadas y llamadas que compartieron resultado"""
+        return dict(self._stats)
@@ -0,0 +1,421 @@
+#!/usr/bin/env python3
+"""
+Segmentos columnares de series temporales de AquaAdvanced
+Cada serie (bomba, endpoint, detallado) se guarda como una secuencia de
+archivos de solo anexado con tres columnas contiguas: time (int64, segundos
+desde 1970), value (float64) y validity (int8). Una cabecera fija con el
+número de puntos y las fechas extremas sirve de índice para saltar segmentos
+fuera del rango. Las lecturas usan mmap y memoryview sin copiar los datos
+(los archivos se escriben en el orden de bytes nativo, little-endian en x86/ARM).
+"""
+
+import logging
+import math
+import mmap
+import os
+import struct
+import threading
+from array import array
+from bisect import bisect_left, bisect_right
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from aquadapt_ranges import format_time, from_epoch, parse_time, to_epoch
+
+# Bloqueo entre procesos del directorio de una serie (fcntl en POSIX,
+# msvcrt en Windows)
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# numpy es opcional: solo se usa para exponer las columnas como arrays
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"AQSG"
+VERSION = 1
+
+# magic, versión, reservado, número de puntos, primera y última fecha
+HEADER = struct.Struct("=4sHHqqq")
+
+# Tipos numpy de las columnas time, value y validity
+DTYPES = ("=i8", "=f8", "i1")
+
+# Validity ausente en el punto original
+NO_VALIDITY = -1
+
+Columns = Tuple[memoryview, memoryview, memoryview]
+
+
+def series_dirname(endpoint: str, detailed: bool = False) -> str:
+    """Nombre del directorio de una serie (ej: 'rawpower_detailed')"""
+    return f"{endpoint}_detailed" if detailed else endpoint
+
+
+def encode_segment(
+    points: Iterable[Dict], after: Optional[int] = None
+) -> Optional[bytes]:
+    """
+    Codificar puntos en formato de segmento, ordenados y sin duplicados
+
+    Args:
+        points: Puntos con 'time', 'value' y 'validity'
+        after: Descartar los puntos con fecha <= after (segundos desde 1970)
+
+    Returns:
+        Contenido del archivo o None si no hay puntos válidos
+    """
+    by_time = {}
+    for point in points:
+        try:
+            epoch = to_epoch(parse_time(point["time"]))
+        except (KeyError, TypeError, ValueError):
+            logger.debug(f"Punto sin fecha válida ignorado: {point}")
+            continue
+        if after is not None and epoch <= after:
+            continue
+        value, flag = point.get("value"), point.get("validity")
+        try:
+            value = math.nan if value is None else float(value)
+            flag = NO_VALIDITY if flag is None else int(flag)
+        except (TypeError, ValueError, OverflowError):
+            flag = None
+        if flag is None or not -128 <= flag <= 127:
+            logger.debug(f"Punto con valor o validity no representable: {point}")
+            continue
+        by_time[epoch] = (value, flag)
+    if not by_time:
+        return None
+
+    times = array("q", sorted(by_time))
+    values = array("d")
+    validity = array("b")
+    for t in times:
+        value, flag = by_time[t]
+        values.append(value)
+        validity.append(flag)
+
+    header = HEADER.pack(MAGIC, VERSION, 0, len(times), times[0], times[-1])
+    return header + times.tobytes() + values.tobytes() + validity.tobytes()
+
+
+@contextmanager
+def series_lock(directory: str):
+    """Bloquear el directorio de una serie frente a otros procesos"""
+    with open(os.path.join(directory, ".lock"), "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def segment_number(name: str) -> int:
+    """Número de secuencia de un archivo de segmento (0 si no lo tiene)"""
+    try:
+        return int(name[: -len(".seg")])
+    except ValueError:
+        return 0
+
+
+def columns_to_dicts(times, values, validity) -> List[Dict]:
+    """Convertir columnas en puntos con el formato de la API"""
+    return [
+        {
+            "time": format_time(from_epoch(t)),
+            "value": None if math.isnan(v) else v,
+            "validity": None if f == NO_VALIDITY else f,
+        }
+        for t, v, f in zip(times, values, validity)
+    ]
+
+
+class Segment:
+    """Segmento abierto con mmap; las columnas son memoryview sin copia"""
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Ruta del archivo de segmento
+
+        Raises:
+            ValueError: El archivo no es un segmento válido
+        """
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        try:
+            magic, version, _, count, t_min, t_max = HEADER.unpack_from(self._mmap)
+        except struct.error:
+            magic = None
+        if (
+            magic != MAGIC
+            or version != VERSION
+            or len(self._mmap) != HEADER.size + count * 17
+        ):
+            self._mmap.close()
+            raise ValueError(f"Segmento inválido: {path}")
+
+        self.count = count
+        self.t_min = t_min
+        self.t_max = t_max
+
+        raw = memoryview(self._mmap)
+        offset = HEADER.size
+        self.times = raw[offset : offset + count * 8].cast("q")
+        offset += count * 8
+        self.values = raw[offset : offset + count * 8].cast("d")
+        offset += count * 8
+        self.validity = raw[offset : offset + count].cast("b")
+        self._raw = raw
+
+    def close(self):
+        """
+        Liberar las vistas y el mmap
+
+        Si quedan vistas devueltas por slice() en uso, el mmap se cierra al
+        liberarse la última de ellas.
+        """
+        for view in (self.times, self.values, self.validity, self._raw):
+            view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            pass
+
+    def overlaps(self, start: Optional[int], end: Optional[int]) -> bool:
+        """Indicar si el segmento tiene fechas dentro de [start, end]"""
+        return (start is None or self.t_max >= start) and (
+            end is None or self.t_min <= end
+        )
+
+    def slice(self, start: Optional[int] = None, end: Optional[int] = None) -> Columns:
+        """
+        Obtener las columnas de los puntos en [start, end] sin copiar
+
+        Args:
+            start: Segundos desde 1970 (None = desde el principio)
+            end: Segundos desde 1970 (None = hasta el final)
+
+        Returns:
+            Tupla (times, values, validity) de memoryview
+        """
+        lo = 0 if start is None else bisect_left(self.times, start)
+        hi = self.count if end is None else bisect_right(self.times, end)
+        return self.times[lo:hi], self.values[lo:hi], self.validity[lo:hi]
+
+
+class SegmentStore:
+    """Directorio de segmentos columnares por serie, de solo anexado"""
+
+    def __init__(self, root: str = "aquadapt_segments"):
+        """
+        Args:
+            root: Directorio raíz de los segmentos
+        """
+        self.root = root
+        self._segments: Dict[Tuple[str, str, bool], List[Segment]] = {}
+        self._ignored = set()  # Rutas de segmentos inválidos ya avisados
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Cerrar todos los segmentos abiertos"""
+        with self._lock:
+            for segments in self._segments.values():
+                for segment in segments:
+                    segment.close()
+            self._segments.clear()
+
+    def _series_dir(self, pump_id: str, endpoint: str, detailed: bool) -> str:
+        return os.path.join(self.root, pump_id, series_dirname(endpoint, detailed))
+
+    def _load(self, pump_id: str, endpoint: str, detailed: bool) -> List[Segment]:
+        """
+        Abrir los segmentos de una serie que aún no estén abiertos,
+        incluidos los anexados por otros procesos; requiere el lock
+        """
+        key = (pump_id, endpoint, detailed)
+        segments = self._segments.setdefault(key, [])
+        directory = self._series_dir(pump_id, endpoint, detailed)
+        if not os.path.isdir(directory):
+            return segments
+
+        known = {os.path.basename(segment.path) for segment in segments}
+        names = sorted(
+            (n for n in os.listdir(directory) if n.endswith(".seg") and n not in known),
+            key=segment_number,
+        )
+        for name in names:
+            path = os.path.join(directory, name)
+            if path in self._ignored:
+                continue
+            try:
+                segments.append(Segment(path))
+            except (OSError, ValueError) as e:
+                logger.warning(f"Segmento ignorado: {e}")
+                self._ignored.add(path)
+        if names:
+            segments.sort(key=lambda s: segment_number(os.path.basename(s.path)))
+        return segments
+
+    def append(
+        self,
+        pump_id: str,
+        endpoint: str,
+        points: Iterable[Dict],
+        detailed: bool = False,
+    ) -> int:
+        """
+        Anexar puntos a una serie como un segmento nuevo
+
+        Solo se anexan los puntos posteriores al último ya guardado en disco,
+        de modo que los segmentos quedan ordenados y sin solapes aunque
+        anexen varios procesos: el directorio se relee bajo un archivo de
+        bloqueo y cada segmento se publica completo con un número mayor que
+        los existentes.
+
+        Args:
+            pump_id: ID de la bomba
+            endpoint: Endpoint de la serie (ej: 'status', 'rawpower')
+            points: Puntos con 'time', 'value' y 'validity'
+            detailed: True si son datos del endpoint detallado
+
+        Returns:
+            Número de puntos anexados
+        """
+        directory = self._series_dir(pump_id, endpoint, detailed)
+        with self._lock:
+            os.makedirs(directory, exist_ok=True)
+            with series_lock(directory):
+                segments = self._load(pump_id, endpoint, detailed)
+                after = max((s.t_max for s in segments), default=None)
+                content = encode_segment(points, after)
+                if content is None:
+                    return 0
+
+                tmp_path = os.path.join(directory, f".{os.getpid()}.tmp")
+                with open(tmp_path, "wb") as f:
+                    f.write(content)
+                path = os.path.join(
+                    directory, f"{self._last_number(directory) + 1:08d}.seg"
+                )
+                os.replace(tmp_path, path)
+
+            segment = Segment(path)
+            segments.append(segment)
+            return segment.count
+
+    @staticmethod
+    def _last_number(directory: str) -> int:
+        """Mayor número de segmento del directorio (0 si no hay ninguno)"""
+        return max(
+            (segment_number(n) for n in os.listdir(directory) if n.endswith(".seg")),
+            default=0,
+        )
+
+    def scan(
+        self,
+        pump_id: str,
+        endpoint: str,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        detailed: bool = False,
+    ) -> Iterator[Columns]:
+        """
+        Recorrer una serie por segmentos, en orden y sin copiar datos
+
+        Args:
+            pump_id: ID de la bomba
+            endpoint: Endpoint de la serie
+            start_time: Fecha ISO de inicio incluida (None = sin límite)
+            end_time: Fecha ISO de fin incluida (None = sin límite)
+            detailed: True para la serie detallada
+
+        Yields:
+            Tuplas (times, values, validity) de memoryview por segmento
+        """
+        start = to_epoch(parse_time(start_time)) if start_time else None
+        end = to_epoch(parse_time(end_time)) if end_time else None
+        with self._lock:
+            segments = list(self._load(pump_id, endpoint, detailed))
+        for segment in segments:
+            if segment.overlaps(start, end):
+                columns = segment.slice(start, end)
+                if len(columns[0]):
+                    yield columns
+
+    def read(
+        self,
+        pump_id: str,
+        endpoint: str,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        detailed: bool = False,
+    ) -> List[Dict]:
+        """Leer una serie como lista de puntos con el formato de la API"""
+        points = []
+        for columns in self.scan(pump_id, endpoint, start_time, end_time, detailed):
+            points.extend(columns_to_dicts(*columns))
+        return points
+
+    def read_arrays(
+        self,
+        pump_id: str,
+        endpoint: str,
+        start_time: Optional[str] = None,
+        end_time: Optional[str] = None,
+        detailed: bool = False,
+    ) -> Tuple:
+        """
+        Leer una serie como arrays de numpy (time, value, validity)
+
+        Con un solo segmento los arrays son vistas del mmap sin copia.
+
+        Raises:
+            ImportError: numpy no está instalado
+        """
+        if numpy is None:
+            raise ImportError("numpy no está instalado: pip install numpy")
+        parts = [
+            tuple(
+                numpy.frombuffer(column, dtype=dtype)
+                for column, dtype in zip(columns, DTYPES)
+            )
+            for columns in self.scan(pump_id, endpoint, start_time, end_time, detailed)
+        ]
+        if len(parts) == 1:
+            return parts[0]
+        return tuple(
+            (
+                numpy.concatenate([part[i] for part in parts])
+                if parts
+                else numpy.empty(0, dtype=dtype)
+            )
+            for i, dtype in enumerate(DTYPES)
+        )
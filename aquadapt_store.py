@@ -0,0 +1,478 @@
+#!/usr/bin/env python3
+"""
+Almacén local de series temporales de AquaAdvanced
+Base de datos SQLite en modo WAL con los puntos (bomba, endpoint, detallado,
+time, value, validity). Las escrituras se agrupan en transacciones por lotes
+y las lecturas por rango usan la clave primaria compuesta, de modo que las
+series ya descargadas se consultan sin llamar a la API. Las agregaciones por
+hora, día y mes se actualizan en la misma transacción que los puntos.
+"""
+
+import logging
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
+
+from aquadapt_ranges import format_time, from_epoch, parse_time, to_epoch
+
+logger = logging.getLogger(__name__)
+
+TimeLike = Union[str, datetime]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS points (
+    pump_id TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    detailed INTEGER NOT NULL,
+    time INTEGER NOT NULL,
+    value REAL,
+    validity INTEGER,
+    PRIMARY KEY (pump_id, endpoint, detailed, time)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS rollups (
+    pump_id TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    detailed INTEGER NOT NULL,
+    level TEXT NOT NULL,
+    bucket INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    min REAL,
+    max REAL,
+    sum REAL,
+    valid_count INTEGER NOT NULL,
+    PRIMARY KEY (pump_id, endpoint, detailed, level, bucket)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS watermarks (
+    pump_id TEXT NOT NULL,
+    endpoint TEXT NOT NULL,
+    detailed INTEGER NOT NULL,
+    last_time INTEGER NOT NULL,
+    synced_at INTEGER NOT NULL,
+    PRIMARY KEY (pump_id, endpoint, detailed)
+) WITHOUT ROWID;
+"""
+
+_UPSERT = """
+INSERT INTO points (pump_id, endpoint, detailed, time, value, validity)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (pump_id, endpoint, detailed, time)
+DO UPDATE SET value = excluded.value, validity = excluded.validity
+"""
+
+_ROLLUP_UPSERT = """
+INSERT INTO rollups
+    (pump_id, endpoint, detailed, level, bucket, count, min, max, sum, valid_count)
+{select}
+ON CONFLICT (pump_id, endpoint, detailed, level, bucket) DO UPDATE SET
+    count = excluded.count, min = excluded.min, max = excluded.max,
+    sum = excluded.sum, valid_count = excluded.valid_count
+"""
+
+# Cada nivel se calcula a partir del anterior: puntos -> hora -> día -> mes.
+# COALESCE mantiene valid_count en 0 (no NULL) aunque falte validity
+_ROLLUP_SELECTS = {
+    "hour": """
+        SELECT pump_id, endpoint, detailed, 'hour', time - time % 3600,
+               COUNT(value), MIN(value), MAX(value), SUM(value),
+               COALESCE(SUM(validity = {valid}), 0)
+        FROM points
+        WHERE pump_id = ? AND endpoint = ? AND detailed = ?
+          AND time >= ? AND time < ?
+        GROUP BY time - time % 3600
+    """,
+    "day": """
+        SELECT pump_id, endpoint, detailed, 'day', bucket - bucket % 86400,
+               SUM(count), MIN(min), MAX(max), SUM(sum),
+               COALESCE(SUM(valid_count), 0)
+        FROM rollups
+        WHERE pump_id = ? AND endpoint = ? AND detailed = ? AND level = 'hour'
+          AND bucket >= ? AND bucket < ?
+        GROUP BY bucket - bucket % 86400
+    """,
+    "month": """
+        SELECT pump_id, endpoint, detailed, 'month',
+               CAST(strftime('%s', bucket, 'unixepoch', 'start of month') AS INTEGER),
+               SUM(count), MIN(min), MAX(max), SUM(sum),
+               COALESCE(SUM(valid_count), 0)
+        FROM rollups
+        WHERE pump_id = ? AND endpoint = ? AND detailed = ? AND level = 'day'
+          AND bucket >= ? AND bucket < ?
+        GROUP BY 5
+    """,
+}
+
+# Validity de un punto válido según la API
+VALID_FLAG = 0
+
+# Duración máxima de los intervalos de cada nivel, del más grueso al más fino
+ROLLUP_LEVELS = (
+    ("month", timedelta(days=31)),
+    ("day", timedelta(days=1)),
+    ("hour", timedelta(hours=1)),
+)
+
+
+def _bucket_start(level: str, epoch: int) -> int:
+    """Inicio del intervalo de un nivel que contiene una fecha"""
+    if level == "hour":
+        return epoch - epoch % 3600
+    if level == "day":
+        return epoch - epoch % 86400
+    dt = from_epoch(epoch)
+    return to_epoch(datetime(dt.year, dt.month, 1))
+
+
+def _next_bucket(level: str, bucket: int) -> int:
+    """Inicio del intervalo siguiente de un nivel"""
+    if level == "hour":
+        return bucket + 3600
+    if level == "day":
+        return bucket + 86400
+    dt = from_epoch(bucket)
+    year, month = (dt.year + 1, 1) if dt.month == 12 else (dt.year, dt.month + 1)
+    return to_epoch(datetime(year, month, 1))
+
+
+def _as_epoch(value: TimeLike) -> int:
+    """Convertir una fecha ISO o datetime en segundos desde 1970"""
+    if isinstance(value, str):
+        value = parse_time(value)
+    return to_epoch(value)
+
+
+class SeriesStore:
+    """Almacén SQLite de puntos de series temporales"""
+
+    def __init__(
+        self,
+        path: str = "aquadapt_series.db",
+        batch_size: int = 5000,
+        rollups: bool = True,
+    ):
+        """
+        Args:
+            path: Ruta de la base de datos (':memory:' para pruebas)
+            batch_size: Puntos por lote en cada executemany
+            rollups: Mantener las agregaciones por hora, día y mes al escribir
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.rollups = rollups
+        self._lock = threading.RLock()
+        self._depth = 0
+        self._conn = sqlite3.connect(
+            path, isolation_level=None, check_same_thread=False
+        )
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def close(self):
+        """Cerrar la conexión con la base de datos"""
+        with self._lock:
+            self._conn.close()
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """
+        Agrupar varias operaciones en una única transacción
+
+        Las transacciones anidadas se integran en la exterior, que es la
+        única que confirma o deshace los cambios.
+        """
+        with self._lock:
+            if self._depth == 0:
+                self._conn.execute("BEGIN IMMEDIATE")
+            self._depth += 1
+            try:
+                yield self._conn
+            except BaseException:
+                self._depth -= 1
+                if self._depth == 0:
+                    self._conn.execute("ROLLBACK")
+                raise
+            self._depth -= 1
+            if self._depth == 0:
+                self._conn.execute("COMMIT")
+
+    def write(
+        self,
+        pump_id: str,
+        endpoint: str,
+        points: Iterable[Dict],
+        detailed: bool = False,
+    ) -> int:
+        """
+        Guardar (o actualizar) los puntos de una serie
+
+        Args:
+            pump_id: ID de la bomba
+            endpoint: Endpoint de la serie (ej: 'status', 'rawpower')
+            points: Puntos con 'time', 'value' y 'validity'
+            detailed: True si son datos del endpoint detallado
+
+        Returns:
+            Número de puntos escritos
+        """
+        return self.write_many([(pump_id, endpoint, detailed, points)])
+
+    def write_many(
+        self, series: Iterable[Tuple[str, str, bool, Iterable[Dict]]]
+    ) -> int:
+        """
+        Guardar varias series en una sola transacción
+
+        Args:
+            series: Tuplas (pump_id, endpoint, detailed, points)
+
+        Returns:
+            Número de puntos escritos
+        """
+        written = 0
+        touched: Dict[Tuple[str, str, int], List[int]] = {}
+        with self.transaction() as conn:
+            batch = []
+            for pump_id, endpoint, detailed, points in series:
+                key = (pump_id, endpoint, int(detailed))
+                for point in points:
+                    try:
+                        epoch = _as_epoch(point["time"])
+                    except (KeyError, TypeError, ValueError):
+                        logger.debug(f"Punto sin fecha válida ignorado: {point}")
+                        continue
+                    span = touched.setdefault(key, [epoch, epoch])
+                    span[0] = min(span[0], epoch)
+                    span[1] = max(span[1], epoch)
+                    batch.append(
+                        (
+                            pump_id,
+                            endpoint,
+                            int(detailed),
+                            epoch,
+                            point.get("value"),
+                            point.get("validity"),
+                        )
+                    )
+                    if len(batch) >= self.batch_size:
+                        conn.executemany(_UPSERT, batch)
+                        written += len(batch)
+                        batch = []
+            if batch:
+                conn.executemany(_UPSERT, batch)
+                written += len(batch)
+            if self.rollups:
+                for key, (first, last) in touched.items():
+                    self._update_rollups(conn, key, first, last)
+        return written
+
+    def _update_rollups(
+        self, conn: sqlite3.Connection, key: Tuple, first: int, last: int
+    ):
+        """Recalcular las agregaciones de los intervalos que contienen [first, last]"""
+        for level in ("hour", "day", "month"):
+            start = _bucket_start(level, first)
+            end = _next_bucket(level, _bucket_start(level, last))
+            select = _ROLLUP_SELECTS[level].format(valid=VALID_FLAG)
+            conn.execute(_ROLLUP_UPSERT.format(select=select), (*key, start, end))
+
+    def rebuild_rollups(self):
+        """Recalcular todas las agregaciones (ej: base de datos anterior a ellas)"""
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM rollups")
+            spans = conn.execute(
+                "SELECT pump_id, endpoint, detailed, MIN(time), MAX(time) "
+                "FROM points GROUP BY pump_id, endpoint, detailed"
+            ).fetchall()
+            for pump_id, endpoint, detailed, first, last in spans:
+                self._update_rollups(conn, (pump_id, endpoint, detailed), first, last)
+
+    def query(
+        self,
+        pump_id: str,
+        endpoint: str,
+        start_time: Optional[TimeLike] = None,
+        end_time: Optional[TimeLike] = None,
+        resolution: Union[str, timedelta, None] = None,
+        detailed: bool = False,
+    ) -> Dict:
+        """
+        Consultar una serie con el nivel de agregación más grueso posible
+
+        Args:
+            pump_id: ID de la bomba
+            endpoint: Endpoint de la serie
+            start_time: Fecha de inicio incluida (None = sin límite)
+            end_time: Fecha de fin incluida (None = sin límite)
+            resolution: 'raw', 'hour', 'day', 'month' o un timedelta; con un
+                timedelta se elige el nivel más grueso cuyos intervalos no lo
+                superan (None = puntos sin agregar)
+            detailed: True para la serie detallada
+
+        Returns:
+            Diccionario con 'level' y 'data'. Con level 'raw' los datos son
+            puntos como los de la API; en otro caso, intervalos con time,
+            count, min, max, mean, sum y valid_count
+        """
+        level = "raw"
+        if isinstance(resolution, timedelta):
+            for name, size in ROLLUP_LEVELS:
+                if size <= resolution:
+                    level = name
+                    break
+        elif resolution is not None:
+            if resolution != "raw" and resolution not in _ROLLUP_SELECTS:
+                raise ValueError(f"Resolución desconocida: {resolution}")
+            level = resolution
+
+        if level == "raw" or not self.rollups:
+            return {
+                "level": "raw",
+                "data": self.read(pump_id, endpoint, start_time, end_time, detailed),
+            }
+
+        query = (
+            "SELECT bucket, count, min, max, sum, valid_count FROM rollups "
+            "WHERE pump_id = ? AND endpoint = ? AND detailed = ? AND level = ?"
+        )
+        args = [pump_id, endpoint, int(detailed), level]
+        if start_time is not None:
+            query += " AND bucket >= ?"
+            args.append(_bucket_start(level, _as_epoch(start_time)))
+        if end_time is not None:
+            query += " AND bucket <= ?"
+            args.append(_as_epoch(end_time))
+        query += " ORDER BY bucket"
+
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return {
+            "level": level,
+            "data": [
+                {
+                    "time": format_time(from_epoch(bucket)),
+                    "count": count,
+                    "min": min_value,
+                    "max": max_value,
+                    "mean": total / count if count else None,
+                    "sum": total,
+                    "valid_count": valid_count,
+                }
+                for bucket, count, min_value, max_value, total, valid_count in rows
+            ],
+        }
+
+    def read(
+        self,
+        pump_id: str,
+        endpoint: str,
+        start_time: Optional[TimeLike] = None,
+        end_time: Optional[TimeLike] = None,
+        detailed: bool = False,
+    ) -> List[Dict]:
+        """
+        Leer una serie guardada, ordenada por fecha
+
+        Args:
+            pump_id: ID de la bomba
+            endpoint: Endpoint de la serie
+            start_time: Fecha de inicio incluida (None = sin límite)
+            end_time: Fecha de fin incluida (None = sin límite)
+            detailed: True para la serie detallada
+
+        Returns:
+            Puntos con el mismo formato que devuelve la API
+        """
+        query = (
+            "SELECT time, value, validity FROM points "
+            "WHERE pump_id = ? AND endpoint = ? AND detailed = ?"
+        )
+        args = [pump_id, endpoint, int(detailed)]
+        if start_time is not None:
+            query += " AND time >= ?"
+            args.append(_as_epoch(start_time))
+        if end_time is not None:
+            query += " AND time <= ?"
+            args.append(_as_epoch(end_time))
+        query += " ORDER BY time"
+
+        with self._lock:
+            rows = self._conn.execute(query, args).fetchall()
+        return [
+            {"time": format_time(from_epoch(t)), "value": value, "validity": validity}
+            for t, value, validity in rows
+        ]
+
+    def get_watermark(
+        self, pump_id: str, endpoint: str, detailed: bool = False
+    ) -> Optional[datetime]:
+        """
+        Obtener la fecha del último punto sincronizado de una serie
+
+        Returns:
+            Fecha UTC sin zona o None si la serie nunca se ha sincronizado
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT last_time FROM watermarks "
+                "WHERE pump_id = ? AND endpoint = ? AND detailed = ?",
+                (pump_id, endpoint, int(detailed)),
+            ).fetchone()
+        return from_epoch(row[0]) if row else None
+
+    def set_watermark(
+        self,
+        pump_id: str,
+        endpoint: str,
+        last_time: TimeLike,
+        detailed: bool = False,
+    ):
+        """
+        Avanzar la marca de sincronización de una serie (nunca retrocede)
+
+        Dentro de transaction() se confirma junto con los puntos escritos.
+        """
+        synced_at = to_epoch(datetime.now(timezone.utc).replace(tzinfo=None))
+        with self.transaction() as conn:
+            conn.execute(
+                "INSERT INTO watermarks "
+                "(pump_id, endpoint, detailed, last_time, synced_at) "
+                "VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (pump_id, endpoint, detailed) DO UPDATE SET "
+                "last_time = MAX(last_time, excluded.last_time), "
+                "synced_at = excluded.synced_at",
+                (pump_id, endpoint, int(detailed), _as_epoch(last_time), synced_at),
+            )
+
+    def list_series(self) -> List[Dict]:
+        """
+        Obtener las series guardadas con su número de puntos y extremos
+
+        Returns:
+            Lista de dicts con pump_id, endpoint, detailed, count, first y last
+        """
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT pump_id, endpoint, detailed, COUNT(*), MIN(time), MAX(time) "
+                "FROM points GROUP BY pump_id, endpoint, detailed"
+            ).fetchall()
+        return [
+            {
+                "pump_id": pump_id,
+                "endpoint": endpoint,
+                "detailed": bool(detailed),
+                "count": count,
+                "first": format_time(from_epoch(first)),
+                "last": format_time(from_epoch(last)),
+            }
+            for pump_id, endpoint, detailed, count, first, last in rows
+        ]
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Sincronización incremental de series de AquaAdvanced
+Cada serie (bomba, endpoint, detallado) guarda en el almacén local la fecha
+de su último punto. Cada ejecución pide solo [marca - solape, ahora] y
+confirma los puntos y la nueva marca en la misma transacción, de modo que
+una ejecución interrumpida nunca deja la marca por delante de los datos.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Union
+
+import config
+from aquadapt_ranges import format_time, latest_point
+from aquadapt_segments import SegmentStore
+from aquadapt_store import SeriesStore
+
+logger = logging.getLogger(__name__)
+
+
+def last_point_time(points: List[Dict]) -> Optional[str]:
+    """Obtener la fecha más reciente de una lista de puntos"""
+    point = latest_point(points)
+    return point["time"] if point else None
+
+
+def sync_series(
+    client,
+    store: SeriesStore,
+    bomba_id: str,
+    endpoint: str,
+    detailed: bool = False,
+    now: Optional[datetime] = None,
+    overlap: Optional[timedelta] = None,
+    initial: Optional[timedelta] = None,
+    segments: Optional[SegmentStore] = None,
+) -> Dict[str, Any]:
+    """
+    Sincronizar una serie desde su marca hasta ahora
+
+    Args:
+        client: AquaAdvancedClient
+        store: Almacén donde se guardan puntos y marcas
+        bomba_id: ID de la bomba
+        endpoint: Endpoint de la serie (ej: 'status', 'rawpower')
+        detailed: True para la serie detallada
+        now: Fin del rango en UTC (por defecto, ahora)
+        overlap: Margen que se vuelve a pedir antes de la marca
+        initial: Historia a pedir si la serie no tiene marca
+        segments: Anexar también los puntos nuevos como segmentos columnares
+
+    Returns:
+        Diccionario con bomba_id, endpoint, detailed, start, end, points y
+        watermark (fecha del último punto tras sincronizar)
+
+    Raises:
+        Exception: Los errores de la petición se propagan sin tocar la marca
+    """
+    if now is None:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+    if overlap is None:
+        overlap = timedelta(minutes=getattr(config, "SYNC_OVERLAP_MINUTES", 30))
+    if initial is None:
+        initial = timedelta(days=getattr(config, "SYNC_INITIAL_DAYS", 1))
+
+    watermark = store.get_watermark(bomba_id, endpoint, detailed)
+    start = watermark - overlap if watermark else now - initial
+    endpoint_key = f"{endpoint}/detailed" if detailed else endpoint
+
+    data = client._fetch_bomba_data(
+        bomba_id, endpoint_key, format_time(start), format_time(now)
+    )
+    points = data if isinstance(data, list) else []
+
+    last = last_point_time(points)
+    if segments is not None:
+        # Antes de avanzar la marca: los puntos repetidos no se anexan dos veces
+        segments.append(bomba_id, endpoint, points, detailed)
+    with store.transaction():
+        written = store.write(bomba_id, endpoint, points, detailed)
+        if last:
+            store.set_watermark(bomba_id, endpoint, last, detailed)
+
+    return {
+        "bomba_id": bomba_id,
+        "endpoint": endpoint_key,
+        "detailed": detailed,
+        "start": format_time(start),
+        "end": format_time(now),
+        "points": written,
+        "watermark": last or (format_time(watermark) if watermark else None),
+    }
+
+
+def sync_fleet(
+    client,
+    store: SeriesStore,
+    pumps: List[Union[str, Dict]],
+    endpoints: List[str],
+    detailed: bool = False,
+    max_workers: Optional[int] = None,
+    segments: Optional[SegmentStore] = None,
+) -> Dict[str, Any]:
+    """
+    Sincronizar en paralelo varios endpoints para varias bombas
+
+    Cada serie se confirma por separado en cuanto llega, así que el fallo de
+    una bomba no impide avanzar las marcas del resto.
+
+    Args:
+        client: AquaAdvancedClient
+        store: Almacén donde se guardan puntos y marcas
+        pumps: IDs de bomba o diccionarios de bomba (con 'id' y enlaces)
+        endpoints: Endpoints a sincronizar (ej: ['status', 'rawpower'])
+        detailed: True para las series detalladas
+        max_workers: Hilos simultáneos (por defecto FLEET_MAX_WORKERS)
+        segments: Anexar también los puntos nuevos como segmentos columnares
+
+    Returns:
+        Diccionario con 'results' (uno por serie, con status 'ok'/'empty'/
+        'error') y los totales 'ok', 'empty', 'errors', 'points' y 'elapsed'
+    """
+    bomba_ids = []
+    for pump in pumps:
+        if isinstance(pump, dict):
+            client.href_catalog.seed([pump])
+            bomba_ids.append(pump["id"])
+        else:
+            bomba_ids.append(pump)
+
+    if max_workers is None:
+        max_workers = getattr(config, "FLEET_MAX_WORKERS", 16)
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+
+    def sync_item(bomba_id: str, endpoint: str) -> Dict:
+        try:
+            result = sync_series(
+                client, store, bomba_id, endpoint, detailed, now, segments=segments
+            )
+            result["status"] = "ok" if result["points"] else "empty"
+            result["error"] = None
+        except Exception as e:
+            logger.error(f"Error al sincronizar {endpoint} de bomba {bomba_id}: {e}")
+            result = {
+                "bomba_id": bomba_id,
+                "endpoint": endpoint,
+                "detailed": detailed,
+                "points": 0,
+                "status": "error",
+                "error": str(e),
+            }
+        return result
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        futures = [
+            executor.submit(sync_item, bomba_id, endpoint)
+            for bomba_id in bomba_ids
+            for endpoint in endpoints
+        ]
+        results = [future.result() for future in futures]
+
+    summary = {
+        "results": results,
+        "ok": sum(1 for r in results if r["status"] == "ok"),
+        "empty": sum(1 for r in results if r["status"] == "empty"),
+        "errors": sum(1 for r in results if r["status"] == "error"),
+        "points": sum(r["points"] for r in results),
+        "elapsed": time.perf_counter() - started,
+    }
+    logger.info(
+        f"Sincronización: {len(results)} series en {summary['elapsed']:.2f}s "
+        f"({summary['points']} puntos, {summary['errors']} errores)"
+    )
+    return summary
@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+Series temporales de AquaAdvanced en columnas numpy
+TimeSeries guarda los puntos {time, value, validity} en tres arrays
+contiguos: times (datetime64[s]), values (float64) y validity (int8), unos
+17 bytes por punto frente a varios cientos de una lista de diccionarios.
+La conversión desde y hacia el formato de la API no pierde información:
+los puntos que no se pueden representar exactamente se rechazan (los
+valores enteros vuelven como float, iguales al comparar).
+"""
+
+import math
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Union
+
+from aquadapt_ranges import parse_time
+from aquadapt_segments import NO_VALIDITY
+
+# numpy es opcional: sin él las series se devuelven como listas de puntos
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Campos de un punto de serie de la API
+FIELDS = frozenset(("time", "value", "validity"))
+
+
+def _require_numpy():
+    if numpy is None:
+        raise ImportError("numpy no está instalado: pip install numpy")
+
+
+def _parse_times(times: List[str]):
+    """
+    Convertir fechas de la API ('2025-10-23T15:00:00Z') en datetime64[s]
+
+    Raises:
+        ValueError: Alguna fecha no tiene exactamente ese formato
+    """
+    if not all(isinstance(t, str) and t.endswith("Z") for t in times):
+        raise ValueError("Fechas sin el formato de la API")
+    text = numpy.array([t[:-1] for t in times])
+    parsed = numpy.array(text, dtype="datetime64[s]")
+    # numpy acepta fechas parciales y trunca fracciones: exigir ida y vuelta
+    if not (numpy.datetime_as_string(parsed, unit="s") == text).all():
+        raise ValueError("Fechas sin el formato de la API")
+    return parsed
+
+
+class TimeSeries:
+    """
+    Serie temporal en columnas numpy con conversión sin pérdida a puntos
+
+    Los índices enteros devuelven un punto (dict) y los slices devuelven
+    otra TimeSeries que comparte memoria con la original.
+    """
+
+    __slots__ = ("times", "values", "validity")
+
+    def __init__(self, times: Any, values: Any, validity: Any):
+        """
+        Args:
+            times: Fechas datetime64, o enteros en segundos desde 1970 (por
+                ejemplo la columna time de SegmentStore.read_arrays)
+            values: Valores float64 (NaN = valor nulo)
+            validity: Validez int8 (-1 = validez nula)
+
+        Raises:
+            ImportError: numpy no está instalado
+            ValueError: Las columnas no tienen la misma longitud
+        """
+        _require_numpy()
+        times = numpy.asarray(times)
+        if times.dtype.kind in "iu":
+            times = times.astype("=i8", copy=False).view("datetime64[s]")
+        self.times = times.astype("datetime64[s]", copy=False)
+        self.values = numpy.asarray(values, dtype=numpy.float64)
+        self.validity = numpy.asarray(validity, dtype=numpy.int8)
+        if not len(self.times) == len(self.values) == len(self.validity):
+            raise ValueError("Las columnas de la serie tienen longitudes distintas")
+
+    @classmethod
+    def from_points(cls, points: Iterable[Dict]) -> "TimeSeries":
+        """
+        Crear una serie desde puntos con el formato de la API
+
+        Args:
+            points: Puntos con exactamente 'time', 'value' y 'validity'
+
+        Returns:
+            TimeSeries con los puntos en el mismo orden
+
+        Raises:
+            ImportError: numpy no está instalado
+            ValueError: Algún punto no se puede representar sin pérdida
+        """
+        _require_numpy()
+        times, values, validity = [], [], []
+        for point in points:
+            if not isinstance(point, dict) or point.keys() != FIELDS:
+                raise ValueError(f"Punto sin el formato de serie: {point}")
+            value = point["value"]
+            flag = point["validity"]
+            if value is not None and type(value) not in (int, float):
+                raise ValueError(f"Valor no numérico: {value!r}")
+            if flag is not None and (
+                type(flag) is not int or not NO_VALIDITY < flag <= 127
+            ):
+                raise ValueError(f"Validez fuera de rango: {flag!r}")
+            times.append(point["time"])
+            values.append(math.nan if value is None else value)
+            validity.append(NO_VALIDITY if flag is None else flag)
+        return cls(_parse_times(times), values, validity)
+
+    @classmethod
+    def empty(cls) -> "TimeSeries":
+        """Serie sin puntos"""
+        return cls([], [], [])
+
+    def __len__(self) -> int:
+        return len(self.times)
+
+    def __getitem__(self, index: Union[int, slice]) -> Union[Dict, "TimeSeries"]:
+        if isinstance(index, slice):
+            return TimeSeries(
+                self.times[index], self.values[index], self.validity[index]
+            )
+        return self[index : index + 1 or None].to_dicts()[0]
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self.to_dicts())
+
+    def __repr__(self) -> str:
+        if not len(self):
+            return "TimeSeries(0 puntos)"
+        return f"TimeSeries({len(self)} puntos, {self.times[0]}Z .. {self.times[-1]}Z)"
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes que ocupan las columnas"""
+        return self.times.nbytes + self.values.nbytes + self.validity.nbytes
+
+    def between(
+        self, start_time: Optional[str] = None, end_time: Optional[str] = None
+    ) -> "TimeSeries":
+        """
+        Obtener los puntos en [start_time, end_time] sin copiar
+
+        Requiere la serie ordenada por fecha (como la devuelve el cliente).
+
+        Args:
+            start_time: Fecha ISO de inicio incluida (None = sin límite)
+            end_time: Fecha ISO de fin incluida (None = sin límite)
+        """
+        lo = 0
+        hi = len(self)
+        if start_time:
+            start = numpy.datetime64(parse_time(start_time), "s")
+            lo = int(numpy.searchsorted(self.times, start, side="left"))
+        if end_time:
+            end = numpy.datetime64(parse_time(end_time), "s")
+            hi = int(numpy.searchsorted(self.times, end, side="right"))
+        return self[lo:hi]
+
+    def to_dicts(self) -> List[Dict]:
+        """Convertir en puntos con el formato de la API"""
+        times = numpy.datetime_as_string(self.times, unit="s").tolist()
+        return [
+            {
+                "time": f"{t}Z",
+                "value": None if math.isnan(v) else v,
+                "validity": None if f == NO_VALIDITY else f,
+            }
+            for t, v, f in zip(times, self.values.tolist(), self.validity.tolist())
+        ]
@@ -24,7 +24,10 @@ DISABLE_SSL_WARNINGS = (
     True  # Deshabilitar warnings de SSL para certificados autofirmados
 )
 TIMEOUT = 30  # Timeout en segundos
-RETRY_COUNT = 3  # Número de reintentos en caso de error
+RETRY_COUNT = 3  # Intentos máximos por petición (incluye el primero)
+RETRY_BACKOFF_BASE = 0.5  # Espera base del backoff exponencial (segundos)
+RETRY_BACKOFF_MAX = 30.0  # Espera máxima entre reintentos (segundos)
+RETRY_BUDGET = 60.0  # Tiempo máximo por llamada, esperas incluidas (segundos)
 
 # Configuración de logging
 LOG_LEVEL = "INFO"  # DEBUG, INFO, WARNING, ERROR
@@ -66,10 +69,108 @@ ENDPOINTS = {
 DATA_TO_COLLECT = ["status", "detailed_status", "power", "speed", "faults"]
 
 # Filtros
-FILTER_BY_NAME = None  # Ej: ["EB0", "EB3"] para filtrar solo ciertas bombas
+FILTER_BY_NAME = None  # Ej: ["EB0", "EB3 G4"]: estaciones, nombres o prefijos
 EXCLUDE_OFFLINE = True  # Excluir bombas fuera de servicio
 
 # Configuración de formato de salida
 OUTPUT_FORMAT = "json"  # json, csv, excel
 INCLUDE_TIMESTAMP = True
 SEPARATE_FILES = False  # True para crear un archivo por bomba
+
+# Pool de conexiones HTTP (keep-alive)
+POOL_CONNECTIONS = 10  # Número de hosts distintos con pool propio
+POOL_MAXSIZE = 20  # Conexiones simultáneas máximas por host
+
+# Caché de enlaces href por bomba
+HREF_CATALOG_TTL = 3600  # Segundos de validez de los enlaces (0 = sin caducidad)
+
+# Cliente asíncrono (requiere aiohttp)
+ASYNC_MAX_PER_HOST = 20  # Peticiones simultáneas máximas por host
+ASYNC_MAX_PER_ENDPOINT = 8  # Peticiones simultáneas máximas por tipo de endpoint
+
+# Consultas de flota en paralelo (fetch_fleet)
+FLEET_MAX_WORKERS = 16  # Hilos simultáneos (limitado por POOL_MAXSIZE)
+
+# Concurrencia adaptativa (AIMD) de peticiones al servidor
+CONCURRENCY_INITIAL = 8  # Peticiones simultáneas iniciales
+CONCURRENCY_MIN = 1  # Límite mínimo
+CONCURRENCY_MAX = None  # Límite máximo (None = POOL_MAXSIZE)
+CONCURRENCY_LATENCY_TARGET = 2.0  # p95 de latencia sano (segundos)
+CONCURRENCY_ERROR_THRESHOLD = 0.05  # Tasa de 5xx/timeouts sana
+
+# Circuit breaker por host y familia de endpoint
+CIRCUIT_FAILURE_THRESHOLD = 5  # Fallos consecutivos que abren el circuito
+CIRCUIT_RESET_TIMEOUT = 30.0  # Segundos abierto antes de probar de nuevo
+CIRCUIT_HALF_OPEN_MAX = 1  # Peticiones de prueba simultáneas en semiabierto
+FALLBACK_CACHE_SIZE = 512  # Últimas respuestas guardadas para servir en local
+
+# Compresión de respuestas (gzip/deflate, y br/zstd si están instalados)
+ENABLE_COMPRESSION = True
+
+# Decodificación JSON: "auto" (orjson > simdjson > ujson > json) o un backend
+JSON_BACKEND = "auto"
+
+# Lectura en streaming de respuestas grandes (iter_bomba_data)
+STREAM_CHUNK_SIZE = 65536  # Bytes leídos del socket en cada trozo
+
+# División de rangos largos en ventanas pedidas en paralelo
+CHUNK_ENABLED = True
+CHUNK_CADENCE_MINUTES = 30  # Intervalo entre puntos (alineación de ventanas)
+CHUNK_WINDOW_HOURS = 24  # Ventana inicial, antes de observar la densidad
+CHUNK_MIN_WINDOW_HOURS = 2  # Ventana mínima
+CHUNK_MAX_WINDOW_HOURS = 168  # Ventana máxima (7 días)
+CHUNK_TARGET_POINTS = 2000  # Puntos deseados por ventana
+CHUNK_MAX_WORKERS = 8  # Hilos para pedir ventanas en paralelo
+
+# Caché de series por rangos cubiertos (solo se piden los huecos)
+RANGE_CACHE_ENABLED = True
+RANGE_CACHE_RECENT_LAG_MINUTES = 60  # Datos más recientes que esto se vuelven a pedir
+RANGE_CACHE_MAX_SERIES = 512  # Series (bomba, endpoint) máximas en memoria
+
+# Caché de rangos vacíos (se responde [] sin volver a preguntar)
+NEGATIVE_CACHE_TTL_MINUTES = 15  # Validez de un vacío en rangos recientes
+NEGATIVE_CACHE_PERMANENT_AFTER_DAYS = 7  # Vacíos más antiguos son permanentes
+NEGATIVE_CACHE_MAX_SERIES = 512  # Series máximas en memoria de cada tipo
+
+# Almacén local de series (SQLite)
+STORE_ENABLED = True  # Guardar también en el almacén las consultas de main.py
+STORE_PATH = "aquadapt_series.db"  # Ruta de la base de datos
+STORE_BATCH_SIZE = 5000  # Puntos por lote en cada inserción
+STORE_ROLLUPS = True  # Mantener agregaciones por hora, día y mes al escribir
+
+# Sincronización incremental (python main.py sync)
+SYNC_ENDPOINTS = ["status", "rawpower", "speed"]  # Series a sincronizar
+SYNC_DETAILED = False  # Sincronizar las series detalladas
+SYNC_OVERLAP_MINUTES = 30  # Margen que se vuelve a pedir antes de la marca
+SYNC_INITIAL_DAYS = 1  # Historia a pedir en la primera sincronización
+
+# Segmentos columnares con mmap (aquadapt_segments)
+SEGMENTS_ENABLED = False  # Anexar también como segmentos lo sincronizado o guardado
+SEGMENTS_PATH = "aquadapt_segments"  # Directorio raíz de los segmentos
+
+# Caché HTTP condicional del catálogo (/physicalPumps/ y /physicalPumps/{id}/)
+HTTP_CACHE_ENABLED = True  # Revalidar con ETag/Last-Modified en vez de descargar
+HTTP_CACHE_DIR = ".aquadapt_cache/http"  # Directorio de la caché
+HTTP_CACHE_TTL = 3600  # Segundos sin revalidar si el servidor no envía validadores
+
+# Instantánea compilada del archivo local de bombas (BMB_JSON_FILE)
+CATALOG_SNAPSHOT_ENABLED = True  # Reutilizar la instantánea si el JSON no cambia
+CATALOG_SNAPSHOT_DIR = ".aquadapt_cache"  # Directorio de la instantánea
+
+# Caché de respuestas compartida entre procesos (SQLite)
+SHARED_CACHE_ENABLED = True  # Reutilizar respuestas de otros procesos del equipo
+SHARED_CACHE_PATH = ".aquadapt_cache/responses.db"  # Base de datos compartida
+SHARED_CACHE_MAX_MB = 256  # Tamaño máximo antes de expulsar las menos usadas
+SHARED_CACHE_TTL = 300  # Segundos de validez de rangos recientes
+MEMORY_CACHE_MAX_MB = 64  # Presupuesto en memoria (L1) de series decodificadas
+
+# Lecturas de panel (catálogo y get_bomba_latest) servidas al momento
+SWR_ENABLED = True  # Servir resultados en caché y revalidar en segundo plano
+SWR_MAX_AGE = 60  # Segundos en que un resultado se sirve sin revalidar
+SWR_STALE_SECONDS = 600  # Segundos más en que se sirve mientras se refresca
+SWR_MAX_ENTRIES = 1024  # Resultados máximos en memoria
+SWR_MAX_WORKERS = 4  # Hilos para los refrescos en segundo plano
+SWR_LATEST_LOOKBACK_HOURS = 6  # Historia pedida para obtener el último valor
+
+# Series en columnas numpy (datetime64, float64, int8) en vez de listas de dicts
+TIMESERIES_ENABLED = False  # Devolver TimeSeries (requiere numpy)
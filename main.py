@@ -14,6 +14,22 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 import config
 from aquadapt_api_client_oficial_v2 import AquaAdvancedClient
+from aquadapt_catalog import PumpIndex
+from aquadapt_segments import SegmentStore
+from aquadapt_store import SeriesStore
+from aquadapt_sync import sync_fleet
+
+# Endpoints del menú que corresponden a una serie del almacén (endpoint, detallado)
+SERIES_ALMACEN = {
+    "status": ("status", False),
+    "detailed_status": ("status", True),
+    "power": ("rawpower", False),
+    "detailed_power": ("rawpower", True),
+    "speed": ("speed", False),
+    "detailed_speed": ("speed", True),
+    "onoffschedule": ("onoffschedule", False),
+    "detailed_onoffschedule": ("onoffschedule", True),
+}
 
 
 def mostrar_menu_endpoints():
@@ -103,8 +119,10 @@ def obtener_fechas():
 
 
 def seleccionar_bomba(bombas):
-    """Permitir al usuario seleccionar una bomba"""
+    """Permitir al usuario seleccionar una bomba por número, nombre o búsqueda"""
+    indice_bombas = PumpIndex(bombas)
     print(f"\n📋 BOMBAS DISPONIBLES ({len(bombas)} total):")
+    print(f"   Estaciones: {', '.join(indice_bombas.stations())}")
 
     # Mostrar primeras 10 bombas
     for i, bomba in enumerate(bombas[:10], 1):
@@ -116,15 +134,115 @@ def seleccionar_bomba(bombas):
         print(f"   ... y {len(bombas) - 10} bombas más")
 
     while True:
-        try:
-            opcion = input(f"\nSelecciona bomba (1-{min(10, len(bombas))}): ").strip()
+        opcion = input(
+            f"\nSelecciona bomba (1-{len(bombas)}), nombre (ej: EB3 G4) "
+            "o estación/búsqueda (ej: EB3): "
+        ).strip()
+        if not opcion:
+            continue
+
+        if opcion.isdigit():
             indice = int(opcion) - 1
-            if 0 <= indice < min(10, len(bombas)):
+            if 0 <= indice < len(bombas):
                 return bombas[indice]
-            else:
-                print("❌ Número inválido")
-        except ValueError:
-            print("❌ Ingresa un número válido")
+            print("❌ Número inválido")
+            continue
+
+        bomba = indice_bombas.get(opcion)
+        if bomba is not None:
+            return bomba
+
+        candidatas = indice_bombas.station(opcion) or [
+            b for b, _ in indice_bombas.search(opcion)
+        ]
+        if not candidatas:
+            print("❌ Ninguna bomba coincide")
+            continue
+
+        print(f"🔍 Coincidencias para '{opcion}':")
+        for i, bomba in enumerate(candidatas, 1):
+            print(f"   {i}. {bomba.get('name', 'Sin nombre')}")
+        eleccion = input(
+            f"Selecciona (1-{len(candidatas)}) o Enter para buscar de nuevo: "
+        ).strip()
+        if eleccion.isdigit() and 0 < int(eleccion) <= len(candidatas):
+            return candidatas[int(eleccion) - 1]
+
+
+def abrir_almacen():
+    """Abrir el almacén local de series según config"""
+    return SeriesStore(
+        getattr(config, "STORE_PATH", "aquadapt_series.db"),
+        batch_size=getattr(config, "STORE_BATCH_SIZE", 5000),
+        rollups=getattr(config, "STORE_ROLLUPS", True),
+    )
+
+
+def abrir_segmentos():
+    """Abrir los segmentos columnares si SEGMENTS_ENABLED (si no, None)"""
+    if not getattr(config, "SEGMENTS_ENABLED", False):
+        return None
+    return SegmentStore(getattr(config, "SEGMENTS_PATH", "aquadapt_segments"))
+
+
+def guardar_en_almacen(bomba_id, endpoint_name, datos):
+    """Guardar en el almacén local las series obtenidas en la consulta"""
+    series = datos if isinstance(datos, dict) else {endpoint_name: datos}
+    lotes = [
+        (bomba_id, *SERIES_ALMACEN[ep], puntos)
+        for ep, puntos in series.items()
+        if ep in SERIES_ALMACEN and isinstance(puntos, list)
+    ]
+    if not lotes:
+        return 0
+
+    segmentos = abrir_segmentos()
+    if segmentos is not None:
+        with segmentos:
+            for bomba, endpoint, detailed, puntos in lotes:
+                segmentos.append(bomba, endpoint, puntos, detailed)
+
+    with abrir_almacen() as store:
+        return store.write_many(lotes)
+
+
+def sincronizar():
+    """Sincronizar en el almacén local las series de todas las bombas"""
+    print("🔄 SINCRONIZACIÓN INCREMENTAL")
+    print("=" * 60)
+
+    client = AquaAdvancedClient()
+    bombas = client.get_bombas_list()
+    if not bombas:
+        print("❌ No se pudieron obtener las bombas")
+        return
+
+    endpoints = getattr(config, "SYNC_ENDPOINTS", ["status", "rawpower", "speed"])
+    print(f"📋 {len(bombas)} bombas x {len(endpoints)} endpoints")
+
+    segmentos = abrir_segmentos()
+    try:
+        with abrir_almacen() as store:
+            resumen = sync_fleet(
+                client,
+                store,
+                bombas,
+                endpoints,
+                detailed=getattr(config, "SYNC_DETAILED", False),
+                segments=segmentos,
+            )
+    finally:
+        if segmentos is not None:
+            segmentos.close()
+    client.close()
+
+    print(f"✅ {resumen['points']} puntos nuevos en {resumen['elapsed']:.1f}s")
+    print(f"   Con datos: {resumen['ok']}  Vacías: {resumen['empty']}")
+    if resumen["errors"]:
+        print(f"⚠️ {resumen['errors']} series con errores:")
+        for r in resumen["results"]:
+            if r["status"] == "error":
+                print(f"   • {r['bomba_id'][:8]}... {r['endpoint']}: {r['error']}")
 
 
 def main():
@@ -132,6 +250,11 @@ def main():
     print("🚀 CONSULTA SIMPLE - AQUAADVANCED API")
     print("=" * 60)
 
+    # Sincronización incremental (ej: tarea cron)
+    if len(sys.argv) > 1 and sys.argv[1] == "sync":
+        sincronizar()
+        return
+
     # Modo demo automático si se pasa argumento
     modo_demo = len(sys.argv) > 1 and sys.argv[1] == "demo"
     if modo_demo:
@@ -141,6 +264,7 @@ def main():
     # Inicializar cliente
     print("\n1. 🔧 Inicializando cliente...")
     client = AquaAdvancedClient()
+    client.as_timeseries = False  # Los resultados se guardan como JSON
 
     # Obtener bombas
     print("\n2. 📋 Obteniendo lista de bombas...")
@@ -338,6 +462,10 @@ def main():
 
             print(f"✅ Resultados guardados en: {filename}")
 
+            if getattr(config, "STORE_ENABLED", True):
+                escritos = guardar_en_almacen(bomba_id, endpoint_name, datos)
+                print(f"✅ {escritos} puntos guardados en el almacén local")
+
     except Exception as e:
         print(f"❌ Error en la consulta: {e}")
 